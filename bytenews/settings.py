@@ -98,4 +98,106 @@ CACHES = {
 INTERNAL_IPS = ['127.0.0.1']
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# NEW: Scraper concurrency. Ingestion runs as a staged pipeline (poll, fetch, extract,
+# summarize, audio); each stage has its own worker pool and a bounded input queue of
+# SCRAPER_QUEUE_SIZE items. Each remote host gets at most SCRAPER_PER_HOST_LIMIT requests at a time.
+SCRAPER_CONCURRENT = True
+SCRAPER_STAGE_WORKERS = {
+    "poll": 3,
+    "fetch": 8,
+    "extract": os.cpu_count() or 2,
+    "summarize": os.cpu_count() or 2,
+    "audio": 4,
+}
+SCRAPER_QUEUE_SIZE = 32
+SCRAPER_PER_HOST_LIMIT = 2
+# Summarized articles and finished audio are written in batches of up to SCRAPER_BATCH_SIZE,
+# or after SCRAPER_BATCH_DELAY seconds without new results.
+SCRAPER_BATCH_SIZE = 50
+SCRAPER_BATCH_DELAY = 1.0
+# Scrapers claim feeds and entries with leases (news.models.Lease) so several can share one
+# database; a claim not released within SCRAPER_LEASE_TTL seconds can be taken over.
+SCRAPER_LEASE_TTL = 600
+
+# NEW: Feed scheduler (`manage.py scrape_news`). Each feed's interval follows its observed
+# publish rate within [FEED_MIN_INTERVAL, FEED_MAX_INTERVAL] seconds, randomized by
+# +/- FEED_JITTER; failing feeds back off exponentially up to FEED_ERROR_BACKOFF_MAX.
+FEED_MIN_INTERVAL = 120
+FEED_MAX_INTERVAL = 6 * 3600
+FEED_JITTER = 0.1
+FEED_ERROR_BACKOFF_MAX = 6 * 3600
+
+
+# NEW: Shared process pool for CPU-bound text work (TextRank, HTML cleaning, extraction).
+# Set to 0 to run it synchronously on the calling thread.
+TEXT_PROCESS_WORKERS = os.cpu_count()
+
+# NEW: TextRank engine for summaries: "numpy" (vectorized, falls back to sumy on error) or "sumy".
+SUMMARIZER_ENGINE = "numpy"
+
+# NEW: Article extractors, tried in order until one passes its quality checks:
+# "fast" (lxml paragraph-density scoring) and "newspaper" (newspaper3k).
+EXTRACTION_ENGINES = ("fast", "newspaper")
+
+# NEW: Raw HTML archive. Every downloaded article page is compressed (zstd if installed,
+# else zlib) into append-only segment files under RAW_ARCHIVE_DIR, indexed by news.models.RawPage,
+# so `manage.py reprocess_articles` can re-extract and re-summarize without refetching.
+RAW_ARCHIVE_ENABLED = True
+RAW_ARCHIVE_DIR = BASE_DIR / 'raw_archive'
+RAW_ARCHIVE_SEGMENT_BYTES = 256 * 1024 * 1024
+
+# NEW: Background job queue (news.models.Job, processed by `manage.py run_jobs`).
+# A running job whose lock is older than JOB_VISIBILITY_TIMEOUT seconds is picked up again;
+# failures retry after JOB_RETRY_BACKOFF * 2**(attempt-1) seconds, up to JOB_MAX_ATTEMPTS tries.
+JOB_VISIBILITY_TIMEOUT = 300
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BACKOFF = 30
+JOB_RETRY_BACKOFF_MAX = 3600
+# A running scrape renews its leases, and its job's lock, every SCRAPER_HEARTBEAT_INTERVAL
+# seconds, stored articles or not; keep it well under JOB_VISIBILITY_TIMEOUT.
+SCRAPER_HEARTBEAT_INTERVAL = 60
+
+# NEW: Text-to-speech. TTS_BACKEND is "gtts" or "fake" (offline, for benchmarks and tests).
+# Summaries are split into sentences and up to TTS_CHUNK_WORKERS are synthesized at once.
+TTS_BACKEND = "gtts"
+TTS_CHUNK_WORKERS = 4
+TTS_FAKE_LATENCY = 0.0
+TTS_FAKE_PER_CHAR = 0.0
+
+# NEW: Shared HTTP client (news.utils.http) for feeds and article pages. Timeouts are in
+# seconds; HTTP_TOTAL_TIMEOUT bounds a whole download, HTTP_MAX_BYTES its size. After
+# HTTP_BREAKER_THRESHOLD consecutive failures a host is skipped for HTTP_BREAKER_COOLDOWN seconds.
+HTTP_POOL_SIZE = 20
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_READ_TIMEOUT = 15
+HTTP_TOTAL_TIMEOUT = 30
+HTTP_MAX_BYTES = 5 * 1024 * 1024
+HTTP_BREAKER_THRESHOLD = 5
+HTTP_BREAKER_COOLDOWN = 300
+
+# NEW: Near-duplicate detection at ingest (news.utils.dedup). Articles whose
+# SimHash is within SIMHASH_MAX_DISTANCE bits (at most 7) of one stored in the
+# last DUPLICATE_WINDOW_HOURS reuse its summary and audio.
+SIMHASH_MAX_DISTANCE = 6
+DUPLICATE_WINDOW_HOURS = 72
+
+# NEW: Scrape run history (news.models.ScrapeRun): how many runs to keep, and how
+# many of each run's slowest urls and errors to store.
+SCRAPE_RUN_HISTORY = 500
+SCRAPE_RUN_SLOWEST = 10
+SCRAPE_RUN_MAX_ERRORS = 50
+
+# NEW: Articles returned per poll of the scraper progress endpoint.
+SCRAPER_PROGRESS_PAGE_SIZE = 100
+
+# NEW: Article search through the SQLite FTS5 index (news.utils.search). False, or
+# any other database backend, falls back to a case-insensitive scan of titles, summaries
+# and excerpts; the rest of an article's (compressed) text is only searched through FTS.
+ARTICLE_SEARCH_FTS = True
+
+# NEW: Keyset pagination of article lists (news.utils.cursors). Totals are counted
+# no further than ARTICLE_COUNT_LIMIT and shown as "1000+" beyond it.
+ARTICLE_API_PAGE_SIZE = 20
+ARTICLE_COUNT_LIMIT = 1000
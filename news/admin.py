@@ -1,24 +1,36 @@
 from django.contrib import admin
-from django.db.models import Count, Sum, Max, Avg, F, Q # Import Avg and Q
+from django.db.models import Sum, Max, Avg, F # Import Avg
 from django.utils.html import format_html
 from django.urls import reverse
 from django.contrib.admin import RelatedOnlyFieldListFilter 
-from .models import Article, Category, UserPreference, ReadingHistory, SummaryFeedback, ArticleLike, Bookmark, Comment, UserArticleMetrics
+from news.utils import engagement, search
+from .forms import ArticleAdminForm
+from .models import Article, Category, UserPreference, ReadingHistory, SummaryFeedback, ArticleLike, Bookmark, Comment, UserArticleMetrics, Job, Feed, ScrapeRun
 
 class ArticleAdmin(admin.ModelAdmin):
-    list_display = ('title', 'source', 'published_at', 'author', 'approved_status', 'total_likes', 'total_comments')
+    form = ArticleAdminForm
+    list_display = ('title', 'source', 'published_at', 'author', 'approved_status', 'like_count', 'comment_count')
     list_filter = (
     'source',
     ('category', RelatedOnlyFieldListFilter),
     'approved',
     'published_at',
 )
-    search_fields = ('title', 'content', 'author')
-    readonly_fields = ('published_at',)
+    # Article text is searched through the full-text index; see get_search_results.
+    search_fields = ('title', 'author')
+    readonly_fields = ('published_at', 'excerpt', 'word_count')
+    # A select of every article would be loaded into the change form otherwise.
+    raw_id_fields = ('canonical', 'scrape_run')
     date_hierarchy = 'published_at'
     change_list_template = "admin/news/article/change_list.html"
 
 
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            results = results | queryset.filter(pk__in=search.matching(search_term, queryset.db))
+        return results, may_have_duplicates
+
     # Bulk Actions
     actions = ['make_approved', 'make_pending']
 
@@ -69,15 +81,15 @@ class ArticleAdmin(admin.ModelAdmin):
 
             # NEW: Global Dashboard Metrics
             # Top Liked Articles
-            top_liked_articles = Article.objects.annotate(like_count=Count('likes')).order_by('-like_count')[:5]
+            top_liked_articles = Article.objects.order_by('-like_count')[:5]
             response.context_data['top_liked_articles'] = top_liked_articles
 
             # Top Commented Articles
-            top_commented_articles = Article.objects.annotate(comment_count=Count('comments')).order_by('-comment_count')[:5]
+            top_commented_articles = Article.objects.order_by('-comment_count')[:5]
             response.context_data['top_commented_articles'] = top_commented_articles
 
             # Top Useful Summaries (based on feedback)
-            top_useful_summaries = Article.objects.annotate(useful_count=Count('summaryfeedback', filter=Q(summaryfeedback__useful=True))).order_by('-useful_count')[:5]
+            top_useful_summaries = Article.objects.order_by('-useful_count')[:5]
             response.context_data['top_useful_summaries'] = top_useful_summaries
 
             # Top Readers (by Time on Page) - MODIFIED to format time in Python
@@ -128,13 +140,14 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ('article__title', 'user__username', 'content')
     actions = ['approve_comments', 'disapprove_comments']
 
+    # Through engagement so each article's comment_count follows the moderation.
     def approve_comments(self, request, queryset):
-        updated = queryset.update(approved=True)
+        updated = engagement.set_comment_approval(queryset, True)
         self.message_user(request, f"{updated} comments approved.", level='success')
     approve_comments.short_description = "Approve selected comments"
 
     def disapprove_comments(self, request, queryset):
-        updated = queryset.update(approved=False)
+        updated = engagement.set_comment_approval(queryset, False)
         self.message_user(request, f"{updated} comments disapproved.", level='warning')
     disapprove_comments.short_description = "Disapprove selected comments"
 
@@ -144,6 +157,32 @@ class UserArticleMetricsAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'article__title')
     readonly_fields = ('last_tracked_at',)
 
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'action', 'article', 'status', 'attempts', 'run_after', 'locked_by', 'updated_at')
+    list_filter = ('action', 'status')
+    search_fields = ('article__title', 'last_error')
+    readonly_fields = ('created_at', 'updated_at')
+
+class FeedAdmin(admin.ModelAdmin):
+    list_display = ('name', 'url', 'active', 'poll_interval', 'next_poll_at', 'last_new_items', 'last_duration', 'consecutive_failures', 'total_failures')
+    list_filter = ('active',)
+    search_fields = ('name', 'url')
+    readonly_fields = (
+        'etag', 'last_modified', 'body_hash', 'newest_entry_id', 'last_status', 'last_polled_at', 'publish_gap',
+        'last_duration', 'last_new_items', 'last_success_at', 'last_error', 'consecutive_failures', 'total_polls', 'total_failures',
+    )
+    actions = ['poll_now']
+
+    def poll_now(self, request, queryset):
+        updated = queryset.update(next_poll_at=None)
+        self.message_user(request, f"{updated} feeds will be polled on the scheduler's next pass.")
+    poll_now.short_description = "Poll selected feeds on the next scheduler pass"
+
+class ScrapeRunAdmin(admin.ModelAdmin):
+    list_display = ('started_at', 'status', 'mode', 'duration', 'feed_count', 'article_count', 'duplicate_count', 'error_count', 'worker_id')
+    list_filter = ('status', 'mode')
+    readonly_fields = [field.name for field in ScrapeRun._meta.fields]
+
 admin.site.register(Article, ArticleAdmin)
 admin.site.register(Category)
 admin.site.register(UserPreference)
@@ -152,4 +191,7 @@ admin.site.register(SummaryFeedback, SummaryFeedbackAdmin)
 admin.site.register(ArticleLike, ArticleLikeAdmin)
 admin.site.register(Bookmark, BookmarkAdmin)
 admin.site.register(Comment, CommentAdmin)
-admin.site.register(UserArticleMetrics, UserArticleMetricsAdmin)
\ No newline at end of file
+admin.site.register(UserArticleMetrics, UserArticleMetricsAdmin)
+admin.site.register(Job, JobAdmin)
+admin.site.register(Feed, FeedAdmin)
+admin.site.register(ScrapeRun, ScrapeRunAdmin)
@@ -1,5 +1,5 @@
 from django import forms
-from .models import UserPreference, SummaryFeedback, Comment # Import Comment
+from .models import Article, UserPreference, SummaryFeedback, Comment # Import Comment
 
 class UserPreferenceForm(forms.ModelForm):
     class Meta:
@@ -27,4 +27,22 @@ class CommentForm(forms.ModelForm):
         }
         labels = {
             'content': '' # No label for content field, use placeholder instead
-        }
\ No newline at end of file
+        }
+
+# NEW FORM: ArticleAdminForm. The article text lives in ArticleBody; the admin
+# edits it as if it were a column of the article.
+class ArticleAdminForm(forms.ModelForm):
+    content = forms.CharField(widget=forms.Textarea, required=False)
+
+    class Meta:
+        model = Article
+        fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.initial.setdefault('content', self.instance.content)
+
+    def save(self, commit=True):
+        self.instance.content = self.cleaned_data['content']
+        return super().save(commit)
@@ -0,0 +1,82 @@
+import multiprocessing
+import os
+import resource
+import time
+from django.core.management.base import BaseCommand, CommandError
+from news.utils import extraction
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "bench_fixtures", "html")
+
+# Label -> extractor chain. "fast+newspaper" is what the scraper runs by default.
+CHAINS = {
+    "fast": ("fast",),
+    "newspaper": ("newspaper",),
+    "fast+newspaper": extraction.DEFAULT_CHAIN,
+}
+
+
+def peak_rss_mb():
+    # VmHWM starts over at exec; ru_maxrss would still include the parent's peak on Linux.
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def reset_peak_rss():
+    # Linux only: restart VmHWM from the current RSS, so the next reading covers what follows.
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def _run_chain(chain, pages, repeat, results):
+    # Runs in a fresh process so each engine's imports and peak RSS are its own.
+    baseline = peak_rss_mb()
+    extracted = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        extracted = 0
+        for name, html in pages:
+            if extraction.extract(f"http://bench.test/{name}", html, chain):
+                extracted += 1
+    elapsed = time.perf_counter() - start
+    results.put((len(pages) * repeat / elapsed, baseline, peak_rss_mb(), extracted))
+
+
+class Command(BaseCommand):
+    help = "Compare article extractors on saved HTML pages: pages per second and peak RSS."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=FIXTURE_DIR, help="Directory of saved .html pages.")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--engines", nargs="+", choices=list(CHAINS), default=list(CHAINS))
+
+    def handle(self, *args, **options):
+        directory = os.path.abspath(options["dir"])
+        names = sorted(name for name in os.listdir(directory) if name.endswith((".html", ".htm")))
+        if not names:
+            raise CommandError(f"No .html files in {directory}")
+        pages = []
+        for name in names:
+            with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as page:
+                pages.append((name, page.read()))
+
+        context = multiprocessing.get_context("spawn")
+        self.stdout.write(f"{len(pages)} pages from {directory}, {options['repeat']} passes each")
+        self.stdout.write(f"{'engine':>15} {'pages/s':>9} {'peak RSS (MB)':>14} {'growth (MB)':>12} {'extracted':>10}")
+        for label in options["engines"]:
+            results = context.Queue()
+            worker = context.Process(target=_run_chain, args=(CHAINS[label], pages, options["repeat"], results))
+            worker.start()
+            rate, baseline, peak, extracted = results.get()
+            worker.join()
+            self.stdout.write(
+                f"{label:>15} {rate:>9.1f} {peak:>14.1f} {peak - baseline:>12.1f} {extracted:>6}/{len(pages)}"
+            )
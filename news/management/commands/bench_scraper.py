@@ -0,0 +1,296 @@
+import hashlib
+import html
+import json
+import os
+import random
+import re
+import resource
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from news.management.commands.bench_extractors import FIXTURE_DIR as PAGE_DIR, peak_rss_mb, reset_peak_rss
+from news.management.commands.bench_summarizer import synthetic_article
+from news.models import Feed
+from news.utils import cpu_pool, http
+from news.utils.pipeline import RunStats
+from news.utils.scraper import fetch_articles
+
+FEED_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "bench_fixtures", "feeds")
+STAGES = ("poll", "fetch", "extract", "summarize", "audio", "db")
+
+_ITEM = re.compile(r"<item\b.*?</item>", re.S | re.I)
+_LINK = re.compile(r"<link>\s*(.*?)\s*</link>", re.S | re.I)
+_TITLE = re.compile(r"<title>\s*(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?\s*</title>", re.S | re.I)
+# Runs of template text at least this long are prose (the extractor's own cut-off)
+# and get replaced; shorter ones are navigation, captions and the like.
+_PROSE = re.compile(r">([^<>]{40,})<")
+
+
+class ReplayServer:
+    """
+    Local stand-in for the feed hosts. Each captured feed is served from its
+    own port, standing in for its site, so per-host limits and circuit
+    breakers behave as they do against the real hosts. Item links are
+    rewritten to point back at the stand-in; every article page is one of the
+    saved HTML templates with its prose rewritten, so each story
+    reads differently, except that a `duplicate_rate` share of them are a copy
+    of the wire story first published, under the same title, by another feed.
+
+    Latency and failures are drawn per path from `seed`, so a given url is
+    always as slow, and fails or not, the same way on every run.
+    """
+
+    def __init__(self, feeds, templates, copies=1, latency=0.0, jitter=0.5, failure_rate=0.0, duplicate_rate=0.0, seed=0):
+        self.feeds = feeds
+        self.templates = templates
+        self.copies = copies
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.duplicate_rate = duplicate_rate
+        self.seed = seed
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        self._servers = {}
+        self._documents = {}
+        self._titles = {}
+        self._first_with_title = {}
+        self._pages = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        for name in self.feeds:
+            server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler(name))
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name=f"replay-{name}", daemon=True).start()
+            self._servers[name] = server
+        for name, document in self.feeds.items():
+            for copy in range(self.copies):
+                self._documents[(name, f"/feed/{copy}.xml")] = self._rewrite(name, copy, document)
+        return self
+
+    def stop(self):
+        for server in self._servers.values():
+            server.shutdown()
+            server.server_close()
+        self._servers.clear()
+
+    def base_url(self, name):
+        return f"http://127.0.0.1:{self._servers[name].server_address[1]}"
+
+    def feed_urls(self):
+        """(feed name, url) for every feed and copy being served."""
+        return [
+            (name if copy == 0 else f"{name}-{copy}", f"{self.base_url(name)}/feed/{copy}.xml")
+            for name in self.feeds for copy in range(self.copies)
+        ]
+
+    def _rewrite(self, name, copy, document):
+        def item(match):
+            block = match.group(0)
+            link = _LINK.search(block)
+            if not link:
+                return block
+            original = html.unescape(link.group(1))
+            parts = urlsplit(original)
+            path = f"/c{copy}{parts.path or '/'}" + (f"?{parts.query}" if parts.query else "")
+            title = _TITLE.search(block)
+            title = html.unescape(title.group(1)) if title else path
+            self._titles[(name, urlsplit(path).path)] = title
+            self._first_with_title.setdefault(title, f"{name}{urlsplit(path).path}")
+            return block.replace(link.group(1), html.escape(self.base_url(name) + path))
+        return _ITEM.sub(item, document.decode("utf-8")).encode("utf-8")
+
+    def _rng(self, *parts):
+        return random.Random(":".join(str(part) for part in (self.seed, *parts)))
+
+    def _page(self, name, path):
+        key = (name, path)
+        with self._lock:
+            if key in self._pages:
+                return self._pages[key]
+        title = self._titles.get(key, path)
+        story = f"{name}{path}"
+        if self._rng("duplicate", name, path).random() < self.duplicate_rate:
+            story = self._first_with_title.get(title, story)
+        rng = self._rng("story", story)
+        template = self.templates[rng.randrange(len(self.templates))]
+
+        def prose(match):
+            return f">{synthetic_article(rng.randint(15, 60), seed=rng.random())}<"
+        body = _PROSE.sub(prose, template)
+        page = f"<title>{html.escape(title)}</title>{body}".encode("utf-8")
+        with self._lock:
+            self._pages[key] = page
+        return page
+
+    def _handler(self, name):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                rng = replay._rng("request", name, path)
+                time.sleep(max(0.0, replay.latency * rng.uniform(1 - replay.jitter, 1 + replay.jitter)))
+                kind = "feed" if path.startswith("/feed/") else "article"
+                status, headers, body = 200, {}, b""
+                if rng.random() < replay.failure_rate:
+                    status, kind = 503, "failed"
+                elif kind == "feed":
+                    document = replay._documents.get((name, path))
+                    if document is None:
+                        status = 404
+                    else:
+                        etag = f'"{hashlib.sha1(document).hexdigest()}"'
+                        headers = {"ETag": etag, "Content-Type": "application/rss+xml"}
+                        if self.headers.get("If-None-Match") == etag:
+                            status, kind = 304, "not_modified"
+                        else:
+                            body = document
+                else:
+                    headers = {"Content-Type": "text/html; charset=utf-8"}
+                    body = replay._page(name, path)
+                with replay._lock:
+                    replay.requests[kind] += 1
+                try:
+                    self.send_response(status)
+                    for header, value in headers.items():
+                        self.send_header(header, value)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client gave up (timeout); nothing to report.
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _read_dir(directory, suffixes, mode="r"):
+    names = sorted(name for name in os.listdir(directory) if name.endswith(suffixes))
+    contents = {}
+    for name in names:
+        with open(os.path.join(directory, name), mode) as fixture:
+            contents[os.path.splitext(name)[0]] = fixture.read()
+    return contents
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay recorded feeds through fetch_articles against a local stand-in with simulated latency and "
+        "failures. Reports articles/s, per-stage p50/p95, queries and peak memory. Needs no network and keeps nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--feeds", default=FEED_DIR, help="Directory of captured .xml feeds.")
+        parser.add_argument("--pages", default=PAGE_DIR, help="Directory of saved .html pages used as article templates.")
+        parser.add_argument("--copies", type=int, default=1, help="Serve every feed this many times, with distinct links.")
+        parser.add_argument("--latency", type=float, default=0.05, help="Mean seconds per response.")
+        parser.add_argument("--jitter", type=float, default=0.5, help="Latency varies by +/- this fraction.")
+        parser.add_argument("--failure-rate", type=float, default=0.02, help="Share of urls answering 503.")
+        parser.add_argument("--duplicate-rate", type=float, default=0.1, help="Share of articles that are another feed's wire story.")
+        parser.add_argument("--tts-latency", type=float, default=0.05, help="Fake TTS seconds per round trip.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--sequential", action="store_true", help="Run the sequential scraper instead of the pipeline.")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        feeds = {name: document.encode("utf-8") for name, document in _read_dir(options["feeds"], (".xml", ".rss")).items()}
+        templates = list(_read_dir(options["pages"], (".html", ".htm")).values())
+        if not feeds or not templates:
+            raise CommandError("Need at least one .xml feed and one .html page")
+
+        workdir = tempfile.mkdtemp(prefix="bench_scraper-")
+        stats = RunStats()
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        replay = ReplayServer(
+            feeds, templates, copies=options["copies"], latency=options["latency"], jitter=options["jitter"],
+            failure_rate=options["failure_rate"], duplicate_rate=options["duplicate_rate"], seed=options["seed"],
+        )
+        overrides = override_settings(
+            TTS_BACKEND="fake",
+            TTS_FAKE_LATENCY=options["tts_latency"],
+            MEDIA_ROOT=os.path.join(workdir, "media"),
+            RAW_ARCHIVE_DIR=os.path.join(workdir, "raw_archive"),
+        )
+        try:
+            with replay, overrides:
+                http.reset()
+                cpu_pool.get_executor()  # Start the process pool outside the measured run.
+                reset_peak_rss()
+                # Everything the run writes is rolled back.
+                with transaction.atomic():
+                    rows = [Feed.objects.create(name=name, url=url) for name, url in replay.feed_urls()]
+                    with connection.execute_wrapper(count_query):
+                        started = time.perf_counter()
+                        articles = fetch_articles(feeds=rows, concurrent=not options["sequential"], stats=stats)
+                        elapsed = time.perf_counter() - started
+                    transaction.set_rollback(True)
+                peak = peak_rss_mb()
+        finally:
+            http.reset()
+            shutil.rmtree(workdir, ignore_errors=True)
+        cpu_pool.shutdown()
+        # Pool workers are reaped by now, so their peak is counted here.
+        pool_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+        report = {
+            "mode": "sequential" if options["sequential"] else "pipeline",
+            "feeds": len(rows),
+            "articles": len(articles),
+            "seconds": elapsed,
+            "articles_per_second": len(articles) / max(elapsed, 1e-9),
+            "queries": queries[0],
+            "queries_per_article": queries[0] / max(len(articles), 1),
+            "peak_rss_mb": peak,
+            "pool_peak_rss_mb": pool_peak,
+            "stages": stats.stage_summary(),
+            "counts": dict(stats.counts),
+            "requests": dict(replay.requests),
+            "errors": [list(error) for error in stats.errors],
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+            return
+        self._print(report, options)
+
+    def _print(self, report, options):
+        self.stdout.write(
+            f"{report['mode']}: {report['feeds']} feeds, latency {options['latency'] * 1000:.0f} ms "
+            f"+/-{options['jitter']:.0%}, {options['failure_rate']:.0%} failures, {options['duplicate_rate']:.0%} wire copies"
+        )
+        self.stdout.write(
+            f"{report['articles']} articles in {report['seconds']:.2f}s ({report['articles_per_second']:.1f} articles/s), "
+            f"{report['counts'].get('duplicates', 0)} duplicates"
+        )
+        self.stdout.write(f"{report['queries']} queries ({report['queries_per_article']:.1f} per article)")
+        self.stdout.write(f"peak RSS {report['peak_rss_mb']:.1f} MB, pool workers {report['pool_peak_rss_mb']:.1f} MB")
+        self.stdout.write(f"{'stage':>10} {'items':>6} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9} {'total (s)':>10}")
+        for stage in STAGES:
+            row = report["stages"].get(stage)
+            if row:
+                self.stdout.write(
+                    f"{stage:>10} {row['count']:>6} {row['p50'] * 1000:>9.1f} {row['p95'] * 1000:>9.1f} "
+                    f"{row['max'] * 1000:>9.1f} {row['total']:>10.2f}"
+                )
+        if report["errors"]:
+            self.stdout.write(f"{len(report['errors'])} errors, e.g. {report['errors'][0][0]} {report['errors'][0][1]}: {report['errors'][0][2]}")
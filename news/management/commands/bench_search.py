@@ -0,0 +1,139 @@
+import itertools
+import json
+import random
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from news.management.commands.bench_summarizer import synthetic_article
+from news.models import Article
+from news.utils import search
+from news.utils.pipeline import percentile
+
+# Words the synthetic vocabulary never produces, planted in a known share of articles
+# so the benchmark has selective queries as well as ones matching half the table.
+RARE_BODY_WORD = "zeppelin"
+RARE_TITLE_WORD = "referendum"
+
+QUERIES = (
+    "election",            # common single word
+    "energy prices",       # two common words
+    RARE_BODY_WORD,        # in 0.1% of bodies
+    RARE_TITLE_WORD,       # in 1% of titles
+    "parliam",             # prefix, as typed
+)
+
+
+def synthetic_rows(count, words, seed=0):
+    rng = random.Random(seed)
+    now = timezone.now()
+    for i in range(count):
+        title = synthetic_article(8, seed=seed * 7919 + i).split(".")[0]
+        content = synthetic_article(words, seed=seed * 104729 + i)
+        if i % 100 == 0:
+            title = f"{title} {RARE_TITLE_WORD}"
+        if i % 1000 == 0:
+            content = f"{content} The {RARE_BODY_WORD} returned."
+        url = f"https://bench.invalid/{seed}/{i}"
+        yield Article(
+            title=title,
+            content=content,
+            summary=content[:200],
+            url=url,
+            url_hash=Article.hash_url(url),
+            source="bench",
+            approved=True,
+            published_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+        )
+
+
+def _time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return result, timings
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the search fallback (a LIKE scan over title, summary and excerpt) with the FTS5 index on "
+        "synthetic articles: first page plus count, as article_list runs it. Inserts and rolls back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--articles", type=int, default=100000)
+        parser.add_argument("--words", type=int, default=150, help="Words per synthetic article.")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--page-size", type=int, default=6)
+        parser.add_argument("--query", action="append", dest="queries", help="Search for this instead (repeatable).")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        if not search.fts_enabled():
+            raise CommandError("The FTS5 search index is not available on this database; run migrate on SQLite.")
+        page_size, repeat = options["page_size"], options["repeat"]
+        queries = options["queries"] or QUERIES
+
+        def scan(query):
+            # The full text is compressed in ArticleBody, out of LIKE's reach.
+            rows = Article.objects.filter(approved=True).filter(
+                Q(title__icontains=query) | Q(summary__icontains=query) | Q(excerpt__icontains=query)
+            )
+            return rows.count(), list(rows.order_by("-published_at")[:page_size])
+
+        def indexed(query):
+            rows = search.search(Article.objects.filter(approved=True), query)
+            return rows.count(), list(rows.order_by("search_rank", "-published_at")[:page_size])
+
+        results = []
+        # Everything inserted here is rolled back.
+        with transaction.atomic():
+            existing = Article.objects.count()
+            started = time.perf_counter()
+            rows = synthetic_rows(options["articles"], options["words"], options["seed"])
+            while batch := list(itertools.islice(rows, 1000)):
+                Article.store_bodies(Article.objects.bulk_create(batch))
+            insert_seconds = time.perf_counter() - started
+            for query in queries:
+                (scan_hits, _), scan_times = _time(lambda: scan(query), repeat)
+                (fts_hits, page), fts_times = _time(lambda: indexed(query), repeat)
+                results.append({
+                    "query": query,
+                    "scan_hits": scan_hits,
+                    "fts_hits": fts_hits,
+                    "scan_p50": percentile(scan_times, 0.5),
+                    "fts_p50": percentile(fts_times, 0.5),
+                    "speedup": percentile(scan_times, 0.5) / max(percentile(fts_times, 0.5), 1e-9),
+                    "top": page[0].title if page else None,
+                })
+            transaction.set_rollback(True)
+
+        report = {
+            "articles": options["articles"],
+            "existing_articles": existing,
+            "words": options["words"],
+            "insert_seconds": insert_seconds,
+            "queries": results,
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+            return
+        self.stdout.write(
+            f"{report['articles']} synthetic articles of {report['words']} words (+{existing} existing), "
+            f"inserted and indexed in {insert_seconds:.1f}s"
+        )
+        self.stdout.write(f"{'query':>16} {'LIKE hits':>10} {'FTS hits':>9} {'LIKE (ms)':>10} {'FTS (ms)':>9} {'speedup':>8}")
+        for row in results:
+            self.stdout.write(
+                f"{row['query']:>16} {row['scan_hits']:>10} {row['fts_hits']:>9} {row['scan_p50'] * 1000:>10.1f} "
+                f"{row['fts_p50'] * 1000:>9.1f} {row['speedup']:>7.1f}x"
+            )
+        self.stdout.write(
+            "FTS hits differ from LIKE where stemming or word boundaries do (LIKE also matches inside words), "
+            "and LIKE cannot see past the excerpt."
+        )
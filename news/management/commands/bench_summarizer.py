@@ -0,0 +1,51 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from news.utils import text
+
+VOCABULARY = (
+    "government minister election economy market report police court health storm city "
+    "officials said thursday investigation energy prices workers strike climate talks "
+    "border security company shares profits hospital patients school students budget "
+    "vote parliament president inflation interest rates bank trade deal war ceasefire"
+).split()
+
+
+def synthetic_article(word_count, seed=0):
+    rng = random.Random(seed)
+    sentences, total = [], 0
+    while total < word_count:
+        length = rng.randint(8, 30)
+        words = [rng.choice(VOCABULARY) for _ in range(length)]
+        sentences.append(" ".join(words).capitalize() + ".")
+        total += length
+    return " ".join(sentences)
+
+
+class Command(BaseCommand):
+    help = "Compare the NumPy TextRank engine with sumy on synthetic 1k/5k/20k-word articles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 5000, 20000])
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--sentences", type=int, default=3)
+
+    def handle(self, *args, **options):
+        text.warm_up()
+        self.stdout.write(f"{'words':>8} {'engine':>8} {'best (s)':>10} {'speedup':>8}")
+        for size in options["sizes"]:
+            article = synthetic_article(size, seed=size)
+            timings = {}
+            summaries = {}
+            for engine in text.ENGINES:
+                best = float("inf")
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    summaries[engine] = text.generate_summary(article, options["sentences"], engine=engine)
+                    best = min(best, time.perf_counter() - start)
+                timings[engine] = best
+            for engine in text.ENGINES:
+                speedup = timings["sumy"] / timings[engine]
+                self.stdout.write(f"{size:>8} {engine:>8} {timings[engine]:>10.4f} {speedup:>7.1f}x")
+            if summaries["numpy"] != summaries["sumy"]:
+                self.stdout.write(self.style.WARNING(f"  engines picked different sentences at {size} words"))
@@ -0,0 +1,37 @@
+import shutil
+import tempfile
+import time
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from news.management.commands.bench_summarizer import synthetic_article
+from news.utils import audio, tts
+
+
+class Command(BaseCommand):
+    help = "Compare whole-text and sentence-chunked TTS latency using the offline fake engine."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sentences", nargs="+", type=int, default=[3, 5, 7])
+        parser.add_argument("--latency", type=float, default=0.3, help="Simulated seconds per TTS round trip.")
+        parser.add_argument("--per-char", type=float, default=0.002, help="Simulated seconds per character.")
+
+    def handle(self, *args, **options):
+        backend = tts.FakeTTSBackend(latency=options["latency"], per_char=options["per_char"])
+        self.stdout.write(f"{'sentences':>9} {'whole (s)':>10} {'chunked (s)':>12} {'speedup':>8}")
+        for count in options["sentences"]:
+            text = " ".join(audio.split_chunks(synthetic_article(count * 25, seed=count))[:count])
+
+            start = time.perf_counter()
+            backend.synthesize(text, audio.DEFAULT_LANGUAGE)
+            whole = time.perf_counter() - start
+
+            media_root = tempfile.mkdtemp()
+            try:
+                with override_settings(MEDIA_ROOT=media_root):
+                    start = time.perf_counter()
+                    audio.synthesize(text, backend=backend)
+                    chunked = time.perf_counter() - start
+            finally:
+                shutil.rmtree(media_root, ignore_errors=True)
+
+            self.stdout.write(f"{count:>9} {whole:>10.3f} {chunked:>12.3f} {whole / chunked:>7.1f}x")
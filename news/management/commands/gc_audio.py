@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from news.utils import audio
+
+
+class Command(BaseCommand):
+    help = "Recount audio blob references and delete mp3 files no article points at."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="List what would be removed without deleting.")
+        parser.add_argument("--grace", type=int, default=3600, help="Keep files younger than this many seconds.")
+        parser.add_argument("--chunk-max-age", type=int, default=30 * 24 * 3600,
+                            help="Evict cached sentence chunks unused for this many seconds.")
+
+    def handle(self, *args, **options):
+        removed = audio.collect_garbage(
+            dry_run=options["dry_run"],
+            grace_seconds=options["grace"],
+            chunk_max_age=options["chunk_max_age"],
+        )
+        verb = "Would remove" if options["dry_run"] else "Removed"
+        for name in removed:
+            self.stdout.write(f"  {name}")
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(removed)} orphaned audio files."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from news.models import Article
+from news.utils import engagement
+
+
+class Command(BaseCommand):
+    help = "Rebuild the like, comment, bookmark and feedback counters on articles from the rows they count."
+
+    def add_arguments(self, parser):
+        parser.add_argument("article_ids", nargs="*", type=int, help="Only these articles (default: all).")
+
+    def handle(self, *args, **options):
+        articles = Article.objects.all()
+        if options["article_ids"]:
+            articles = articles.filter(pk__in=options["article_ids"])
+        fixed = engagement.recount(articles)
+        for article_id in fixed[:50]:
+            self.stdout.write(f"  article {article_id}")
+        self.stdout.write(self.style.SUCCESS(f"Corrected the counters of {len(fixed)} of {articles.count()} articles."))
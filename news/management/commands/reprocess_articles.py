@@ -0,0 +1,96 @@
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from news.models import Article, Job, RawPage
+from news.utils import archive, audio, cpu_pool, jobs
+from news.utils.text import summarize_ranked
+
+
+class Command(BaseCommand):
+    help = "Re-run extraction and summarization from the raw HTML archive, on all cores, without refetching."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", help="Only articles from this source.")
+        parser.add_argument("--limit", type=int, help="Stop after this many articles.")
+        parser.add_argument("--batch-size", type=int, default=200, help="Pages in flight, and rows per UPDATE.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without saving.")
+
+    def handle(self, *args, **options):
+        # Duplicates read out their canonical's summary; they are brought along below.
+        articles = Article.objects.filter(url__in=RawPage.objects.values("url"), canonical__isnull=True).order_by("pk")
+        if options["source"]:
+            articles = articles.filter(source=options["source"])
+        if options["limit"]:
+            articles = articles[:options["limit"]]
+        # Ids, urls and what decides whether the audio is still current; the
+        # pages stay on disk until a worker reads them.
+        rows = list(articles.values_list("pk", "url", "summary", "audio_file"))
+        pages = {page.url: page for page in RawPage.objects.filter(url__in=[row[1] for row in rows])}
+        workers = getattr(settings, "TEXT_PROCESS_WORKERS", os.cpu_count()) or 1
+        self.stdout.write(f"Reprocessing {len(rows)} articles from {archive.archive_dir()} with {workers} workers")
+
+        started = time.perf_counter()
+        updated = failed = requeued = 0
+        batch_size = options["batch_size"]
+        for start in range(0, len(rows), batch_size):
+            batch = []
+            stale_audio = []
+            resummarized = {}
+            for (pk, url, summary, audio_file), result in zip(rows[start:start + batch_size], self._reprocess(rows[start:start + batch_size], pages)):
+                if isinstance(result, Exception) or not result[0]:
+                    failed += 1
+                    self.stderr.write(f"{url}: {result if isinstance(result, Exception) else 'no text extracted'}")
+                    continue
+                content, ranking = result
+                # Setting content fills in reading_time, word_count and the excerpt.
+                article = Article(
+                    pk=pk,
+                    content=content,
+                    summary=summarize_ranked(content, ranking),
+                    summary_ranking=ranking,
+                    summary_ranking_hash=Article.hash_content(content),
+                    audio_file=audio_file,
+                )
+                batch.append(article)
+                if article.summary != summary:
+                    resummarized[pk] = article.summary
+                    # The audio reads the old summary out; it is made again by the job queue.
+                    if audio_file:
+                        stale_audio.append(article)
+            if batch and not options["dry_run"]:
+                Article.objects.bulk_update(batch, ["reading_time", "word_count", "excerpt", "summary"])
+                Article.store_bodies(batch)
+                duplicates = list(Article.objects.filter(canonical_id__in=resummarized).only("pk", "canonical_id", "audio_file"))
+                for duplicate in duplicates:
+                    duplicate.summary = resummarized[duplicate.canonical_id]
+                Article.objects.bulk_update(duplicates, ["summary"])
+                # Only canonicals are voiced again; attaching their new audio gives it to the duplicates.
+                audio.detach_many(stale_audio + duplicates)
+                jobs.enqueue_many(Job.ACTION_AUDIO, stale_audio)
+            updated += len(batch)
+            requeued += len(stale_audio)
+
+        elapsed = time.perf_counter() - started
+        verb = "Would update" if options["dry_run"] else "Updated"
+        self.stdout.write(
+            f"{verb} {updated} articles, {failed} failed, in {elapsed:.1f}s ({len(rows) / max(elapsed, 1e-9):.1f} articles/s); "
+            f"{requeued} audio summaries {'would be ' if options['dry_run'] else ''}queued again"
+        )
+
+    def _reprocess(self, rows, pages):
+        """Result per row, in order: (content, ranking), or the exception that row raised."""
+        directory = archive.archive_dir()
+        work = [(directory, pages[row[1]].segment, pages[row[1]].offset, pages[row[1]].length, row[1]) for row in rows]
+        executor = cpu_pool.get_executor()
+        if executor is None:
+            futures = None
+        else:
+            futures = [executor.submit(archive.reprocess_page, *job) for job in work]
+        results = []
+        for index, job in enumerate(work):
+            try:
+                results.append(futures[index].result() if futures else cpu_pool.run(archive.reprocess_page, *job))
+            except Exception as e:
+                results.append(e)
+        return results
@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from news.utils import jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued background jobs (audio generation, scraper runs)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit when the queue is empty.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when there is nothing to do.")
+        parser.add_argument("--worker-id", default=None)
+        parser.add_argument("--visibility-timeout", type=int, default=None)
+
+    def handle(self, *args, **options):
+        worker_id = options["worker_id"] or jobs.default_worker_id()
+        self.stdout.write(f"Job worker {worker_id} started.")
+        while True:
+            job = jobs.work_once(worker_id, options["visibility_timeout"])
+            if job is not None:
+                self.stdout.write(f"Job {job.pk} ({job.action}) -> {job.status}")
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["sleep"])
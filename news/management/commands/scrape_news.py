@@ -0,0 +1,33 @@
+import time
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from news.utils import feeds
+from news.utils.scraper import iter_articles
+
+
+class Command(BaseCommand):
+    help = "Poll RSS feeds, each on its own adaptive schedule, until interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Poll the feeds that are due once, then exit.")
+        parser.add_argument("--max-sleep", type=float, default=60.0, help="Longest wait between checks for due feeds.")
+
+    def handle(self, *args, **options):
+        while True:
+            due = list(feeds.due_feeds())
+            if due:
+                started = time.monotonic()
+                new_articles = sum(1 for _ in iter_articles(feeds=due))
+                self.stdout.write(
+                    f"Polled {len(due)} feeds in {time.monotonic() - started:.1f}s, "
+                    f"{new_articles} new articles."
+                )
+                now = timezone.now()
+                for feed in due:
+                    status = f"error: {feed.last_error}" if feed.consecutive_failures else f"{feed.last_new_items} new"
+                    wait = (feed.next_poll_at - now).total_seconds() if feed.next_poll_at else 0
+                    self.stdout.write(f"  {feed.name}: {status}, next poll in {wait:.0f}s")
+            if options["once"]:
+                break
+            wait = feeds.seconds_until_next_poll()
+            time.sleep(options["max_sleep"] if wait is None else min(wait, options["max_sleep"]))
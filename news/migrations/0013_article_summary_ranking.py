@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0012_delete_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='summary_ranking',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='summary_ranking_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0015_audioblob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True)),
+                ('etag', models.CharField(blank=True, default='', max_length=255)),
+                ('last_modified', models.CharField(blank=True, default='', max_length=64)),
+                ('body_hash', models.CharField(blank=True, default='', max_length=64)),
+                ('newest_entry_id', models.CharField(blank=True, default='', max_length=500)),
+                ('last_status', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('last_polled_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,91 @@
+from django.db import migrations, models
+
+
+# The feeds that used to be hard-coded as scraper.RSS_FEEDS.
+INITIAL_FEEDS = {
+    "BBC": "http://feeds.bbci.co.uk/news/rss.xml",
+    "CNN": "http://rss.cnn.com/rss/edition.rss",
+    "Reuters": "http://feeds.reuters.com/reuters/topNews",
+}
+
+
+def seed_feeds(apps, schema_editor):
+    Feed = apps.get_model('news', 'Feed')
+    for name, url in INITIAL_FEEDS.items():
+        Feed.objects.update_or_create(url=url, defaults={'name': name})
+    for feed in Feed.objects.filter(name=''):
+        feed.name = feed.url.split('/')[2]
+        feed.save(update_fields=['name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0016_feedstate'),
+    ]
+
+    operations = [
+        migrations.RenameModel('FeedState', 'Feed'),
+        migrations.AddField(
+            model_name='feed',
+            name='name',
+            field=models.CharField(default='', help_text='Used as the article source and category', max_length=100),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='active',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='poll_interval',
+            field=models.PositiveIntegerField(default=900, help_text='Seconds between polls'),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='next_poll_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='publish_gap',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='last_duration',
+            field=models.FloatField(blank=True, help_text='Seconds the last poll took', null=True),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='last_new_items',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='last_success_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='last_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='consecutive_failures',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='total_polls',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='total_failures',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(seed_feeds, migrations.RunPython.noop),
+    ]
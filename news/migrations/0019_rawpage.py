@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:50
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0018_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RawPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True)),
+                ('segment', models.CharField(max_length=255)),
+                ('offset', models.BigIntegerField()),
+                ('length', models.PositiveIntegerField(help_text='Record length in the segment, header included')),
+                ('codec', models.CharField(max_length=10)),
+                ('size', models.PositiveIntegerField(help_text='Uncompressed bytes')),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
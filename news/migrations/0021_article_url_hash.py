@@ -0,0 +1,100 @@
+import hashlib
+import posixpath
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from django.db import migrations, models
+
+# news.utils.urlnorm as of this migration, spelled out here so that later changes
+# to the canonical form cannot change what this migration computes.
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ocid", "cmpid", "cmp", "ito", "_ga", "ref_src", "ref_url", "smid", "smtyp",
+}
+TRACKING_PREFIXES = ("utm_", "ns_", "at_")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize(url):
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = parts.hostname.rstrip(".")
+    if port and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    if parts.username or parts.password:
+        host = f"{parts.netloc.rsplit('@', 1)[0]}@{host}"
+
+    path = posixpath.normpath(parts.path) if parts.path else "/"
+    if path.startswith("//"):
+        path = "/" + path.lstrip("/")
+    if path == ".":
+        path = "/"
+
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not (name.lower() in TRACKING_PARAMS or name.lower().startswith(TRACKING_PREFIXES))
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def url_hash(url):
+    return hashlib.blake2b(canonicalize(url).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def backfill_url_hash(apps, schema_editor):
+    Article = apps.get_model('news', 'Article')
+    first_by_digest = {}
+    batch = []
+    for article in Article.objects.only('pk', 'url', 'canonical').order_by('pk').iterator():
+        digest = url_hash(article.url)
+        if digest in first_by_digest:
+            # Stored twice before urls were canonicalized. The later copy is marked
+            # as a duplicate of the first, the way ingest marks a repeated story,
+            # and keeps a key of its own so the unique index can be built; nothing
+            # is deleted. Article.save() only re-keys a row whose url changes, so
+            # the key stays. Hashed raw: canonicalize() drops the fragment, so
+            # url_hash() would give the colliding digest back.
+            if article.canonical_id is None:
+                article.canonical_id = first_by_digest[digest]
+            digest = hashlib.blake2b(f"{article.url}#{article.pk}".encode("utf-8"), digest_size=16).hexdigest()
+        else:
+            first_by_digest[digest] = article.pk
+        article.url_hash = digest
+        batch.append(article)
+        if len(batch) >= 500:
+            Article.objects.bulk_update(batch, ['url_hash', 'canonical'])
+            batch = []
+    Article.objects.bulk_update(batch, ['url_hash', 'canonical'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0020_article_signature'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='url_hash',
+            field=models.CharField(default='', editable=False, max_length=32),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_url_hash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='article',
+            name='url_hash',
+            field=models.CharField(editable=False, max_length=32, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='url',
+            field=models.URLField(max_length=500),
+        ),
+    ]
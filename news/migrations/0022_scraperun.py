@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0021_article_url_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('worker_id', models.CharField(blank=True, default='', max_length=255)),
+                ('mode', models.CharField(default='pipeline', max_length=20)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='running', max_length=10)),
+                ('started_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration', models.FloatField(blank=True, help_text='Seconds', null=True)),
+                ('feed_count', models.PositiveIntegerField(default=0)),
+                ('article_count', models.PositiveIntegerField(default=0)),
+                ('duplicate_count', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='', help_text='Why the run itself failed')),
+                ('counts', models.JSONField(blank=True, default=dict)),
+                ('stages', models.JSONField(blank=True, default=dict, help_text='Seconds per stage: count, total, p50, p95, max')),
+                ('feeds', models.JSONField(blank=True, default=list)),
+                ('slowest', models.JSONField(blank=True, default=list)),
+                ('errors', models.JSONField(blank=True, default=list)),
+            ],
+            options={
+                'ordering': ['-started_at', '-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0022_scraperun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='scrape_run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='articles', to='news.scraperun'),
+        ),
+        migrations.AddField(
+            model_name='scraperun',
+            name='job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scrape_runs', to='news.job'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:26
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Article = apps.get_model('news', 'Article')
+
+    def count(model_name, **filters):
+        rows = apps.get_model('news', model_name).objects.filter(article=OuterRef('pk'), **filters)
+        rows = rows.order_by().values('article').annotate(n=Count('pk')).values('n')
+        return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+    Article.objects.update(
+        like_count=count('ArticleLike'),
+        comment_count=count('Comment', approved=True),
+        bookmark_count=count('Bookmark'),
+        useful_count=count('SummaryFeedback', useful=True),
+        not_useful_count=count('SummaryFeedback', useful=False),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0023_scrape_run_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='bookmark_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='comment_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, help_text='Approved comments'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='like_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='not_useful_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='useful_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
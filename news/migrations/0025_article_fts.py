@@ -0,0 +1,60 @@
+from django.db import migrations
+
+# The search index as of this migration, when the text was still news_article.content.
+# Spelled out here rather than taken from news.utils.search, so later changes to the
+# live schema cannot change what this migration does.
+FTS_TABLE = "news_article_fts"
+TRIGGERS = ("insert", "delete", "update")
+TRIGGER_ROW = "(new.id, new.title, coalesce(new.summary, ''), new.content)"
+CREATE_INDEX = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"title, summary, content, tokenize = 'porter unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON news_article BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, summary, content) VALUES {TRIGGER_ROW}; END",
+    f"CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON news_article BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END",
+    # Article.save() rewrites every column; only reindex when the text really changed.
+    f"CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF title, summary, content ON news_article "
+    f"WHEN old.title IS NOT new.title OR old.summary IS NOT new.summary OR old.content IS NOT new.content BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, summary, content) VALUES {TRIGGER_ROW}; END",
+    f"DELETE FROM {FTS_TABLE}",
+    f"INSERT INTO {FTS_TABLE}(rowid, title, summary, content) "
+    f"SELECT id, title, coalesce(summary, ''), content FROM news_article",
+)
+
+
+def create_index(apps, schema_editor):
+    # Off SQLite, or on a build without FTS5, there is no index and search falls back.
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return
+        for suffix in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        for statement in CREATE_INDEX:
+            cursor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for suffix in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0024_article_engagement_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
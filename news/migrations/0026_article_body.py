@@ -0,0 +1,186 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:48
+
+import json
+import zlib
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Storage format and search triggers as of this migration, spelled out here rather
+# than taken from news.utils.bodies / news.utils.search so that later changes to
+# those cannot change what this migration does.
+LEVEL = 6
+EXCERPT_LENGTH = 300
+FTS_TABLE = "news_article_fts"
+TRIGGERS = ("insert", "delete", "update")
+# The text moves to news_articlebody, so the triggers only follow title and
+# summary; Article.store_bodies() indexes the text.
+BODY_TRIGGERS = (
+    f"CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON news_article BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, summary, content) VALUES (new.id, new.title, coalesce(new.summary, ''), ''); END",
+    f"CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON news_article BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END",
+    f"CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF title, summary ON news_article "
+    f"WHEN old.title IS NOT new.title OR old.summary IS NOT new.summary BEGIN "
+    f"UPDATE {FTS_TABLE} SET title = new.title, summary = coalesce(new.summary, '') WHERE rowid = new.id; END",
+)
+# Migration 0025's triggers, for migrating back once news_article.content is restored.
+CONTENT_ROW = "(new.id, new.title, coalesce(new.summary, ''), new.content)"
+CONTENT_TRIGGERS = (
+    f"CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON news_article BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, summary, content) VALUES {CONTENT_ROW}; END",
+    f"CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON news_article BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END",
+    f"CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF title, summary, content ON news_article "
+    f"WHEN old.title IS NOT new.title OR old.summary IS NOT new.summary OR old.content IS NOT new.content BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, summary, content) VALUES {CONTENT_ROW}; END",
+    f"DELETE FROM {FTS_TABLE}",
+    f"INSERT INTO {FTS_TABLE}(rowid, title, summary, content) "
+    f"SELECT id, title, coalesce(summary, ''), content FROM news_article",
+)
+
+
+def pack_text(text):
+    return zlib.compress((text or "").encode("utf-8"), LEVEL)
+
+
+def unpack_text(data):
+    return zlib.decompress(bytes(data)).decode("utf-8") if data else ""
+
+
+def pack_json(value):
+    if value is None:
+        return None
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), LEVEL)
+
+
+def unpack_json(data):
+    return json.loads(zlib.decompress(bytes(data))) if data else None
+
+
+def excerpt(text):
+    text = text or ""
+    head = " ".join(text[:EXCERPT_LENGTH * 2].split())
+    if len(head) <= EXCERPT_LENGTH and len(text) <= EXCERPT_LENGTH * 2:
+        return head
+    return head[:EXCERPT_LENGTH - 1].rsplit(" ", 1)[0] + "…"
+
+
+def move_bodies(apps, schema_editor):
+    Article = apps.get_model('news', 'Article')
+    ArticleBody = apps.get_model('news', 'ArticleBody')
+    articles, rows = [], []
+
+    def flush():
+        ArticleBody.objects.bulk_create(rows)
+        Article.objects.bulk_update(articles, ['excerpt', 'word_count'])
+        articles.clear()
+        rows.clear()
+
+    for article in Article.objects.only('pk', 'content', 'summary_ranking', 'summary_ranking_hash').order_by('pk').iterator(chunk_size=500):
+        rows.append(ArticleBody(
+            article_id=article.pk,
+            content=pack_text(article.content),
+            summary_ranking=pack_json(article.summary_ranking),
+            summary_ranking_hash=article.summary_ranking_hash,
+        ))
+        article.excerpt = excerpt(article.content)
+        article.word_count = len((article.content or "").split())
+        articles.append(article)
+        if len(articles) >= 500:
+            flush()
+    flush()
+
+
+def restore_bodies(apps, schema_editor):
+    Article = apps.get_model('news', 'Article')
+    ArticleBody = apps.get_model('news', 'ArticleBody')
+    articles = []
+    for body in ArticleBody.objects.order_by('pk').iterator(chunk_size=500):
+        articles.append(Article(
+            pk=body.pk,
+            content=unpack_text(body.content),
+            summary_ranking=unpack_json(body.summary_ranking),
+            summary_ranking_hash=body.summary_ranking_hash,
+        ))
+        if len(articles) >= 500:
+            Article.objects.bulk_update(articles, ['content', 'summary_ranking', 'summary_ranking_hash'])
+            articles = []
+    Article.objects.bulk_update(articles, ['content', 'summary_ranking', 'summary_ranking_hash'])
+
+
+def _replace_triggers(schema_editor, statements):
+    # Only where migration 0025 created the index (SQLite with FTS5).
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        if FTS_TABLE not in connection.introspection.table_names(cursor):
+            return
+        for suffix in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def drop_triggers(apps, schema_editor):
+    # Before the columns they read are removed. The indexed rows stay as they are.
+    _replace_triggers(schema_editor, ())
+
+
+def install_body_triggers(apps, schema_editor):
+    _replace_triggers(schema_editor, BODY_TRIGGERS)
+
+
+def install_content_triggers(apps, schema_editor):
+    _replace_triggers(schema_editor, CONTENT_TRIGGERS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0025_article_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_triggers, install_content_triggers),
+        migrations.CreateModel(
+            name='ArticleBody',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='body', serialize=False, to='news.article')),
+                ('content', models.BinaryField()),
+                ('summary_ranking', models.BinaryField(blank=True, null=True)),
+                ('summary_ranking_hash', models.CharField(blank=True, default='', max_length=64)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', max_length=300),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(move_bodies, restore_bodies),
+        # A default, so that migrating backwards can add the column again.
+        migrations.AlterField(
+            model_name='article',
+            name='content',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='article',
+            name='content',
+        ),
+        migrations.RemoveField(
+            model_name='article',
+            name='summary_ranking',
+        ),
+        migrations.RemoveField(
+            model_name='article',
+            name='summary_ranking_hash',
+        ),
+        migrations.RunPython(install_body_triggers, drop_triggers),
+    ]
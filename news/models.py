@@ -1,12 +1,18 @@
 from django.utils import timezone
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
 import math 
+import hashlib
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from datetime import timedelta
+from news.utils import bodies
 
     
 class Category(models.Model):
@@ -18,8 +24,10 @@ class Category(models.Model):
 class Article(models.Model):
     title = models.CharField(max_length=255)
     author = models.CharField(max_length=100, default="Unknown")
-    content = models.TextField()
-    url = models.URLField(unique=True)
+    url = models.URLField(max_length=500)
+    # NEW FEATURE: Fixed-width key of the canonical url (news.utils.urlnorm); the
+    # unique index is on this column, and url lookups should go through it.
+    url_hash = models.CharField(max_length=32, unique=True, editable=False)
     source = models.CharField(max_length=100)
     published_at = models.DateTimeField()
     summary = models.TextField(blank=True, null=True)
@@ -33,25 +41,240 @@ class Article(models.Model):
         help_text="Estimated reading time in minutes"
     )
 
-    # NEW FEATURE: Automatically calculate reading time on save
+    # NEW FEATURE: The full text lives in ArticleBody, compressed, and is only read
+    # through `content` when a page needs it. Lists use the excerpt and counts.
+    excerpt = models.CharField(max_length=300, blank=True, default="")
+    word_count = models.PositiveIntegerField(default=0)
+
+    # NEW FEATURE: The same story from another source. Duplicates reuse the
+    # canonical article's summary and audio instead of getting their own.
+    canonical = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='duplicates'
+    )
+    # NEW FEATURE: The scrape run that stored this article, so a run can be followed
+    # article by article while it is still going.
+    scrape_run = models.ForeignKey(
+        'ScrapeRun', null=True, blank=True, on_delete=models.SET_NULL, related_name='articles'
+    )
+
+    # NEW FEATURE: Engagement counters, so lists and the admin don't COUNT per row.
+    # Kept in step by the receivers at the bottom of this module and by
+    # news.utils.engagement; `manage.py recount_engagement` rebuilds them.
+    like_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, db_index=True, editable=False, help_text="Approved comments")
+    bookmark_count = models.PositiveIntegerField(default=0, editable=False)
+    useful_count = models.PositiveIntegerField(default=0, editable=False)
+    not_useful_count = models.PositiveIntegerField(default=0, editable=False)
+    COUNTER_FIELDS = ('like_count', 'comment_count', 'bookmark_count', 'useful_count', 'not_useful_count')
+
+    class Meta:
+        # The list pages: approved articles in the orders news.utils.cursors pages
+        # by (the id completing each key is the rowid, part of every index).
+        # Partial rather than led by `approved`: filter(approved=True) compiles to
+        # a bare WHERE "approved" on SQLite, which only an index with that same
+        # condition can use.
+        indexes = [
+            models.Index(fields=['published_at'], condition=models.Q(approved=True), name='article_approved_recent'),
+            models.Index(fields=['like_count', 'published_at'], condition=models.Q(approved=True), name='article_approved_likes'),
+            models.Index(fields=['comment_count', 'published_at'], condition=models.Q(approved=True), name='article_approved_comments'),
+        ]
+
+    @staticmethod
+    def estimate_reading_time(content):
+        if not content:
+            return 0
+        word_count = len(content.split())
+        # Assuming average of 225 words per minute
+        return max(1, math.ceil(word_count / 225))
+
+    # NEW FEATURE: content, summary_ranking and summary_ranking_hash read and write
+    # the ArticleBody row. It is loaded on first use (select_related('body') saves
+    # the query) and written by save(), or by store_bodies() after bulk_create.
+    BODY_FIELDS = {'content', 'summary_ranking', 'summary_ranking_hash'}
+
+    def _body_value(self, key):
+        state = self.__dict__
+        if key not in state:
+            body = None
+            if self.pk is not None and not self._state.adding:
+                try:
+                    body = self.body
+                except ArticleBody.DoesNotExist:
+                    pass
+            state.setdefault('_content', bodies.unpack_text(body.content) if body else "")
+            state.setdefault('_summary_ranking', bodies.unpack_json(body.summary_ranking) if body else None)
+            state.setdefault('_summary_ranking_hash', body.summary_ranking_hash if body else "")
+        return state[key]
+
+    def _set_body_value(self, key, value):
+        if self.__dict__.get(key, object()) != value:
+            self.__dict__[key] = value
+            self.__dict__['_body_dirty'] = True
+
+    @property
+    def content(self):
+        return self._body_value('_content')
+
+    @content.setter
+    def content(self, value):
+        value = value or ""
+        if self.__dict__.get('_content') == value:
+            return
+        self._set_body_value('_content', value)
+        # Only re-split the content when it changes.
+        self.word_count = bodies.word_count(value)
+        self.reading_time = Article.estimate_reading_time(value)
+        self.excerpt = bodies.excerpt(value)
+
+    # Every sentence ranked once; summaries of any length are a slice of it.
+    # summary_ranking_hash is the hash of the content the ranking was computed from.
+    @property
+    def summary_ranking(self):
+        return self._body_value('_summary_ranking')
+
+    @summary_ranking.setter
+    def summary_ranking(self, value):
+        self._set_body_value('_summary_ranking', value)
+
+    @property
+    def summary_ranking_hash(self):
+        return self._body_value('_summary_ranking_hash')
+
+    @summary_ranking_hash.setter
+    def summary_ranking_hash(self, value):
+        self._set_body_value('_summary_ranking_hash', value or "")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_url = instance.__dict__.get('url')
+        return instance
+
+    def _url_changed(self):
+        if self._state.adding or not self.url_hash:
+            return True
+        # A deferred url that was never loaded cannot have been changed.
+        return 'url' in self.__dict__ and self.url != getattr(self, '_saved_url', None)
+
+    def validate_unique(self, exclude=None):
+        super().validate_unique(exclude)
+        # The unique index is on url_hash, which no form edits; check the canonical
+        # url here so a second spelling of a stored url is a form error, not a 500.
+        if (exclude and 'url' in exclude) or not self.url or not self._url_changed():
+            return
+        if Article.objects.filter(url_hash=Article.hash_url(self.url)).exclude(pk=self.pk).exists():
+            raise ValidationError({'url': 'An article with this url is already stored.'})
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using, fields, **kwargs)
+        if fields is None:
+            for key in ('_content', '_summary_ranking', '_summary_ranking_hash', '_body_dirty'):
+                self.__dict__.pop(key, None)
+
     def save(self, *args, **kwargs):
-        if self.content:
-            word_count = len(self.content.split())
-            # Assuming average of 225 words per minute
-            time_to_read = math.ceil(word_count / 225)
-            self.reading_time = max(1, time_to_read)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not self._state.adding:
+            # Counters only move through adjust_counts(); a full save of a stale
+            # copy must not write back the values it was loaded with.
+            deferred = self.get_deferred_fields()
+            update_fields = kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in Article.COUNTER_FIELDS and field.attname not in deferred
+            ]
+            write_body = self.__dict__.get('_body_dirty', False)
+        elif update_fields is not None:
+            # Body fields in update_fields mean "write the ArticleBody row"; the
+            # columns derived from the content go with it.
+            write_body = bool(Article.BODY_FIELDS & set(update_fields))
+            derived = ['word_count', 'reading_time', 'excerpt'] if 'content' in update_fields else []
+            update_fields = kwargs['update_fields'] = [
+                name for name in update_fields if name not in Article.BODY_FIELDS
+            ] + derived
         else:
-            self.reading_time = 0
+            write_body = True
+            self._body_value('_content')  # Nothing to load yet; sets the defaults.
+        writes_url = update_fields is None or 'url' in update_fields
+        if writes_url and self._url_changed():
+            # Only re-key on a new url: rows keyed apart by migration 0021 keep their key.
+            self.url_hash = Article.hash_url(self.url)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'url_hash'}
         super().save(*args, **kwargs)
+        if writes_url:
+            self._saved_url = self.url
+        if write_body:
+            Article.store_bodies([self])
+
+    @staticmethod
+    def store_bodies(articles):
+        """
+        Write the text and ranking of saved `articles` to their ArticleBody rows
+        in one upsert, and hand the text to the search index. save() does this
+        itself; bulk_create and bulk_update callers call it afterwards.
+        """
+        from news.utils import search
+
+        articles = list(articles)
+        ArticleBody.objects.bulk_create(
+            [
+                ArticleBody(
+                    article_id=article.pk,
+                    content=bodies.pack_text(article.content),
+                    summary_ranking=bodies.pack_json(article.summary_ranking),
+                    summary_ranking_hash=article.summary_ranking_hash,
+                )
+                for article in articles
+            ],
+            update_conflicts=True,
+            unique_fields=['article'],
+            update_fields=['content', 'summary_ranking', 'summary_ranking_hash'],
+        )
+        search.index_content([(article.pk, article.content) for article in articles])
+        for article in articles:
+            article.__dict__['_body_dirty'] = False
 
+    @staticmethod
+    def adjust_counts(article_id, **deltas):
+        """Add `deltas` to the engagement counters in one UPDATE, e.g. adjust_counts(pk, like_count=-1)."""
+        Article.objects.filter(pk=article_id).update(**{
+            field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items() if delta
+        })
+
+    @staticmethod
+    def hash_url(url):
+        from news.utils.urlnorm import url_hash
+        return url_hash(url)
+
+    @staticmethod
+    def hash_content(content):
+        return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+    def get_summary_ranking(self):
+        """Return the stored sentence ranking, recomputing it only if the content changed."""
+        from news.utils import cpu_pool
+        from news.utils.text import rank_sentences
+
+        digest = Article.hash_content(self.content)
+        if self.summary_ranking is None or self.summary_ranking_hash != digest:
+            self.summary_ranking = cpu_pool.run(rank_sentences, self.content)
+            self.summary_ranking_hash = digest
+            if self.pk:
+                ArticleBody.objects.filter(article_id=self.pk).update(
+                    summary_ranking=bodies.pack_json(self.summary_ranking), summary_ranking_hash=digest
+                )
+        return self.summary_ranking
+
+    def summary_for(self, sentence_limit=3):
+        from news.utils.text import summarize_ranked
+        return summarize_ranked(self.content, self.get_summary_ranking(), sentence_limit)
 
     @property
     def total_likes(self):
-        return self.likes.count()
+        return self.like_count
 
     @property
     def total_comments(self):
-        return self.comments.count()
+        return self.comment_count
 
 
     def approved_status(self):
@@ -62,6 +285,18 @@ class Article(models.Model):
     def __str__(self):
         return self.title
 
+# NEW MODEL: ArticleBody. An article's full text and sentence ranking, zlib-compressed
+# (news.utils.bodies), in a table of their own so list queries read only the compact
+# article row. Use Article.content / summary_ranking rather than this directly.
+class ArticleBody(models.Model):
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, primary_key=True, related_name='body')
+    content = models.BinaryField()
+    summary_ranking = models.BinaryField(blank=True, null=True)
+    summary_ranking_hash = models.CharField(max_length=64, blank=True, default="")
+
+    def __str__(self):
+        return f"Body of article {self.article_id}"
+
 class UserPreference(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     preferred_categories = models.ManyToManyField(Category)
@@ -71,16 +306,27 @@ class ReadingHistory(models.Model):
     article = models.ForeignKey(Article, on_delete=models.CASCADE)
     read_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        # A user's history, newest first.
+        indexes = [models.Index(fields=['user', 'read_at'], name='history_user_read_at')]
+
 class SummaryFeedback(models.Model):
     article = models.ForeignKey(Article, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     useful = models.BooleanField()
     submitted_at = models.DateTimeField(auto_now_add=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The article's useful/not_useful counters include this row as loaded.
+        instance._counted_useful = instance.__dict__.get('useful')
+        return instance
+
     def feedback_counts(self):
         return {
-            "useful": SummaryFeedback.objects.filter(article=self.article, useful=True).count(),
-            "not_useful": SummaryFeedback.objects.filter(article=self.article, useful=False).count()
+            "useful": self.article.useful_count,
+            "not_useful": self.article.not_useful_count,
         }
 
 class ArticleLike(models.Model):
@@ -103,6 +349,8 @@ class Bookmark(models.Model):
     class Meta:
         unique_together = ('user', 'article')
         ordering = ['-created_at']
+        # A user's bookmarks, newest first.
+        indexes = [models.Index(fields=['user', 'created_at'], name='bookmark_user_created')]
 
     def __str__(self):
         return f"{self.user.username} bookmarked {self.article.title}"
@@ -116,6 +364,17 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        # An article's approved comments, in order (partial, as on Article).
+        indexes = [
+            models.Index(fields=['article', 'created_at'], condition=models.Q(approved=True), name='comment_approved_by_article'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Article.comment_count includes this row as loaded if it was approved.
+        instance._counted_approved = instance.__dict__.get('approved')
+        return instance
 
     def __str__(self):
         return f"Comment by {self.user.username} on {self.article.title[:30]}..."
@@ -132,4 +391,332 @@ class UserArticleMetrics(models.Model):
         unique_together = ('user', 'article') # One metrics record per user-article pair
 
     def __str__(self):
-        return f"Metrics for {self.user.username} on {self.article.title[:30]}..."
\ No newline at end of file
+        return f"Metrics for {self.user.username} on {self.article.title[:30]}..."
+
+# NEW MODEL: Job. A durable, database-backed queue for slow work (TTS, scraping) that
+# used to run inside the HTTP request. Processed by `python manage.py run_jobs`.
+class Job(models.Model):
+    ACTION_AUDIO = 'audio'
+    ACTION_SCRAPE = 'scrape'
+    ACTION_CHOICES = [
+        (ACTION_AUDIO, 'Generate audio summary'),
+        (ACTION_SCRAPE, 'Run scraper'),
+    ]
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = [STATUS_QUEUED, STATUS_RUNNING]
+
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='jobs', null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    # Visibility timeout: a running job whose lock has expired is picked up again.
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    result = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [models.Index(fields=['status', 'run_after'])]
+        constraints = [
+            # At most one queued/running job per (action, article)...
+            models.UniqueConstraint(
+                fields=['action', 'article'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='unique_active_job_per_article',
+            ),
+            # ...and per action for jobs without an article (NULLs never collide above).
+            models.UniqueConstraint(
+                fields=['action'],
+                condition=models.Q(status__in=['queued', 'running'], article__isnull=True),
+                name='unique_active_job_without_article',
+            ),
+        ]
+
+    def __str__(self):
+        target = f" for article {self.article_id}" if self.article_id else ""
+        return f"{self.get_action_display()}{target} ({self.status})"
+
+
+# NEW MODEL: AudioBlob. One synthesized mp3 per distinct (text, language, engine),
+# shared by every article whose summary produces the same audio.
+class AudioBlob(models.Model):
+    digest = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, help_text="Path relative to MEDIA_ROOT")
+    language = models.CharField(max_length=10, default='en')
+    engine = models.CharField(max_length=20, default='gtts')
+    size = models.PositiveIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+# NEW MODEL: Feed. The RSS sources we poll, each on its own schedule. The
+# etag / last_modified / body_hash fields are the conditional GET state from the
+# last poll, so an unchanged feed costs one request; newest_entry_id is the
+# entry that was at the top then, for the admin.
+class Feed(models.Model):
+    name = models.CharField(max_length=100, help_text="Used as the article source and category")
+    url = models.URLField(max_length=500, unique=True)
+    active = models.BooleanField(default=True)
+
+    etag = models.CharField(max_length=255, blank=True, default="")
+    last_modified = models.CharField(max_length=64, blank=True, default="")
+    body_hash = models.CharField(max_length=64, blank=True, default="")
+    newest_entry_id = models.CharField(max_length=500, blank=True, default="")
+    last_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    last_polled_at = models.DateTimeField(null=True, blank=True)
+
+    # Scheduling: poll_interval adapts to publish_gap, the smoothed seconds between entries.
+    poll_interval = models.PositiveIntegerField(default=900, help_text="Seconds between polls")
+    next_poll_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    publish_gap = models.FloatField(null=True, blank=True)
+
+    # Stats
+    last_duration = models.FloatField(null=True, blank=True, help_text="Seconds the last poll took")
+    last_new_items = models.PositiveIntegerField(default=0)
+    last_success_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    total_polls = models.PositiveIntegerField(default=0)
+    total_failures = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.name or self.url
+
+
+# NEW MODEL: Lease. An expiring claim on a unit of work (a feed poll, an entry to
+# ingest) so several scraper processes, on any number of hosts, never do the same work.
+class Lease(models.Model):
+    key = models.CharField(max_length=255, unique=True)
+    worker_id = models.CharField(max_length=255)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.worker_id})"
+
+
+# NEW MODEL: RawPage. Index into the raw HTML archive (news.utils.archive): where the
+# compressed page for a url sits, so articles can be re-extracted without refetching.
+class RawPage(models.Model):
+    url = models.URLField(max_length=500, unique=True)
+    segment = models.CharField(max_length=255)
+    offset = models.BigIntegerField()
+    length = models.PositiveIntegerField(help_text="Record length in the segment, header included")
+    codec = models.CharField(max_length=10)
+    size = models.PositiveIntegerField(help_text="Uncompressed bytes")
+    fetched_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.url} ({self.segment}:{self.offset})"
+
+
+# NEW MODEL: ArticleSignature. SimHash of a canonical article's title and body
+# (news.utils.simhash); the persisted half of the near-duplicate index.
+class ArticleSignature(models.Model):
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    simhash = models.BigIntegerField(help_text="64-bit SimHash, stored signed")
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.article_id}: {self.simhash:#x}"
+
+
+# NEW MODEL: ScrapeRun. One row per fetch_articles call: per-stage latency, per-feed
+# poll results, counts, errors and the slowest urls, summarized from its RunStats.
+class ScrapeRun(models.Model):
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    STAGES = ('poll', 'fetch', 'extract', 'summarize', 'audio', 'db')
+    # Stages whose timings are labelled with an article url.
+    URL_STAGES = ('fetch', 'extract', 'summarize', 'audio')
+
+    worker_id = models.CharField(max_length=255, blank=True, default='')
+    job = models.ForeignKey(Job, null=True, blank=True, on_delete=models.SET_NULL, related_name='scrape_runs')
+    mode = models.CharField(max_length=20, default='pipeline')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    started_at = models.DateTimeField(default=timezone.now, db_index=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True, help_text="Seconds")
+    feed_count = models.PositiveIntegerField(default=0)
+    article_count = models.PositiveIntegerField(default=0)
+    duplicate_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='', help_text="Why the run itself failed")
+    counts = models.JSONField(default=dict, blank=True)
+    stages = models.JSONField(default=dict, blank=True, help_text="Seconds per stage: count, total, p50, p95, max")
+    feeds = models.JSONField(default=list, blank=True)
+    slowest = models.JSONField(default=list, blank=True)
+    errors = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        ordering = ['-started_at', '-id']
+
+    def finish(self, stats, error=None):
+        """Store the summary of `stats` (a pipeline.RunStats) and prune old runs."""
+        self.finished_at = timezone.now()
+        self.duration = (self.finished_at - self.started_at).total_seconds()
+        self.status = self.STATUS_FAILED if error else self.STATUS_DONE
+        self.last_error = (str(error) or repr(error)) if error else ''
+        self.counts = dict(stats.counts)
+        self.article_count = stats.counts.get('articles', 0)
+        self.duplicate_count = stats.counts.get('duplicates', 0)
+        self.stages = stats.stage_summary()
+        self.feeds = list(stats.records.get('feeds', []))
+        self.feed_count = len(self.feeds)
+        self.slowest = [
+            {'url': url, 'seconds': total, 'stages': per_stage}
+            for url, total, per_stage in stats.slowest(getattr(settings, 'SCRAPE_RUN_SLOWEST', 10), self.URL_STAGES)
+        ]
+        self.error_count = len(stats.errors)
+        self.errors = [
+            {'stage': stage, 'url': url, 'message': message}
+            for stage, url, message in stats.errors[:getattr(settings, 'SCRAPE_RUN_MAX_ERRORS', 50)]
+        ]
+        self.save()
+
+        keep = getattr(settings, 'SCRAPE_RUN_HISTORY', 500)
+        stale = list(ScrapeRun.objects.values_list('pk', flat=True)[keep:keep + 1000])
+        if stale:
+            ScrapeRun.objects.filter(pk__in=stale).delete()
+
+    def update_progress(self, stats):
+        """Write the running totals of `stats` while the run is still going; one UPDATE."""
+        self.feed_count = len(stats.records.get('feeds', []))
+        self.article_count = stats.counts.get('articles', 0)
+        self.duplicate_count = stats.counts.get('duplicates', 0)
+        self.error_count = len(stats.errors)
+        ScrapeRun.objects.filter(pk=self.pk).update(
+            feed_count=self.feed_count,
+            article_count=self.article_count,
+            duplicate_count=self.duplicate_count,
+            error_count=self.error_count,
+        )
+
+    def progress_dict(self):
+        return {
+            'id': self.pk,
+            'status': self.status,
+            'started_at': self.started_at.isoformat(),
+            'duration': self.duration,
+            'feed_count': self.feed_count,
+            'article_count': self.article_count,
+            'duplicate_count': self.duplicate_count,
+            'error_count': self.error_count,
+            'last_error': self.last_error,
+        }
+
+    def stage_rows(self):
+        return [(name, self.stages.get(name)) for name in self.STAGES]
+
+    def as_dict(self):
+        return {
+            'id': self.pk,
+            'job_id': self.job_id,
+            'worker_id': self.worker_id,
+            'mode': self.mode,
+            'status': self.status,
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration': self.duration,
+            'feed_count': self.feed_count,
+            'article_count': self.article_count,
+            'duplicate_count': self.duplicate_count,
+            'error_count': self.error_count,
+            'last_error': self.last_error,
+            'counts': self.counts,
+            'stages': self.stages,
+            'feeds': self.feeds,
+            'slowest': self.slowest,
+            'errors': self.errors,
+        }
+
+    def __str__(self):
+        return f"Scrape run {self.pk} ({self.status})"
+
+
+@receiver(post_delete, sender=Article)
+def release_article_audio(sender, instance, **kwargs):
+    if instance.audio_file:
+        AudioBlob.objects.filter(name=instance.audio_file.name, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+
+
+# NEW: Engagement counters on Article follow every like, bookmark, approved comment
+# and summary feedback that is saved or deleted one row at a time. Bulk updates
+# (the comment moderation actions) go through news.utils.engagement instead.
+@receiver(post_save, sender=ArticleLike)
+def count_like(sender, instance, created, **kwargs):
+    if created:
+        Article.adjust_counts(instance.article_id, like_count=1)
+
+
+@receiver(post_delete, sender=ArticleLike)
+def uncount_like(sender, instance, **kwargs):
+    Article.adjust_counts(instance.article_id, like_count=-1)
+
+
+@receiver(post_save, sender=Bookmark)
+def count_bookmark(sender, instance, created, **kwargs):
+    if created:
+        Article.adjust_counts(instance.article_id, bookmark_count=1)
+
+
+@receiver(post_delete, sender=Bookmark)
+def uncount_bookmark(sender, instance, **kwargs):
+    Article.adjust_counts(instance.article_id, bookmark_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    was_approved = False if created else getattr(instance, '_counted_approved', instance.approved)
+    if instance.approved != was_approved:
+        Article.adjust_counts(instance.article_id, comment_count=1 if instance.approved else -1)
+    instance._counted_approved = instance.approved
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    if getattr(instance, '_counted_approved', instance.approved):
+        Article.adjust_counts(instance.article_id, comment_count=-1)
+
+
+def _feedback_deltas(useful, sign):
+    return {'useful_count' if useful else 'not_useful_count': sign}
+
+
+@receiver(post_save, sender=SummaryFeedback)
+def count_feedback(sender, instance, created, **kwargs):
+    was_useful = None if created else getattr(instance, '_counted_useful', instance.useful)
+    if instance.useful != was_useful:
+        deltas = _feedback_deltas(instance.useful, 1)
+        if was_useful is not None:
+            deltas.update(_feedback_deltas(was_useful, -1))
+        Article.adjust_counts(instance.article_id, **deltas)
+    instance._counted_useful = instance.useful
+
+
+@receiver(post_delete, sender=SummaryFeedback)
+def uncount_feedback(sender, instance, **kwargs):
+    Article.adjust_counts(instance.article_id, **_feedback_deltas(getattr(instance, '_counted_useful', instance.useful), -1))
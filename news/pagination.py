@@ -0,0 +1,42 @@
+from django.conf import settings
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from news.utils import cursors
+
+
+class ArticleCursorPagination(BasePagination):
+    """
+    Keyset pages for the articles API (news.utils.cursors). ?sort_by= takes the
+    article list's sort names, ?cursor= the next/previous links, and ?count=1
+    adds the number of matches, counted no further than ARTICLE_COUNT_LIMIT.
+    """
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = getattr(settings, 'ARTICLE_API_PAGE_SIZE', 20)
+        sort = cursors.resolve_sort(request.query_params.get('sort_by'), searching=bool(request.query_params.get('q')))
+        try:
+            self.page = cursors.paginate(queryset, sort, request.query_params.get(self.cursor_query_param), self.page_size)
+        except cursors.InvalidCursor:
+            raise NotFound('Invalid cursor.')
+        self.count = cursors.estimate_count(queryset) if request.query_params.get('count') else None
+        return list(self.page)
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        body = {
+            'next': self._link(self.page.next_cursor),
+            'previous': self._link(self.page.previous_cursor),
+        }
+        if self.count is not None:
+            body['count'], body['count_exact'] = self.count
+        body['results'] = data
+        return Response(body)
+
@@ -2,14 +2,20 @@
 
 from rest_framework import serializers
 from .models import Article, Category, UserPreference # Import UserPreference
+from news.utils.search import highlight
 
 class ArticleSerializer(serializers.ModelSerializer):
     # Note: Using 'url' and 'published_at' as per your Article model's actual field names.
     categories = serializers.StringRelatedField(many=True, read_only=True)
+    # NEW: With ?q=, the best matching passage with the matched terms in <mark>; null otherwise.
+    snippet = serializers.SerializerMethodField()
 
     class Meta:
         model = Article
-        fields = ['id', 'title', 'summary', 'url', 'published_at', 'author', 'source', 'categories', 'audio_file']
+        fields = ['id', 'title', 'summary', 'url', 'published_at', 'author', 'source', 'categories', 'audio_file', 'snippet']
+
+    def get_snippet(self, obj):
+        return highlight(getattr(obj, 'search_snippet', None)) or None
 
 
 # Corrected UserPreferenceSerializer
@@ -1,6 +1,6 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, override_settings
 from django.contrib.auth import get_user_model
-from news.models import Article, Category, UserPreference
+from news.models import Article, Category, Feed, UserPreference
 from django.core.management import call_command
 from django.urls import reverse
 from django.utils import timezone
@@ -117,27 +117,28 @@ class IntegrationTests(TestCase):
         self.category1 = Category.objects.create(name='Technology')
         self.client.login(username='admin', password='password')
 
-    @patch('news.management.commands.scrape_news.Command.handle')
-    def test_scrape_news_command(self, mock_handle):
+    @override_settings(TEXT_PROCESS_WORKERS=0, RAW_ARCHIVE_ENABLED=False)
+    def test_scrape_news_command(self):
         """
-        Test that the scrape_news command creates new articles with approved=False.
+        Test that the scrape_news command polls the due feeds and creates new articles with approved=False.
         """
-        # Mock the fetch_articles utility function to return a list of new articles
-        new_articles = [
-            Article(title='Scraped Article 1', source='Scraper Source', content='...', approved=False, url='http://test.com/scraped_1', published_at=timezone.now()),
-            Article(title='Scraped Article 2', source='Scraper Source', content='...', approved=False, url='http://test.com/scraped_2', published_at=timezone.now()),
-        ]
-        mock_handle.return_value = None # Mock the return value of the handle method
-        
-        initial_article_count = Article.objects.count()
-        call_command('scrape_news') # Corrected: The management command name is scrape_news
-        
-        self.assertGreater(Article.objects.count(), initial_article_count)
-        
-        scraped_article_1 = Article.objects.get(title='Scraped Article 1')
-        self.assertFalse(scraped_article_1.approved)
-        scraped_article_2 = Article.objects.get(title='Scraped Article 2')
-        self.assertFalse(scraped_article_2.approved)
+        from io import StringIO
+
+        Feed.objects.all().delete()
+        Feed.objects.create(name='Scraper Source', url='http://test.com/rss')
+        with patch('news.utils.http.get', return_value=rss_response(['http://test.com/scraped_1', 'http://test.com/scraped_2'])), \
+             patch('news.utils.scraper.download_article_html', return_value=''), \
+             patch('news.utils.scraper.extract_article_text', return_value='Scraped body. ' * 5), \
+             patch('news.utils.scraper.generate_audio_summary', return_value=None):
+            initial_article_count = Article.objects.count()
+            call_command('scrape_news', '--once', stdout=StringIO())
+
+        self.assertEqual(Article.objects.count(), initial_article_count + 2)
+        for url in ('http://test.com/scraped_1', 'http://test.com/scraped_2'):
+            scraped = Article.objects.get(url=url)
+            self.assertEqual(scraped.title, f'Story {url}')
+            self.assertEqual(scraped.source, 'Scraper Source')
+            self.assertFalse(scraped.approved)
 
     @patch('news.views.GenerateAudioAPIView.post')
     def test_audio_generation_api(self, mock_post):
@@ -174,4 +175,2085 @@ class IntegrationTests(TestCase):
         
         self.assertNotIn(self.unapproved_article.title.encode(), response.content)
         
-        self.assertIn(self.approved_article.title.encode(), response.content)
\ No newline at end of file
+        self.assertIn(self.approved_article.title.encode(), response.content)
+
+def rss_response(links, status=200, headers=None):
+    items = ''.join(f'<item><title>Story {link}</title><link>{link}</link><guid>{link}</guid></item>' for link in links)
+    body = f'<?xml version="1.0"?><rss version="2.0"><channel><title>Test</title>{items}</channel></rss>'
+    return MagicMock(status_code=status, content=body.encode(), headers=headers or {})
+
+
+@override_settings(TEXT_PROCESS_WORKERS=0, RAW_ARCHIVE_ENABLED=False)
+class ScraperPipelineTests(TestCase):
+
+    def _feed(self, *links):
+        return rss_response(links)
+
+    def _run(self, concurrent):
+        feeds = {
+            'http://feeds.bbci.co.uk/news/rss.xml': self._feed('http://bbc.test/1', 'http://bbc.test/2'),
+            'http://rss.cnn.com/rss/edition.rss': self._feed('http://cnn.test/1', 'http://bbc.test/1'),
+            'http://feeds.reuters.com/reuters/topNews': self._feed('http://reuters.test/1'),
+        }
+        with patch('news.utils.http.get', side_effect=lambda url, **kwargs: feeds[url]), \
+             patch('news.utils.scraper.get_full_article_text', side_effect=lambda url: f'Body of {url}.'), \
+             patch('news.utils.scraper.download_article_html', side_effect=lambda url, stats=None: f'<p>Body of {url}.</p>'), \
+             patch('news.utils.scraper.extract_article_text', side_effect=lambda url, html: f'Body of {url}.'), \
+             patch('news.utils.scraper.generate_audio_summary', return_value=None):
+            from news.utils.scraper import fetch_articles
+            return fetch_articles(concurrent=concurrent)
+
+    # One poller, so a link listed by two feeds is claimed by the same feed as in sequential mode.
+    @override_settings(SCRAPER_STAGE_WORKERS={'poll': 1})
+    def test_pipeline_run_matches_sequential_rows(self):
+        """
+        Test that the staged pipeline creates the same articles as the sequential mode.
+        """
+        sequential = sorted((a.url, a.source, a.content) for a in self._run(concurrent=False))
+        Article.objects.all().delete()
+        Feed.objects.update(body_hash='', newest_entry_id='')
+        concurrent = sorted((a.url, a.source, a.content) for a in self._run(concurrent=True))
+
+        self.assertEqual(sequential, concurrent)
+        self.assertEqual(len(concurrent), 4)
+        self.assertEqual(Article.objects.get(url='http://cnn.test/1').category.get().name, 'CNN')
+
+    def test_stage_applies_backpressure_and_drains(self):
+        """
+        Test that a stage never holds more than its queue size and signals the sink once drained.
+        """
+        from news.utils.pipeline import Sink, Stage, DONE
+
+        sink = Sink()
+        stage = Stage('double', lambda n: n * 2, sink.output('double'), workers=3, maxsize=2).start()
+        for n in range(20):
+            stage.put(n)
+            self.assertLessEqual(stage.queue.qsize(), 2)
+        stage.close()
+
+        results = []
+        while True:
+            name, item = sink.get()
+            if item is DONE:
+                break
+            results.append(item)
+        self.assertEqual(sorted(results), [n * 2 for n in range(20)])
+
+    def test_host_limiter_caps_in_flight_requests(self):
+        """
+        Test that no more than the per-host limit of requests run against one host at a time.
+        """
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from news.utils.scraper import HostLimiter
+
+        limiter = HostLimiter(2)
+        lock = threading.Lock()
+        state = {'current': 0, 'peak': 0}
+
+        def hit(i):
+            with limiter.limit(f'http://slow.test/{i}'):
+                with lock:
+                    state['current'] += 1
+                    state['peak'] = max(state['peak'], state['current'])
+                time.sleep(0.01)
+                with lock:
+                    state['current'] -= 1
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(hit, range(16)))
+        self.assertEqual(state['peak'], 2)
+
+
+class TextProcessPoolTests(TestCase):
+
+    def tearDown(self):
+        from news.utils import cpu_pool
+        cpu_pool.shutdown()
+
+    @override_settings(TEXT_PROCESS_WORKERS=0)
+    def test_zero_workers_runs_synchronously(self):
+        """
+        Test that with no pool workers the text helpers run inline on the calling thread.
+        """
+        from news.utils import cpu_pool
+
+        self.assertIsNone(cpu_pool.get_executor())
+        self.assertEqual(cpu_pool.clean_html('<p>Hello <b>world</b></p>'), 'Hello world')
+
+    @override_settings(TEXT_PROCESS_WORKERS=1)
+    def test_pool_runs_work_in_a_worker_process(self):
+        """
+        Test that work submitted to the shared pool runs in a separate, warmed-up process.
+        """
+        from news.utils import cpu_pool
+
+        self.assertIsNotNone(cpu_pool.get_executor())
+        self.assertNotEqual(cpu_pool.run(os.getpid), os.getpid())
+        self.assertEqual(cpu_pool.clean_html('<p>Hello <b>world</b></p>'), 'Hello world')
+
+
+class TextRankEngineTests(TestCase):
+
+    def setUp(self):
+        from news.management.commands.bench_summarizer import synthetic_article
+        self.article = synthetic_article(1500, seed=7)
+
+    def test_numpy_engine_picks_the_same_sentences_as_sumy(self):
+        """
+        Test that the vectorized engine selects the same summary sentences as sumy's TextRank.
+        """
+        from news.utils import text
+
+        for limit in (3, 5, 7):
+            self.assertEqual(
+                text.generate_summary(self.article, limit, engine='numpy'),
+                text.generate_summary(self.article, limit, engine='sumy'),
+            )
+
+    def test_numpy_engine_falls_back_to_sumy(self):
+        """
+        Test that a failure in the vectorized engine falls back to sumy instead of truncating.
+        """
+        from news.utils import text
+
+        expected = text.generate_summary(self.article, 3, engine='sumy')
+        with patch('news.utils.textrank.rate_sentences', side_effect=MemoryError):
+            self.assertEqual(text.generate_summary(self.article, 3, engine='numpy'), expected)
+
+
+@override_settings(TEXT_PROCESS_WORKERS=0)
+class SummaryRankingCacheTests(TestCase):
+
+    def setUp(self):
+        from news.management.commands.bench_summarizer import synthetic_article
+        self.user = User.objects.create_user(username='reader', password='password')
+        self.client.login(username='reader', password='password')
+        self.article = Article.objects.create(
+            title='Ranked Article',
+            source='Test Source',
+            content=synthetic_article(600, seed=3),
+            approved=True,
+            url='http://test.com/ranked',
+            published_at=timezone.now()
+        )
+
+    def test_summary_lengths_reuse_a_single_ranking(self):
+        """
+        Test that toggling summary lengths ranks the article once and slices that ranking.
+        """
+        from news.utils import text
+
+        url = reverse('news:generate_summary', kwargs={'pk': self.article.pk})
+        with patch('news.utils.text.rank_sentences', wraps=text.rank_sentences) as ranker:
+            summaries = {
+                limit: self.client.post(url, {'sentence_limit': limit}, content_type='application/json').json()['summary']
+                for limit in (3, 5, 7, 3)
+            }
+        self.assertEqual(ranker.call_count, 1)
+        self.assertEqual(summaries[7], text.generate_summary(self.article.content, 7))
+        self.assertLess(len(summaries[3]), len(summaries[5]))
+
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.summary, summaries[3])
+        self.assertEqual(self.article.summary_ranking_hash, Article.hash_content(self.article.content))
+
+    def test_ranking_is_recomputed_when_content_changes(self):
+        """
+        Test that a stored ranking is invalidated once the article content changes.
+        """
+        self.article.summary_for(3)
+        self.article.content = 'A completely new body. It has two sentences.'
+        self.article.save()
+        self.assertEqual(self.article.summary_for(3), 'A completely new body. It has two sentences.')
+
+
+@override_settings(TEXT_PROCESS_WORKERS=0)
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='listener', password='password')
+        self.client.login(username='listener', password='password')
+        self.article = Article.objects.create(
+            title='Audio Job Article',
+            source='Test Source',
+            content='First sentence here. Second sentence here.',
+            summary='First sentence here.',
+            approved=True,
+            url='http://test.com/audio-job',
+            published_at=timezone.now()
+        )
+
+    def test_audio_endpoints_enqueue_one_deduplicated_job(self):
+        """
+        Test that the audio endpoints return 202 with the same job id instead of synthesizing inline.
+        """
+        from news.models import Job
+
+        with patch('news.utils.scraper.generate_audio_summary') as synthesize:
+            first = self.client.post(reverse('news:generate_audio', kwargs={'pk': self.article.pk}))
+            second = self.client.post(reverse('api_generate_audio', kwargs={'pk': self.article.pk}))
+        synthesize.assert_not_called()
+
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.status_code, 202)
+        self.assertEqual(first.json()['job_id'], second.json()['job_id'])
+        self.assertEqual(Job.objects.count(), 1)
+
+        status_response = self.client.get(first.json()['status_url'])
+        self.assertEqual(status_response.json()['job_status'], Job.STATUS_QUEUED)
+
+    def test_worker_runs_job_and_retries_with_backoff(self):
+        """
+        Test that a failed job is requeued with a delay and succeeds on a later attempt.
+        """
+        from datetime import timedelta
+        from news.models import Job
+        from news.utils import jobs
+
+        job, _ = jobs.enqueue(Job.ACTION_AUDIO, self.article)
+        with patch('news.utils.scraper.generate_audio_summary', return_value=None):
+            job = jobs.work_once('worker-a')
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIsNone(jobs.work_once('worker-a'))
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now() - timedelta(seconds=1))
+        with patch('news.utils.scraper.generate_audio_summary', return_value='/media/news_audio/summary_1.mp3'):
+            job = jobs.work_once('worker-a')
+        self.assertEqual(job.status, Job.STATUS_DONE)
+        self.assertEqual(job.result['audio_url'], '/media/news_audio/summary_1.mp3')
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.audio_file.name, 'news_audio/summary_1.mp3')
+
+    def test_expired_lock_is_reclaimed_by_another_worker(self):
+        """
+        Test that a job held by a crashed worker becomes visible again after its lock expires.
+        """
+        from datetime import timedelta
+        from news.models import Job
+        from news.utils import jobs
+
+        job, _ = jobs.enqueue(Job.ACTION_AUDIO, self.article)
+        self.assertEqual(jobs.claim('crashed-worker').pk, job.pk)
+        self.assertIsNone(jobs.claim('worker-b'))
+
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        reclaimed = jobs.claim('worker-b')
+        self.assertEqual(reclaimed.pk, job.pk)
+        self.assertEqual(reclaimed.locked_by, 'worker-b')
+        self.assertEqual(reclaimed.attempts, 2)
+
+    def test_expired_lock_on_last_attempt_fails_the_job(self):
+        """
+        Test that a job whose worker died on its last attempt is marked failed instead of reclaimed forever.
+        """
+        from datetime import timedelta
+        from news.models import Job
+        from news.utils import jobs
+
+        job, _ = jobs.enqueue(Job.ACTION_AUDIO, self.article)
+        Job.objects.filter(pk=job.pk).update(max_attempts=2)
+        for worker in ('crashed-a', 'crashed-b'):
+            self.assertEqual(jobs.claim(worker).pk, job.pk)
+            Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertIsNone(jobs.claim('worker-c'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.STATUS_FAILED, 2, ''))
+        self.assertTrue(job.last_error)
+        self.assertTrue(jobs.enqueue(Job.ACTION_AUDIO, self.article)[1])
+
+
+class AudioCacheTests(TestCase):
+
+    def setUp(self):
+        import tempfile
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, TTS_BACKEND='fake')
+        self.settings_override.enable()
+        self.articles = [
+            Article.objects.create(
+                title=f'Wire Copy {i}',
+                source='Wire',
+                content='Identical syndicated story.',
+                summary='Identical syndicated story.',
+                url=f'http://test.com/wire-{i}',
+                published_at=timezone.now()
+            )
+            for i in range(2)
+        ]
+
+    def tearDown(self):
+        import shutil
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _fake_tts(self):
+        from news.utils.tts import FakeTTSBackend
+        return patch.object(FakeTTSBackend, 'synthesize', autospec=True,
+                            side_effect=lambda backend, text, language: f'<{text}>'.encode())
+
+    def test_identical_summaries_share_one_blob(self):
+        """
+        Test that identical summary text is synthesized once and both articles reference the same file.
+        """
+        from news.models import AudioBlob
+        from news.utils import audio
+
+        with self._fake_tts() as tts:
+            for article in self.articles:
+                audio.attach(article, audio.generate_audio_summary(article.summary, article.id))
+        self.assertEqual(tts.call_count, 1)
+
+        names = {Article.objects.get(pk=a.pk).audio_file.name for a in self.articles}
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertRegex(name, r'^news_audio/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.mp3$')
+        self.assertEqual(AudioBlob.objects.get(name=name).ref_count, 2)
+
+    def test_garbage_collection_removes_orphans_only(self):
+        """
+        Test that gc_audio deletes blobs nobody references and keeps shared ones.
+        """
+        from news.models import AudioBlob
+        from news.utils import audio
+
+        with self._fake_tts():
+            for article in self.articles:
+                audio.attach(article, audio.generate_audio_summary(article.summary, article.id))
+            orphan = audio.synthesize('Nobody points at this one.')
+        shared = Article.objects.get(pk=self.articles[0].pk).audio_file.name
+
+        self.articles[0].delete()
+        self.assertEqual(AudioBlob.objects.get(name=shared).ref_count, 1)
+
+        removed = audio.collect_garbage(grace_seconds=0)
+        self.assertEqual(removed, [orphan])
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, shared)))
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, orphan)))
+
+    def test_garbage_collection_keeps_backslash_stored_files(self):
+        """
+        Test that a legacy audio file stored with Windows separators is still counted as referenced.
+        """
+        import time
+        from news.utils import audio
+
+        path = os.path.join(self.media_root, 'news_audio', 'summary_1.mp3')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as legacy:
+            legacy.write(b'mp3')
+        old = time.time() - 7200
+        os.utime(path, (old, old))
+        Article.objects.filter(pk=self.articles[0].pk).update(audio_file='news_audio\\summary_1.mp3')
+
+        self.assertEqual(audio.collect_garbage(dry_run=True), [])
+        self.assertEqual(audio.collect_garbage(), [])
+        self.assertTrue(os.path.exists(path))
+
+    def test_sentences_are_synthesized_separately_and_reused(self):
+        """
+        Test that audio is stitched from per-sentence chunks and unchanged sentences are not re-synthesized.
+        """
+        from news.utils import audio
+
+        with self._fake_tts() as tts:
+            first = audio.synthesize('One fish. Two fish. Red fish.')
+            self.assertEqual(tts.call_count, 3)
+            second = audio.synthesize('One fish. Two fish. Blue fish.')
+            self.assertEqual(tts.call_count, 4)
+
+        self.assertNotEqual(first, second)
+        with open(os.path.join(self.media_root, second), 'rb') as stitched:
+            self.assertEqual(stitched.read(), b'<One fish.><Two fish.><Blue fish.>')
+
+
+@override_settings(TEXT_PROCESS_WORKERS=0, SCRAPER_BATCH_SIZE=100, SCRAPER_BATCH_DELAY=5, RAW_ARCHIVE_ENABLED=False)
+class ScraperBulkIngestionTests(TestCase):
+
+    def setUp(self):
+        for name in ('BBC', 'CNN', 'Reuters'):
+            Category.objects.create(name=name)
+
+    def _scrape(self, per_feed):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from news.utils.scraper import fetch_articles
+
+        feeds = {
+            feed.url: rss_response([f'http://{feed.name.lower()}.test/{i}' for i in reversed(range(per_feed))])
+            for feed in Feed.objects.all()
+        }
+        with patch('news.utils.http.get', side_effect=lambda url, **kwargs: feeds[url]), \
+             patch('news.utils.scraper.download_article_html', return_value=''), \
+             patch('news.utils.scraper.extract_article_text', side_effect=lambda url, html: f'Body of {url}. ' * 3), \
+             patch('news.utils.scraper.generate_audio_summary',
+                   side_effect=lambda text, article_id: f'/media/news_audio/{article_id}.mp3'), \
+             CaptureQueriesContext(connection) as queries:
+            articles = fetch_articles(concurrent=True)
+        return articles, len(queries)
+
+    def test_query_count_does_not_grow_with_entries(self):
+        """
+        Test that a scrape costs the same number of queries for 2 or 20 entries per feed.
+        """
+        few, few_queries = self._scrape(2)
+        Article.objects.all().delete()
+        many, many_queries = self._scrape(20)
+
+        self.assertEqual((len(few), len(many)), (6, 60))
+        # Beyond SQLite's bind-parameter limit the one INSERT is split into batches.
+        from django.db import connection
+        fields = [field for field in Article._meta.concrete_fields if not field.primary_key]
+        insert_batches = -(-60 // connection.ops.bulk_batch_size(fields, many))
+        self.assertEqual(many_queries - few_queries, insert_batches - 1)
+        article = Article.objects.get(url='http://bbc.test/7')
+        self.assertEqual(article.category.get().name, 'BBC')
+        self.assertEqual(article.reading_time, 1)
+        self.assertEqual(article.audio_file.name, f'news_audio/{article.pk}.mp3')
+
+    def test_known_links_are_skipped(self):
+        """
+        Test that entries whose url is already stored are not fetched again.
+        """
+        self._scrape(2)
+        articles, _ = self._scrape(3)
+        self.assertEqual(sorted(a.url for a in articles), [
+            'http://bbc.test/2', 'http://cnn.test/2', 'http://reuters.test/2',
+        ])
+
+    def test_save_without_content_change_skips_reading_time(self):
+        """
+        Test that saving an article only re-splits its content when the content changed.
+        """
+        article = Article.objects.create(
+            title='T', content='word ' * 500, url='http://example.com/rt',
+            source='S', published_at=timezone.now(),
+        )
+        self.assertEqual(article.reading_time, 3)
+        article = Article.objects.get(pk=article.pk)
+        with patch.object(Article, 'estimate_reading_time', wraps=Article.estimate_reading_time) as estimate:
+            article.approved = True
+            article.save()
+            estimate.assert_not_called()
+            article.content = 'word ' * 10
+            article.save(update_fields=['content'])
+        estimate.assert_called_once()
+        self.assertEqual(Article.objects.get(pk=article.pk).reading_time, 1)
+
+
+@override_settings(TEXT_PROCESS_WORKERS=0, RAW_ARCHIVE_ENABLED=False)
+class ConditionalFeedPollTests(TestCase):
+
+    def setUp(self):
+        self.state = Feed.objects.create(name='Test', url='http://feed.test/rss')
+
+    def _save(self, polled):
+        from news.utils.feeds import record_poll
+        record_poll(self.state, polled)
+
+    def test_validators_are_sent_and_304_skips_entries(self):
+        """
+        Test that the stored ETag and Last-Modified are sent back and a 304 yields no entries.
+        """
+        from news.utils.scraper import poll_feed
+
+        first = rss_response(['http://a.test/1'], headers={'ETag': '"v1"', 'Last-Modified': 'Mon, 05 Oct 2026 10:00:00 GMT'})
+        with patch('news.utils.http.get', return_value=first) as get:
+            polled = poll_feed(self.state)
+        self.assertEqual(get.call_args.kwargs['headers'], {})
+        self.assertEqual([entry.link for entry in polled['entries']], ['http://a.test/1'])
+        self._save(polled)
+
+        with patch('news.utils.http.get', return_value=MagicMock(status_code=304)) as get:
+            polled = poll_feed(self.state)
+        self.assertEqual(get.call_args.kwargs['headers'], {
+            'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 05 Oct 2026 10:00:00 GMT',
+        })
+        self.assertIsNone(polled['entries'])
+
+    def test_unchanged_body_skips_entries_but_same_head_entry_does_not(self):
+        """
+        Test that only an identical body yields no entries; a changed body with the same first entry is still read.
+        """
+        from news.utils.scraper import poll_feed
+
+        with patch('news.utils.http.get', return_value=rss_response(['http://a.test/1'])):
+            self._save(poll_feed(self.state))
+            self.assertIsNone(poll_feed(self.state)['entries'])
+
+        # A pinned item stays on top while a new one is inserted below it.
+        with patch('news.utils.http.get', return_value=rss_response(['http://a.test/1', 'http://a.test/2'])):
+            polled = poll_feed(self.state)
+        self.assertEqual([entry.link for entry in polled['entries']], ['http://a.test/1', 'http://a.test/2'])
+
+    @override_settings(TEXT_PROCESS_WORKERS=0, RAW_ARCHIVE_ENABLED=False)
+    def test_entry_inserted_below_a_pinned_item_is_ingested(self):
+        """
+        Test that a new entry below an unchanged first entry is stored, and the known first entry is not fetched again.
+        """
+        from news.utils.scraper import fetch_articles
+
+        Feed.objects.exclude(pk=self.state.pk).delete()
+        with patch('news.utils.http.get', return_value=rss_response(['http://a.test/pinned'])), \
+             patch('news.utils.scraper.download_article_html', return_value=''), \
+             patch('news.utils.scraper.extract_article_text', return_value='Body. ' * 5), \
+             patch('news.utils.scraper.generate_audio_summary', return_value=None):
+            fetch_articles(concurrent=True)
+        with patch('news.utils.http.get', return_value=rss_response(['http://a.test/pinned', 'http://a.test/new'])), \
+             patch('news.utils.scraper.download_article_html', return_value='') as download, \
+             patch('news.utils.scraper.extract_article_text', return_value='Body. ' * 5), \
+             patch('news.utils.scraper.generate_audio_summary', return_value=None):
+            articles = fetch_articles(concurrent=True)
+
+        self.assertEqual([article.url for article in articles], ['http://a.test/new'])
+        self.assertEqual([call.args[0] for call in download.call_args_list], ['http://a.test/new'])
+
+    def test_unchanged_feed_does_no_article_work(self):
+        """
+        Test that a scrape over feeds answering 304 never looks up or fetches articles.
+        """
+        from news.utils.scraper import fetch_articles
+
+        with patch('news.utils.http.get', return_value=MagicMock(status_code=304)), \
+             patch('news.utils.scraper.existing_urls') as existing, \
+             patch('news.utils.scraper.download_article_html') as download:
+            self.assertEqual(fetch_articles(concurrent=True), [])
+        existing.assert_not_called()
+        download.assert_not_called()
+
+    def _scrape(self, links, extract):
+        from news.utils import scraper
+
+        Feed.objects.exclude(pk=self.state.pk).delete()
+        hashes_at_persist = []
+        persist_articles = scraper.persist_articles
+
+        def persist(built, categories):
+            hashes_at_persist.append(Feed.objects.get(pk=self.state.pk).body_hash)
+            return persist_articles(built, categories)
+
+        with patch('news.utils.http.get', return_value=rss_response(links)), \
+             patch('news.utils.scraper.persist_articles', side_effect=persist), \
+             patch('news.utils.scraper.download_article_html', return_value=''), \
+             patch('news.utils.scraper.extract_article_text', side_effect=extract), \
+             patch('news.utils.scraper.generate_audio_summary', return_value=None):
+            articles = scraper.fetch_articles(concurrent=True)
+        self.state.refresh_from_db()
+        return articles, hashes_at_persist
+
+    @override_settings(TEXT_PROCESS_WORKERS=0, RAW_ARCHIVE_ENABLED=False, SCRAPER_BATCH_SIZE=1)
+    def test_feed_state_is_saved_after_its_entries(self):
+        """
+        Test that a feed's body hash is only saved once the articles for its new entries are written.
+        """
+        articles, hashes_at_persist = self._scrape(
+            ['http://a.test/1', 'http://a.test/2'], lambda url, html: f'Body of {url}. ' * 3)
+
+        self.assertEqual(len(articles), 2)
+        self.assertTrue(hashes_at_persist)
+        self.assertEqual(set(hashes_at_persist), {''})
+        self.assertNotEqual(self.state.body_hash, '')
+        self.assertEqual(self.state.last_new_items, 2)
+
+    @override_settings(TEXT_PROCESS_WORKERS=0, RAW_ARCHIVE_ENABLED=False)
+    def test_feed_state_is_kept_when_an_entry_is_lost(self):
+        """
+        Test that a feed whose entry failed to be stored is rescheduled but polled in full next time.
+        """
+        from news.utils.scraper import poll_feed
+
+        def extract(url, html):
+            if url.endswith('/2'):
+                raise ValueError('unparseable page')
+            return f'Body of {url}. ' * 3
+
+        articles, _ = self._scrape(['http://a.test/1', 'http://a.test/2'], extract)
+
+        self.assertEqual([article.url for article in articles], ['http://a.test/1'])
+        self.assertEqual((self.state.body_hash, self.state.total_polls), ('', 1))
+        self.assertIsNotNone(self.state.next_poll_at)
+        with patch('news.utils.http.get', return_value=rss_response(['http://a.test/1', 'http://a.test/2'])):
+            self.assertEqual(len(poll_feed(self.state)['entries']), 2)
+
+
+@override_settings(TEXT_PROCESS_WORKERS=0, FEED_MIN_INTERVAL=60, FEED_MAX_INTERVAL=7200, FEED_JITTER=0, RAW_ARCHIVE_ENABLED=False)
+class FeedSchedulerTests(TestCase):
+
+    def setUp(self):
+        Feed.objects.all().delete()
+        self.feed = Feed.objects.create(name='Test', url='http://feed.test/rss', poll_interval=900)
+
+    def _dated_entries(self, minutes_apart, count):
+        import feedparser
+        from email.utils import format_datetime
+        from datetime import timedelta
+
+        newest = timezone.now().replace(microsecond=0)
+        items = ''.join(
+            f'<item><link>http://a.test/{i}</link>'
+            f'<pubDate>{format_datetime(newest - timedelta(minutes=minutes_apart * i))}</pubDate></item>'
+            for i in range(count)
+        )
+        return feedparser.parse(f'<rss version="2.0"><channel>{items}</channel></rss>').entries
+
+    def test_interval_follows_publish_rate(self):
+        """
+        Test that a busy feed is polled about once per published entry and a quiet one backs off.
+        """
+        from news.utils.feeds import record_poll
+
+        record_poll(self.feed, {'entries': self._dated_entries(10, 5)}, new_items=5)
+        self.assertEqual(self.feed.poll_interval, 600)
+        self.assertEqual(Feed.objects.get(pk=self.feed.pk).publish_gap, 600)
+
+        record_poll(self.feed, {'entries': None}, new_items=0)
+        self.assertEqual(self.feed.poll_interval, 900)
+        record_poll(self.feed, {'entries': None}, new_items=0)
+        self.assertEqual(self.feed.poll_interval, 1350)
+
+    def test_failures_back_off_and_feed_is_not_due(self):
+        """
+        Test that each consecutive failure doubles the wait and a successful poll resets the count.
+        """
+        from news.utils.feeds import due_feeds, record_poll
+
+        self.assertEqual(list(due_feeds()), [self.feed])
+        record_poll(self.feed, {'error': 'timed out'})
+        first_wait = (self.feed.next_poll_at - timezone.now()).total_seconds()
+        record_poll(self.feed, {'error': 'timed out'})
+        second_wait = (self.feed.next_poll_at - timezone.now()).total_seconds()
+
+        self.assertAlmostEqual(first_wait, 120, delta=2)
+        self.assertAlmostEqual(second_wait, 240, delta=2)
+        self.assertEqual(list(due_feeds()), [])
+        feed = Feed.objects.get(pk=self.feed.pk)
+        self.assertEqual((feed.consecutive_failures, feed.total_failures, feed.last_error), (2, 2, 'timed out'))
+
+        record_poll(self.feed, {'entries': None}, new_items=0)
+        self.assertEqual(Feed.objects.get(pk=self.feed.pk).consecutive_failures, 0)
+
+    def test_scrape_news_once_polls_due_feeds(self):
+        """
+        Test that `scrape_news --once` polls only due feeds and records per-feed stats.
+        """
+        from io import StringIO
+        from datetime import timedelta
+
+        later = Feed.objects.create(name='Later', url='http://later.test/rss',
+                                    next_poll_at=timezone.now() + timedelta(hours=1))
+        with patch('news.utils.http.get', return_value=rss_response(['http://a.test/1'])) as get, \
+             patch('news.utils.scraper.download_article_html', return_value=''), \
+             patch('news.utils.scraper.extract_article_text', return_value='Body. ' * 5), \
+             patch('news.utils.scraper.generate_audio_summary', return_value=None):
+            call_command('scrape_news', '--once', stdout=StringIO())
+
+        self.assertEqual([call.args[0] for call in get.call_args_list], ['http://feed.test/rss'])
+        feed = Feed.objects.get(pk=self.feed.pk)
+        self.assertEqual((feed.last_new_items, feed.total_polls, feed.last_status), (1, 1, 200))
+        self.assertIsNotNone(feed.last_duration)
+        self.assertEqual(Feed.objects.get(pk=later.pk).total_polls, 0)
+        self.assertEqual(Article.objects.get(url='http://a.test/1').source, 'Test')
+
+    def test_feeds_leased_elsewhere_are_not_due_and_start_no_run(self):
+        """
+        Test that a feed another scraper is polling is skipped, no empty run is stored, and the wait follows the lease.
+        """
+        from io import StringIO
+        from news.models import ScrapeRun
+        from news.utils import leases
+        from news.utils.feeds import due_feeds, seconds_until_next_poll
+        from news.utils.scraper import fetch_articles
+
+        leases.claim([leases.feed_key(self.feed)], 'other-host:1', ttl=300)
+        self.assertEqual(list(due_feeds()), [])
+        self.assertAlmostEqual(seconds_until_next_poll(), 300, delta=2)
+
+        with patch('news.utils.http.get') as get:
+            call_command('scrape_news', '--once', stdout=StringIO())
+            self.assertEqual(fetch_articles(feeds=[self.feed]), [])
+        get.assert_not_called()
+        self.assertFalse(ScrapeRun.objects.exists())
+
+
+@override_settings(TEXT_PROCESS_WORKERS=0, RAW_ARCHIVE_ENABLED=False)
+class ScraperLeaseTests(TestCase):
+
+    def test_claims_are_exclusive_until_they_expire(self):
+        """
+        Test that two workers never hold the same key and an expired lease can be taken over.
+        """
+        from news.models import Lease
+        from news.utils import leases
+
+        self.assertEqual(leases.claim(['a', 'b'], 'worker-1'), {'a', 'b'})
+        self.assertEqual(leases.claim(['b', 'c'], 'worker-2'), {'c'})
+
+        Lease.objects.filter(key='b').update(expires_at=timezone.now())
+        self.assertEqual(leases.claim(['b'], 'worker-2'), {'b'})
+        self.assertEqual(leases.claim(['b'], 'worker-1'), set())
+
+        leases.release_all('worker-2')
+        self.assertEqual(leases.claim(['b', 'c'], 'worker-1'), {'b', 'c'})
+
+    def test_second_scraper_skips_claimed_feeds_and_entries(self):
+        """
+        Test that a scraper does not poll a feed, or download an entry, another worker has claimed.
+        """
+        from news.utils import leases
+        from news.utils.scraper import fetch_articles
+
+        bbc, cnn = Feed.objects.get(name='BBC'), Feed.objects.get(name='CNN')
+        leases.claim([leases.feed_key(bbc), leases.entry_key('http://cnn.test/2')], 'other-host:1')
+        feeds = {
+            cnn.url: rss_response(['http://cnn.test/2', 'http://cnn.test/1']),
+        }
+        with patch('news.utils.http.get', side_effect=lambda url, **kwargs: feeds[url]) as get, \
+             patch('news.utils.scraper.download_article_html', return_value='') as download, \
+             patch('news.utils.scraper.extract_article_text', return_value='Body. ' * 5), \
+             patch('news.utils.scraper.generate_audio_summary', return_value=None):
+            articles = fetch_articles(feeds=[bbc, cnn], concurrent=True)
+
+        self.assertEqual([call.args[0] for call in get.call_args_list], [cnn.url])
+        self.assertEqual([call.args[0] for call in download.call_args_list], ['http://cnn.test/1'])
+        self.assertEqual([article.url for article in articles], ['http://cnn.test/1'])
+
+    @override_settings(SCRAPER_HEARTBEAT_INTERVAL=0)
+    def test_feed_lease_is_renewed_while_the_run_goes(self):
+        """
+        Test that a long scrape keeps renewing its feed lease instead of letting it expire mid-run.
+        """
+        from datetime import timedelta
+        from news.models import Lease
+        from news.utils import leases
+        from news.utils.scraper import iter_articles
+
+        bbc = Feed.objects.get(name='BBC')
+        with patch('news.utils.http.get', return_value=rss_response(['http://bbc.test/1', 'http://bbc.test/2'])), \
+             patch('news.utils.scraper.download_article_html', return_value=''), \
+             patch('news.utils.scraper.extract_article_text', return_value='Body. ' * 5), \
+             patch('news.utils.scraper.generate_audio_summary', return_value=None):
+            articles = iter_articles(feeds=[bbc], concurrent=False)
+            next(articles)
+            feed_lease = Lease.objects.filter(key=leases.feed_key(bbc))
+            feed_lease.update(expires_at=timezone.now() + timedelta(seconds=1))
+            next(articles)
+            self.assertGreater(feed_lease.get().expires_at, timezone.now() + timedelta(seconds=60))
+            self.assertEqual(list(articles), [])
+        self.assertFalse(Lease.objects.exists())
+
+    def test_persisting_already_stored_urls_is_idempotent(self):
+        """
+        Test that a batch containing an article another worker already inserted saves, and returns, only the rest.
+        """
+        from news.models import ScrapeRun
+        from news.utils.scraper import CategoryCache, persist_articles
+
+        theirs = Article.objects.create(title='Theirs', content='x', url='http://race.test/1', source='CNN',
+                                        published_at=timezone.now(), scrape_run=ScrapeRun.objects.create(mode='pipeline'))
+        ours = ScrapeRun.objects.create(mode='pipeline')
+
+        def build(url):
+            return ('BBC', Article(title=url, content='Some words.', url=url, source='BBC', published_at=timezone.now(), scrape_run=ours))
+
+        with patch('news.utils.scraper.existing_urls', return_value=set()):
+            saved = persist_articles([build('http://race.test/1'), build('http://race.test/2')], CategoryCache(['BBC']))
+
+        self.assertEqual(Article.objects.filter(url__startswith='http://race.test/').count(), 2)
+        self.assertEqual([article.url for article in saved], ['http://race.test/2'])
+        theirs = Article.objects.get(pk=theirs.pk)
+        self.assertEqual((theirs.title, theirs.content), ('Theirs', 'x'))
+        self.assertFalse(theirs.category.exists())
+        self.assertEqual(Article.objects.get(url='http://race.test/2').category.get().name, 'BBC')
+
+
+@override_settings(HTTP_READ_TIMEOUT=0.2, HTTP_BREAKER_THRESHOLD=2, HTTP_BREAKER_COOLDOWN=0.2)
+class HttpClientTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        super().setUpClass()
+        cls.hits = []
+        cls.pages = {
+            '/utf8': '<html><body>Café Zürich — naïve</body></html>'.encode('utf-8'),
+            '/latin': '<html><head><meta charset="windows-1252"></head><body>Café</body></html>'.encode('cp1252'),
+        }
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                cls.hits.append(self.path)
+                if self.path == '/slow':
+                    time.sleep(0.5)
+                if self.path == '/stall':
+                    # Headers and part of the body, then silence past the read timeout.
+                    self.send_response(200)
+                    self.send_header('Content-Length', '20')
+                    self.end_headers()
+                    self.wfile.write(b'x' * 10)
+                    self.wfile.flush()
+                    time.sleep(0.5)
+                    return
+                status = 500 if self.path == '/broken' else 200
+                body = cls.pages.get(self.path) or b'x' * (2000 if self.path == '/big' else 10)
+                try:
+                    self.send_response(status)
+                    if self.path in cls.pages:
+                        self.send_header('Content-Type', 'text/html')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except BrokenPipeError:
+                    pass  # The client gave up waiting, as it should.
+
+            def log_message(self, *args):
+                pass
+
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        cls.base = f'http://127.0.0.1:{cls.server.server_port}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        from news.utils import http
+        http.reset()
+        self.hits.clear()
+        self.addCleanup(http.reset)
+
+    def test_timeouts_and_size_cap(self):
+        """
+        Test that a slow host raises HostTimeout and an oversized body raises ResponseTooLarge.
+        """
+        from news.utils import http
+
+        self.assertEqual(http.get(f'{self.base}/ok').content, b'x' * 10)
+        with self.assertRaises(http.HostTimeout):
+            http.get(f'{self.base}/slow')
+        with self.assertRaises(http.ResponseTooLarge):
+            http.get(f'{self.base}/big', max_bytes=1000)
+
+    def test_stall_while_reading_the_body_is_a_timeout(self):
+        """
+        Test that a host going quiet partway through the body raises HostTimeout and counts against its circuit.
+        """
+        from news.utils import http
+
+        with self.assertRaises(http.HostTimeout):
+            http.get(f'{self.base}/stall')
+        with self.assertRaises(http.HostTimeout):
+            http.get(f'{self.base}/stall')
+        self.assertTrue(http.breaker().is_open(f'127.0.0.1:{self.server.server_port}'))
+
+    def test_circuit_opens_after_repeated_failures_and_recovers(self):
+        """
+        Test that a failing host is not contacted while its circuit is open, then gets one trial request.
+        """
+        import time
+        from news.utils import http
+
+        for _ in range(2):
+            with self.assertRaises(http.HostError):
+                http.get(f'{self.base}/broken')
+        with self.assertRaises(http.CircuitOpen):
+            http.get(f'{self.base}/ok')
+        self.assertEqual(self.hits, ['/broken', '/broken'])
+
+        time.sleep(0.25)
+        self.assertEqual(http.get(f'{self.base}/ok').status_code, 200)
+        self.assertFalse(http.breaker().is_open(f'127.0.0.1:{self.server.server_port}'))
+
+    def test_download_article_html_swallows_fetch_errors(self):
+        """
+        Test that the scraper's page download returns an empty string for a broken host instead of raising.
+        """
+        from news.utils.scraper import download_article_html
+
+        self.assertEqual(download_article_html(f'{self.base}/broken'), '')
+        self.assertEqual(download_article_html(f'{self.base}/ok'), 'x' * 10)
+
+    def test_text_html_without_charset_is_not_read_as_latin1(self):
+        """
+        Test that a text/html page without a charset header decodes by its meta charset, else as UTF-8.
+        """
+        from news.utils.scraper import fetch_article_html
+
+        self.assertIn('Café Zürich — naïve', fetch_article_html(f'{self.base}/utf8'))
+        self.assertIn('<body>Café</body>', fetch_article_html(f'{self.base}/latin'))
+
+
+class ArticleExtractionTests(TestCase):
+
+    def _fixture(self, name):
+        path = os.path.join(os.path.dirname(__file__), 'bench_fixtures', 'html', name)
+        with open(path, encoding='utf-8') as page:
+            return page.read()
+
+    def test_fast_extractor_keeps_article_and_drops_boilerplate(self):
+        """
+        Test that the density extractor returns the story paragraphs without menus, promos, comments or footers.
+        """
+        from news.utils.extraction import DensityExtractor
+
+        text = DensityExtractor().extract('http://wire.test/transit', self._fixture('wire_story.html'))
+
+        self.assertTrue(text.startswith('The city council voted on Tuesday'))
+        self.assertIn('Concerns about cost and disruption', text)
+        self.assertTrue(text.endswith('how the project is being delivered.'))
+        for boilerplate in ('cookies', 'Most read', 'About time!', 'morning briefing', 'All rights reserved', 'Read more'):
+            self.assertNotIn(boilerplate, text)
+
+    def test_falls_back_to_newspaper_when_quality_checks_fail(self):
+        """
+        Test that a page without article prose fails the fast path and is handed to newspaper.
+        """
+        from news.utils import extraction
+
+        listing = self._fixture('listing_page.html')
+        self.assertIsNone(extraction.DensityExtractor().extract('http://wire.test/world', listing))
+        with patch.object(extraction.NewspaperExtractor, 'extract', return_value='From newspaper.') as fallback:
+            self.assertEqual(extraction.extract('http://wire.test/world', listing), 'From newspaper.')
+            self.assertEqual(extraction.extract('http://wire.test/a', self._fixture('tech_blog.html'))[:14], 'For a long tim')
+        fallback.assert_called_once()
+
+    def test_clean_html_handles_documents_and_empty_input(self):
+        """
+        Test that clean_html returns the text of whole documents and copes with empty markup.
+        """
+        from news.utils.text import clean_html
+
+        self.assertEqual(clean_html('<html><body><p>Fish &amp; chips</p></body></html>'), 'Fish & chips')
+        self.assertEqual(clean_html(''), '')
+        self.assertEqual(clean_html('   '), '')
+
+
+@override_settings(TEXT_PROCESS_WORKERS=0)
+class RawArchiveTests(TestCase):
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+        self.settings_override = override_settings(RAW_ARCHIVE_DIR=self.archive_dir, RAW_ARCHIVE_SEGMENT_BYTES=400)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_records_round_trip_across_segments(self):
+        """
+        Test that archived pages read back intact, segments roll over, and a damaged record is detected.
+        """
+        from news.utils import archive
+
+        import random
+        rng = random.Random(0)
+        pages = [f'<p>Page {i} ' + ' '.join(str(rng.random()) for _ in range(20)) + '</p>' for i in range(5)]
+        locations = [archive.store(page) for page in pages]
+
+        self.assertGreater(len({location['segment'] for location in locations}), 1)
+        for page, location in zip(pages, locations):
+            data = archive.read(self.archive_dir, location['segment'], location['offset'], location['length'])
+            self.assertEqual(data.decode('utf-8'), page)
+            self.assertLess(location['length'], location['size'])
+
+        target = locations[2]
+        with open(os.path.join(self.archive_dir, target['segment']), 'r+b') as segment:
+            segment.seek(target['offset'] + target['length'] - 1)
+            segment.write(b'\x00')
+        with self.assertRaises(archive.ArchiveError):
+            archive.read(self.archive_dir, target['segment'], target['offset'], target['length'])
+
+    def test_scrape_indexes_raw_pages_and_reprocess_uses_the_archive(self):
+        """
+        Test that a scrape archives each page and reprocess_articles re-extracts from it without any network access.
+        """
+        from io import StringIO
+        from news.models import RawPage
+        from news.utils.scraper import fetch_articles
+
+        feed = Feed.objects.get(name='BBC')
+        page = '<html><body><article>' + ''.join(
+            f'<p>Paragraph {i} of the archived story, with enough words to count as prose, really.</p>' for i in range(6)
+        ) + '</article></body></html>'
+        with patch('news.utils.http.get', return_value=rss_response(['http://bbc.test/archived'])), \
+             patch('news.utils.scraper.download_article_html', return_value=page), \
+             patch('news.utils.scraper.extract_article_text', return_value='First extraction.'), \
+             patch('news.utils.scraper.generate_audio_summary', return_value=None):
+            fetch_articles(feeds=[feed], concurrent=True)
+
+        self.assertEqual(RawPage.objects.get().url, 'http://bbc.test/archived')
+        self.assertEqual(Article.objects.get().content, 'First extraction.')
+
+        with patch('news.utils.http.get', side_effect=AssertionError('network used')):
+            call_command('reprocess_articles', stdout=StringIO(), stderr=StringIO())
+        article = Article.objects.get()
+        self.assertTrue(article.content.startswith('Paragraph 0 of the archived story'))
+        self.assertEqual(article.summary_ranking_hash, Article.hash_content(article.content))
+        self.assertIn('Paragraph', article.summary)
+
+    def test_reprocess_requeues_audio_when_the_summary_changes(self):
+        """
+        Test that reprocess_articles takes stale audio off an article whose summary changed and queues it again, once.
+        """
+        from io import StringIO
+        from django.conf import settings
+        from news.models import Job
+        from news.utils.scraper import fetch_articles
+
+        feed = Feed.objects.get(name='BBC')
+        page = '<html><body><article>' + ''.join(
+            f'<p>Paragraph {i} of the rewritten story, with enough words to count as prose, really.</p>' for i in range(6)
+        ) + '</article></body></html>'
+        with patch('news.utils.http.get', return_value=rss_response(['http://bbc.test/voiced'])), \
+             patch('news.utils.scraper.download_article_html', return_value=page), \
+             patch('news.utils.scraper.extract_article_text', return_value='First extraction.'), \
+             patch('news.utils.scraper.generate_audio_summary', return_value=settings.MEDIA_URL + 'news_audio/old.mp3'):
+            fetch_articles(feeds=[feed], concurrent=True)
+        self.assertEqual(Article.objects.get().audio_file.name, 'news_audio/old.mp3')
+
+        out = StringIO()
+        call_command('reprocess_articles', stdout=out, stderr=StringIO())
+        article = Article.objects.get()
+        self.assertIn('Paragraph', article.summary)
+        self.assertFalse(article.audio_file)
+        self.assertEqual(list(Job.objects.values_list('action', 'article', 'status')),
+                         [(Job.ACTION_AUDIO, article.pk, Job.STATUS_QUEUED)])
+        self.assertIn('1 audio summaries queued again', out.getvalue())
+
+        call_command('reprocess_articles', stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Job.objects.count(), 1)
+
+
+    def test_reprocess_rebuilds_canonicals_and_duplicates_follow(self):
+        """
+        Test that reprocess_articles re-summarizes only the canonical, copies the summary to its duplicate and revoices the canonical for both.
+        """
+        import random
+        from io import StringIO
+        from django.conf import settings
+        from news.models import Job
+        from news.utils import jobs
+        from news.utils.scraper import fetch_articles
+
+        rng = random.Random(0)
+        story = ' '.join(rng.choice([f'w{n}' for n in range(500)]) for _ in range(300))
+        bbc, cnn = Feed.objects.get(name='BBC'), Feed.objects.get(name='CNN')
+        feeds = {
+            bbc.url: rss_response(['http://bbc.test/wire']),
+            cnn.url: rss_response(['http://cnn.test/wire']),
+        }
+        bodies = {'http://bbc.test/wire': story, 'http://cnn.test/wire': story + ' Reporting by the CNN newsroom.'}
+        page = '<html><body><article>' + ''.join(
+            f'<p>Paragraph {i} of the wire story, with enough words to count as prose, really.</p>' for i in range(6)
+        ) + '</article></body></html>'
+        with patch('news.utils.http.get', side_effect=lambda url, **kwargs: feeds[url]), \
+             patch('news.utils.scraper.download_article_html', return_value=page), \
+             patch('news.utils.scraper.extract_article_text', side_effect=lambda url, html: bodies[url]), \
+             patch('news.utils.scraper.generate_audio_summary', return_value=settings.MEDIA_URL + 'news_audio/old.mp3'):
+            fetch_articles(feeds=[bbc, cnn], concurrent=True)
+        canonical = Article.objects.get(canonical__isnull=True)
+        duplicate = Article.objects.get(canonical__isnull=False)
+        self.assertEqual(duplicate.audio_file.name, 'news_audio/old.mp3')
+
+        out = StringIO()
+        call_command('reprocess_articles', stdout=out, stderr=StringIO())
+        self.assertIn('Updated 1 articles', out.getvalue())
+        canonical.refresh_from_db()
+        duplicate.refresh_from_db()
+        self.assertIn('Paragraph', canonical.summary)
+        self.assertEqual(duplicate.summary, canonical.summary)
+        self.assertEqual(duplicate.content, bodies['http://cnn.test/wire'])
+        self.assertFalse(canonical.audio_file)
+        self.assertFalse(duplicate.audio_file)
+        self.assertEqual(list(Job.objects.values_list('action', 'article')), [(Job.ACTION_AUDIO, canonical.pk)])
+
+        with patch('news.utils.scraper.generate_audio_summary', return_value=settings.MEDIA_URL + 'news_audio/new.mp3'):
+            jobs.work_once('worker-a')
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.audio_file.name, 'news_audio/new.mp3')
+
+@override_settings(TEXT_PROCESS_WORKERS=0, RAW_ARCHIVE_ENABLED=False)
+class NearDuplicateTests(TestCase):
+
+    def setUp(self):
+        import random
+        rng = random.Random(0)
+        vocab = [f'w{n}' for n in range(500)]
+        self.story = ' '.join(rng.choice(vocab) for _ in range(300))
+        self.other_story = ' '.join(rng.choice(vocab) for _ in range(300))
+        self.copy = self.story + ' Reporting by the CNN newsroom.'
+
+    def test_signatures_of_copies_are_close_and_found_in_the_index(self):
+        """
+        Test that a lightly edited copy lands within the threshold, a different story does not, and short texts are skipped.
+        """
+        from news.utils import simhash
+        from news.utils.dedup import DuplicateIndex
+
+        original = simhash.simhash('Story http://bbc.test/wire\n' + self.story)
+        copy = simhash.simhash('Story http://cnn.test/wire\n' + self.copy)
+        other = simhash.simhash('Story http://bbc.test/other\n' + self.other_story)
+        self.assertIsNone(simhash.simhash('Too short to say anything.'))
+        self.assertEqual(simhash.to_unsigned(simhash.to_signed(original)), original)
+
+        index = DuplicateIndex(max_distance=6)
+        index.add(original, 'original')
+        self.assertLessEqual(simhash.distance(original, copy), 6)
+        self.assertEqual(index.match(copy), 'original')
+        self.assertIsNone(index.match(other))
+
+    def test_wire_copy_reuses_canonical_summary_and_audio(self):
+        """
+        Test that the same story from two feeds is summarized and voiced once and stored as canonical plus duplicate.
+        """
+        from news.models import ArticleSignature
+        from news.utils.scraper import fetch_articles
+
+        bbc, cnn = Feed.objects.get(name='BBC'), Feed.objects.get(name='CNN')
+        feeds = {
+            bbc.url: rss_response(['http://bbc.test/wire']),
+            cnn.url: rss_response(['http://cnn.test/wire']),
+        }
+        bodies = {'http://bbc.test/wire': self.story, 'http://cnn.test/wire': self.copy}
+        with patch('news.utils.http.get', side_effect=lambda url, **kwargs: feeds[url]), \
+             patch('news.utils.scraper.download_article_html', return_value='<html></html>'), \
+             patch('news.utils.scraper.extract_article_text', side_effect=lambda url, html: bodies[url]), \
+             patch('news.utils.scraper.generate_audio_summary', return_value='/media/news_audio/wire.mp3') as tts:
+            articles = fetch_articles(feeds=[bbc, cnn], concurrent=True)
+
+        self.assertEqual(len(articles), 2)
+        self.assertEqual(tts.call_count, 1)
+        duplicate = Article.objects.get(canonical__isnull=False)
+        canonical = Article.objects.get(canonical__isnull=True)
+        self.assertEqual(duplicate.canonical_id, canonical.pk)
+        self.assertEqual(duplicate.summary, canonical.summary)
+        self.assertEqual(duplicate.audio_file.name, 'news_audio/wire.mp3')
+        self.assertEqual(canonical.audio_file.name, 'news_audio/wire.mp3')
+        self.assertEqual(list(ArticleSignature.objects.values_list('article_id', flat=True)), [canonical.pk])
+
+    def test_duplicates_get_the_canonical_audio_when_it_lands_later(self):
+        """
+        Test that a canonical whose voice failed is queued for audio, and the job's audio reaches its duplicate too.
+        """
+        from news.models import Job
+        from news.utils import jobs
+        from news.utils.scraper import fetch_articles
+
+        bbc, cnn = Feed.objects.get(name='BBC'), Feed.objects.get(name='CNN')
+        feeds = {
+            bbc.url: rss_response(['http://bbc.test/wire']),
+            cnn.url: rss_response(['http://cnn.test/wire']),
+        }
+        bodies = {'http://bbc.test/wire': self.story, 'http://cnn.test/wire': self.copy}
+        with patch('news.utils.http.get', side_effect=lambda url, **kwargs: feeds[url]), \
+             patch('news.utils.scraper.download_article_html', return_value='<html></html>'), \
+             patch('news.utils.scraper.extract_article_text', side_effect=lambda url, html: bodies[url]), \
+             patch('news.utils.scraper.generate_audio_summary', return_value=None):
+            fetch_articles(feeds=[bbc, cnn], concurrent=True)
+
+        canonical = Article.objects.get(canonical__isnull=True)
+        duplicate = Article.objects.get(canonical__isnull=False)
+        self.assertFalse(duplicate.audio_file)
+        self.assertEqual(list(Job.objects.values_list('action', 'article_id')), [(Job.ACTION_AUDIO, canonical.pk)])
+
+        with patch('news.utils.scraper.generate_audio_summary', return_value='/media/news_audio/wire.mp3'):
+            job = jobs.work_once('worker-a')
+        self.assertEqual(job.status, Job.STATUS_DONE)
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.audio_file.name, 'news_audio/wire.mp3')
+
+    def test_index_survives_between_runs_within_the_window(self):
+        """
+        Test that a later scrape matches a stored signature, but not one older than DUPLICATE_WINDOW_HOURS.
+        """
+        from datetime import timedelta
+        from news.models import ArticleSignature
+        from news.utils.scraper import fetch_articles
+
+        def scrape(feed, link, body):
+            with patch('news.utils.http.get', return_value=rss_response([link])), \
+                 patch('news.utils.scraper.download_article_html', return_value='<html></html>'), \
+                 patch('news.utils.scraper.extract_article_text', return_value=body), \
+                 patch('news.utils.scraper.generate_audio_summary', return_value='/media/news_audio/first.mp3') as tts:
+                fetch_articles(feeds=[Feed.objects.get(name=feed)], concurrent=False)
+            return Article.objects.get(url=link), tts.call_count
+
+        first, calls = scrape('BBC', 'http://bbc.test/wire', self.story)
+        self.assertEqual((first.canonical_id, calls), (None, 1))
+
+        second, calls = scrape('CNN', 'http://cnn.test/wire', self.copy)
+        self.assertEqual((second.canonical_id, calls), (first.pk, 0))
+        self.assertEqual(second.summary, first.summary)
+        self.assertEqual(second.audio_file.name, 'news_audio/first.mp3')
+
+        ArticleSignature.objects.update(created_at=timezone.now() - timedelta(hours=73))
+        third, calls = scrape('Reuters', 'http://reuters.test/wire', self.copy)
+        self.assertEqual((third.canonical_id, calls), (None, 1))
+
+
+@override_settings(TEXT_PROCESS_WORKERS=0, RAW_ARCHIVE_ENABLED=False)
+class UrlCanonicalizationTests(TestCase):
+
+    def test_canonical_form_and_hash(self):
+        """
+        Test that host case, default ports, tracking parameters, fragments and path noise do not change the canonical url.
+        """
+        from news.utils.urlnorm import canonicalize, url_hash
+
+        self.assertEqual(
+            canonicalize('HTTPS://News.Example.com:443/world/../uk//story-1/?utm_source=rss&b=2&fbclid=x&a=1#top'),
+            'https://news.example.com/uk/story-1?a=1&b=2',
+        )
+        self.assertEqual(canonicalize('http://example.com'), 'http://example.com/')
+        self.assertEqual(canonicalize('http://example.com:8080/p'), 'http://example.com:8080/p')
+        self.assertEqual(url_hash('http://example.com/a/?utm_medium=x'), url_hash('http://EXAMPLE.com/a'))
+        self.assertNotEqual(url_hash('http://example.com/a?id=1'), url_hash('http://example.com/a?id=2'))
+        self.assertEqual(len(url_hash('http://example.com/a')), 32)
+
+    def test_forms_reject_another_spelling_of_a_stored_url(self):
+        """
+        Test that the admin form reports a url already stored under another spelling instead of failing at the database.
+        """
+        from news.forms import ArticleAdminForm
+
+        stored = Article.objects.create(title='Stored', content='x', url='http://bbc.test/story', source='BBC', published_at=timezone.now())
+        category = Category.objects.create(name='BBC')
+        data = {
+            'title': 'Again', 'author': 'A', 'url': 'http://BBC.test/story/?utm_source=rss', 'source': 'BBC',
+            'published_at': '2026-10-01 10:00', 'category': [category.pk], 'reading_time': 1, 'word_count': 1,
+            'content': 'Body.',
+        }
+        form = ArticleAdminForm(data)
+        self.assertFalse(form.is_valid())
+        self.assertIn('url', form.errors)
+
+        edit = ArticleAdminForm({**data, 'url': stored.url, 'title': 'Stored, edited'}, instance=stored)
+        self.assertTrue(edit.is_valid(), edit.errors)
+        edit.save()
+        self.assertEqual(Article.objects.get(pk=stored.pk).title, 'Stored, edited')
+
+    def test_scraper_skips_tracking_variants_of_stored_urls(self):
+        """
+        Test that a feed entry differing from a stored article only by tracking parameters is not ingested again.
+        """
+        from news.utils.scraper import fetch_articles
+
+        Article.objects.create(title='Stored', content='x', url='http://bbc.test/story', source='BBC', published_at=timezone.now())
+        feed = Feed.objects.get(name='BBC')
+        links = ['http://BBC.test/story/?utm_source=rss', 'http://bbc.test/new/?utm_campaign=feed#comments']
+        for concurrent in (True, False):
+            Feed.objects.filter(pk=feed.pk).update(body_hash='', newest_entry_id='')
+            with patch('news.utils.http.get', return_value=rss_response(links)), \
+                 patch('news.utils.scraper.download_article_html', return_value='') as download, \
+                 patch('news.utils.scraper.extract_article_text', return_value='Body. ' * 5), \
+                 patch('news.utils.scraper.generate_audio_summary', return_value=None):
+                fetch_articles(feeds=[Feed.objects.get(pk=feed.pk)], concurrent=concurrent)
+            self.assertEqual(
+                sorted(Article.objects.values_list('url', flat=True)), ['http://bbc.test/new', 'http://bbc.test/story']
+            )
+        self.assertEqual([call.args[0] for call in download.call_args_list], [])
+
+    def test_api_filters_by_any_form_of_the_url(self):
+        """
+        Test that the articles API finds an article by a tracking-parameter variant of its url.
+        """
+        article = Article.objects.create(
+            title='Found', content='x', url='http://bbc.test/story', source='BBC', published_at=timezone.now(), approved=True
+        )
+        Article.objects.create(title='Other', content='x', url='http://bbc.test/other', source='BBC', published_at=timezone.now(), approved=True)
+
+        response = self.client.get('/api/articles/', {'url': 'http://BBC.test/story/?utm_source=twitter'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()['results']], [article.pk])
+
+
+@override_settings(TEXT_PROCESS_WORKERS=0)
+class ScraperBenchmarkTests(TestCase):
+
+    def test_replay_server_rewrites_feeds_and_fails_repeatably(self):
+        """
+        Test that the stand-in points feed items back at itself and fails the same urls on every run.
+        """
+        import feedparser
+        import urllib.error
+        import urllib.request
+        from news.management.commands.bench_scraper import ReplayServer
+
+        feed = rss_response(['https://www.example.com/news/1?utm_source=rss', 'https://www.example.com/news/2']).content
+        template = '<html><body><article><p>' + 'Template prose that will be replaced. ' * 3 + '</p></article></body></html>'
+
+        def statuses(replay):
+            links = [entry.link for entry in feedparser.parse(urllib.request.urlopen(replay.feed_urls()[0][1]).read()).entries]
+            self.assertTrue(all(link.startswith(replay.base_url('example')) for link in links))
+            result = []
+            for link in links:
+                try:
+                    page = urllib.request.urlopen(link).read().decode()
+                    self.assertNotIn('Template prose', page)
+                    result.append(200)
+                except urllib.error.HTTPError as e:
+                    result.append(e.code)
+            return result
+
+        with ReplayServer({'example': feed}, [template], failure_rate=0.5, seed=6) as replay:
+            first = statuses(replay)
+        self.assertEqual(sorted(first), [200, 503])
+        with ReplayServer({'example': feed}, [template], failure_rate=0.5, seed=6) as replay:
+            self.assertEqual(statuses(replay), first)
+
+    def test_bench_scraper_reports_stages_and_leaves_no_rows(self):
+        """
+        Test that bench_scraper ingests the recorded feeds, reports per-stage latency and queries, and rolls everything back.
+        """
+        import json
+        from io import StringIO
+
+        feeds, articles = Feed.objects.count(), Article.objects.count()
+        out = StringIO()
+        call_command('bench_scraper', '--json', latency=0, tts_latency=0, failure_rate=0, stdout=out)
+        report = json.loads(out.getvalue())
+
+        self.assertEqual(report['feeds'], 3)
+        self.assertEqual(report['articles'], 36)
+        self.assertGreater(report['queries'], 0)
+        self.assertLess(report['queries_per_article'], 5)
+        for stage in ('poll', 'fetch', 'extract', 'summarize', 'audio', 'db'):
+            self.assertIn(stage, report['stages'])
+            self.assertLessEqual(report['stages'][stage]['p50'], report['stages'][stage]['p95'])
+        self.assertEqual((Feed.objects.count(), Article.objects.count()), (feeds, articles))
+
+
+@override_settings(TEXT_PROCESS_WORKERS=0, SCRAPER_BATCH_SIZE=100, SCRAPER_BATCH_DELAY=5, RAW_ARCHIVE_ENABLED=False)
+class ScrapeRunHistoryTests(TestCase):
+
+    def setUp(self):
+        Category.objects.create(name='BBC')
+        Feed.objects.exclude(name='BBC').delete()
+
+    def _scrape(self):
+        from news.utils.scraper import fetch_articles
+
+        feed = Feed.objects.get(name='BBC')
+        responses = {feed.url: rss_response(['http://bbc.test/ok', 'http://bbc.test/broken'])}
+
+        def download(url, stats=None):
+            if url.endswith('broken'):
+                if stats is not None:
+                    stats.error('fetch', url, 'HTTP 503')
+                return None
+            return '<html></html>'
+
+        with patch('news.utils.http.get', side_effect=lambda url, **kwargs: responses[url]), \
+             patch('news.utils.scraper.download_article_html', side_effect=download), \
+             patch('news.utils.scraper.extract_article_text', side_effect=lambda url, html: f'Body of {url}. ' * 3), \
+             patch('news.utils.scraper.generate_audio_summary', return_value=None):
+            return fetch_articles(concurrent=True)
+
+    def test_fetch_articles_records_a_run(self):
+        """
+        Test that a scrape stores its counts, per-stage and per-feed timings, slowest urls and errors.
+        """
+        from news.models import ScrapeRun
+
+        articles = self._scrape()
+        run = ScrapeRun.objects.get()
+
+        self.assertEqual(run.status, ScrapeRun.STATUS_DONE)
+        self.assertEqual((run.article_count, run.feed_count), (len(articles), 1))
+        self.assertEqual(run.feeds[0]['name'], 'BBC')
+        self.assertEqual(run.feeds[0]['new_items'], 2)
+        for stage in ('poll', 'fetch', 'extract', 'summarize', 'db'):
+            self.assertIn(stage, run.stages)
+        self.assertIn('http://bbc.test/ok', [row['url'] for row in run.slowest])
+        self.assertEqual(run.slowest, sorted(run.slowest, key=lambda row: -row['seconds']))
+        self.assertEqual(run.error_count, 1)
+        self.assertEqual(run.errors[0]['url'], 'http://bbc.test/broken')
+
+    @override_settings(SCRAPE_RUN_HISTORY=2)
+    def test_old_runs_are_pruned(self):
+        """
+        Test that only the newest SCRAPE_RUN_HISTORY runs are kept.
+        """
+        from news.models import ScrapeRun
+        from news.utils.pipeline import RunStats
+
+        for _ in range(3):
+            ScrapeRun.objects.create(mode='sequential').finish(RunStats())
+        self.assertEqual(ScrapeRun.objects.count(), 2)
+
+    def test_runs_endpoint_and_status_page_are_staff_only(self):
+        """
+        Test that the JSON endpoint and the status page list recent runs for staff and refuse everyone else.
+        """
+        self._scrape()
+        client = Client()
+        user = get_user_model().objects.create_user(username='reader', password='pw')
+        client.force_login(user)
+        self.assertEqual(client.get(reverse('news:scraper_runs')).status_code, 302)
+
+        user.is_staff = True
+        user.save()
+        runs = client.get(reverse('news:scraper_runs')).json()['runs']
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(runs[0]['errors'][0]['stage'], 'fetch')
+        page = client.get(reverse('news:scraper'))
+        self.assertContains(page, 'http://bbc.test/ok')
+
+
+@override_settings(TEXT_PROCESS_WORKERS=0, SCRAPER_BATCH_SIZE=1, SCRAPER_BATCH_DELAY=5, RAW_ARCHIVE_ENABLED=False)
+class ScrapeProgressTests(TestCase):
+
+    def setUp(self):
+        Category.objects.create(name='BBC')
+        Feed.objects.exclude(name='BBC').delete()
+
+    def _patches(self):
+        from contextlib import ExitStack
+
+        feed = Feed.objects.get(name='BBC')
+        responses = {feed.url: rss_response([f'http://bbc.test/{i}' for i in range(3)])}
+        stack = ExitStack()
+        stack.enter_context(patch('news.utils.http.get', side_effect=lambda url, **kwargs: responses[url]))
+        stack.enter_context(patch('news.utils.scraper.download_article_html', return_value=''))
+        stack.enter_context(patch('news.utils.scraper.extract_article_text',
+                                  side_effect=lambda url, html: f'Body of {url}. ' * 3))
+        stack.enter_context(patch('news.utils.scraper.generate_audio_summary', return_value=None))
+        return stack
+
+    def test_articles_are_yielded_while_the_run_is_going(self):
+        """
+        Test that iter_articles hands over stored articles before the run ends, with the run's totals already current.
+        """
+        from news.models import ScrapeRun
+        from news.utils.scraper import iter_articles
+
+        with self._patches():
+            articles = iter_articles(concurrent=True)
+            first = next(articles)
+            run = ScrapeRun.objects.get()
+            self.assertEqual(run.status, ScrapeRun.STATUS_RUNNING)
+            self.assertEqual(first.scrape_run_id, run.pk)
+            self.assertGreaterEqual(run.article_count, 1)
+            rest = list(articles)
+
+        run.refresh_from_db()
+        self.assertEqual(len(rest), 2)
+        self.assertEqual(run.status, ScrapeRun.STATUS_DONE)
+        self.assertEqual(run.articles.count(), 3)
+
+    def test_scraper_view_queues_and_progress_is_incremental(self):
+        """
+        Test that the staff view only queues a job, and the progress endpoint returns each stored article once.
+        """
+        from news.models import Job
+        from news.utils import jobs
+
+        staff = get_user_model().objects.create_user(username='editor', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        with patch('news.utils.scraper.iter_articles') as scrape:
+            response = self.client.post(reverse('news:scraper'))
+        scrape.assert_not_called()
+        job = Job.objects.get(action=Job.ACTION_SCRAPE)
+        self.assertContains(response, reverse('news:scraper_progress', kwargs={'pk': job.pk}))
+
+        progress_url = reverse('news:scraper_progress', kwargs={'pk': job.pk})
+        self.assertIsNone(self.client.get(progress_url).json()['run'])
+        with self._patches():
+            job = jobs.work_once('worker-a')
+        self.assertEqual(job.result['new_articles'], 3)
+
+        first = self.client.get(progress_url).json()
+        self.assertEqual(first['job_status'], Job.STATUS_DONE)
+        self.assertEqual(first['run']['id'], job.result['run_id'])
+        self.assertEqual(len(first['articles']), 3)
+        latest = self.client.get(progress_url, {'after': first['articles'][1]['id']}).json()
+        self.assertEqual([a['id'] for a in latest['articles']], [first['articles'][2]['id']])
+        self.assertEqual(self.client.get(progress_url, {'after': first['last_id']}).json()['articles'], [])
+
+    @override_settings(SCRAPER_HEARTBEAT_INTERVAL=0)
+    def test_scrape_job_heartbeats_without_storing_articles(self):
+        """
+        Test that a scrape job extends its lock while it runs even when no article is stored.
+        """
+        from news.models import Job
+        from news.utils import jobs
+
+        Feed.objects.update(body_hash='', newest_entry_id='')
+        job, _ = jobs.enqueue(Job.ACTION_SCRAPE)
+        with patch('news.utils.http.get', return_value=rss_response([])), \
+             patch('news.utils.jobs.extend_lock', wraps=jobs.extend_lock) as extend:
+            job = jobs.work_once('worker-a')
+
+        self.assertEqual(job.status, Job.STATUS_DONE)
+        self.assertEqual(job.result['new_articles'], 0)
+        self.assertGreater(extend.call_count, 0)
+
+    @override_settings(SCRAPER_HEARTBEAT_INTERVAL=0, SCRAPER_CONCURRENT=False)
+    def test_scrape_job_stops_when_its_lock_is_lost(self):
+        """
+        Test that a scrape whose job was handed to another worker stops, and leaves the job to that worker.
+        """
+        from news.models import Job, Lease, ScrapeRun
+        from news.utils import jobs
+
+        job, _ = jobs.enqueue(Job.ACTION_SCRAPE)
+        job = jobs.claim('worker-a')
+        Job.objects.filter(pk=job.pk).update(locked_by='worker-b')
+        with self._patches() as stack:
+            get = stack.enter_context(patch('news.utils.http.get'))
+            jobs.run_job(job)
+
+        get.assert_not_called()
+        run = ScrapeRun.objects.get()
+        self.assertEqual(run.status, ScrapeRun.STATUS_FAILED)
+        self.assertIn('lock', run.last_error)
+        self.assertFalse(Lease.objects.exists())
+        self.assertEqual(Job.objects.get(pk=job.pk).locked_by, 'worker-b')
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.STATUS_RUNNING)
+
+    def test_progress_is_staff_only(self):
+        """
+        Test that readers cannot follow scrape jobs.
+        """
+        from news.models import Job
+        from news.utils import jobs
+
+        job, _ = jobs.enqueue(Job.ACTION_SCRAPE)
+        self.client.force_login(get_user_model().objects.create_user(username='reader', password='pw'))
+        response = self.client.get(reverse('news:scraper_progress', kwargs={'pk': job.pk}))
+        self.assertEqual(response.status_code, 302)
+
+
+class EngagementCounterTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='fan', password='pw')
+        self.client.force_login(self.user)
+        self.article = Article.objects.create(
+            title='Counted', content='Body.', url='http://example.com/counted',
+            source='S', published_at=timezone.now(), approved=True,
+        )
+
+    def _counts(self):
+        return Article.objects.values('like_count', 'comment_count', 'bookmark_count', 'useful_count', 'not_useful_count').get(pk=self.article.pk)
+
+    def test_counters_follow_likes_bookmarks_feedback_and_moderation(self):
+        """
+        Test that liking, bookmarking, giving feedback and moderating comments keep the stored counters exact.
+        """
+        from django.contrib.admin.sites import site
+        from news.models import Comment
+
+        pk = self.article.pk
+        self.assertEqual(self.client.post(reverse('news:like_toggle', kwargs={'pk': pk})).json()['total_likes'], 1)
+        self.client.post(reverse('news:bookmark_toggle', kwargs={'pk': pk}))
+        self.client.post(reverse('news:detail', kwargs={'pk': pk}), {'feedback_submit': '1', 'useful': 'True'})
+        self.client.post(reverse('news:detail', kwargs={'pk': pk}), {'feedback_submit': '1', 'useful': 'False'})
+        comments = [Comment.objects.create(article=self.article, user=self.user, content=f'c{i}') for i in range(3)]
+        admin = site._registry[Comment]
+        with patch.object(admin, 'message_user'):
+            admin.approve_comments(None, Comment.objects.all())
+            admin.approve_comments(None, Comment.objects.all())
+            admin.disapprove_comments(None, Comment.objects.filter(pk=comments[0].pk))
+        Comment.objects.get(pk=comments[1].pk).delete()
+
+        self.assertEqual(self._counts(), {
+            'like_count': 1, 'comment_count': 1, 'bookmark_count': 1, 'useful_count': 0, 'not_useful_count': 1,
+        })
+        self.assertEqual(self.client.post(reverse('news:like_toggle', kwargs={'pk': pk})).json()['total_likes'], 0)
+
+        # A full save of a copy loaded before the likes must not write its stale counters back.
+        stale = Article.objects.get(pk=pk)
+        self.client.post(reverse('news:like_toggle', kwargs={'pk': pk}))
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertEqual(Article.objects.get(pk=pk).total_likes, 1)
+
+    def test_recount_engagement_repairs_drift(self):
+        """
+        Test that recount_engagement rebuilds counters that drifted and leaves correct ones alone.
+        """
+        from io import StringIO
+        from news.models import ArticleLike, Comment
+
+        ArticleLike.objects.create(user=self.user, article=self.article)
+        Comment.objects.create(article=self.article, user=self.user, content='ok', approved=True)
+        Comment.objects.create(article=self.article, user=self.user, content='pending')
+        Article.objects.filter(pk=self.article.pk).update(like_count=7, comment_count=0, bookmark_count=3)
+
+        out = StringIO()
+        call_command('recount_engagement', stdout=out)
+        self.assertIn('Corrected the counters of 1 of 1 articles', out.getvalue())
+        self.assertEqual(self._counts(), {
+            'like_count': 1, 'comment_count': 1, 'bookmark_count': 0, 'useful_count': 0, 'not_useful_count': 0,
+        })
+        call_command('recount_engagement', stdout=out)
+        self.assertIn('Corrected the counters of 0 of 1 articles', out.getvalue())
+
+    def test_popularity_sort_uses_counter_columns(self):
+        """
+        Test that sorting and filtering the article list by likes reads the counters instead of joining likes.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from news.models import ArticleLike
+
+        popular = Article.objects.create(
+            title='Popular', content='Body.', url='http://example.com/popular',
+            source='S', published_at=timezone.now() - timezone.timedelta(days=1), approved=True,
+        )
+        for name in ('a', 'b'):
+            ArticleLike.objects.create(user=get_user_model().objects.create_user(username=name), article=popular)
+        ArticleLike.objects.create(user=self.user, article=self.article)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('news:article_list'), {'sort_by': 'most_popular_likes', 'min_likes': 1})
+        self.assertEqual([a.pk for a in response.context['articles']], [popular.pk, self.article.pk])
+        listing = [q['sql'] for q in queries.captured_queries if 'FROM "news_article"' in q['sql'] and 'LIMIT' in q['sql']]
+        self.assertTrue(listing)
+        self.assertFalse(any('news_articlelike' in sql for sql in listing))
+
+
+class ArticleSearchTests(TestCase):
+
+    def setUp(self):
+        def make(title, content, **kwargs):
+            return Article.objects.create(
+                title=title, content=content, url=f'http://example.com/{title.replace(" ", "-")}',
+                source='S', published_at=timezone.now(), approved=True, **kwargs
+            )
+        self.in_title = make('Elections called early', 'The vote is set for spring. ' * 20)
+        self.in_body = make('Budget talks', 'Ministers met. ' * 20 + 'An election could follow the <b>budget</b> talks.')
+        self.unrelated = make('Storm warning', 'Heavy rain is expected in the city. ' * 20)
+
+    def test_ranked_stemmed_matches_with_escaped_snippets(self):
+        """
+        Test that the FTS index stems, ranks title matches first, escapes snippets and follows edits and deletes.
+        """
+        from news.utils import search
+
+        self.assertTrue(search.fts_enabled())
+        results = list(search.search(Article.objects.all(), 'election').order_by('search_rank'))
+        self.assertEqual([a.pk for a in results], [self.in_title.pk, self.in_body.pk])
+        snippet = search.highlight(results[1].search_snippet)
+        self.assertIn('<mark>election</mark>', snippet)
+        self.assertIn('&lt;b&gt;budget&lt;/b&gt;', snippet)
+
+        self.unrelated.content = 'The election was postponed by the storm.'
+        self.unrelated.save()
+        self.in_title.delete()
+        self.assertEqual(
+            {a.pk for a in search.search(Article.objects.all(), 'elect')},
+            {self.in_body.pk, self.unrelated.pk},
+        )
+        # FTS5 syntax in the input is searched for, not obeyed.
+        self.assertEqual(list(search.search(Article.objects.all(), 'NEAR(" OR *')), [])
+
+    def test_list_api_and_admin_use_the_index(self):
+        """
+        Test that ?q= on the article list, the API and the admin search box go through FTS instead of LIKE scans.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        user = get_user_model().objects.create_user(username='reader', password='pw', is_staff=True, is_superuser=True)
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('news:article_list'), {'q': 'election'})
+        self.assertEqual([a.pk for a in response.context['articles']], [self.in_title.pk, self.in_body.pk])
+        self.assertContains(response, '<mark>election</mark>')
+        self.assertFalse(any('LIKE' in q['sql'] and 'news_article' in q['sql'] for q in queries.captured_queries))
+
+        rows = self.client.get('/api/articles/', {'q': 'election'}).json()['results']
+        self.assertEqual([row['id'] for row in rows], [self.in_title.pk, self.in_body.pk])
+        self.assertIn('<mark>', rows[0]['snippet'])
+
+        response = self.client.get(reverse('admin:news_article_changelist'), {'q': 'rain'})
+        self.assertEqual([a.pk for a in response.context['cl'].result_list], [self.unrelated.pk])
+
+    @override_settings(ARTICLE_SEARCH_FTS=False)
+    def test_fallback_without_fts(self):
+        """
+        Test that without the index search finds the words in titles, summaries and excerpts, unranked and without snippets.
+        """
+        from news.utils import search
+
+        results = search.search(Article.objects.all(), 'budget talks')
+        self.assertEqual([a.pk for a in results], [self.in_body.pk])
+        self.assertEqual(search.highlight(results[0].search_snippet), '')
+        self.assertEqual(list(Article.objects.filter(pk__in=search.matching('storm'))), [self.unrelated])
+        self.assertEqual([a.pk for a in search.search(Article.objects.all(), 'vote spring')], [self.in_title.pk])
+
+    @override_settings(ARTICLE_SEARCH_FTS=False)
+    def test_fallback_does_not_search_past_the_excerpt(self):
+        """
+        Test that without the index words found only deep in an article's compressed text are not matched.
+        """
+        from news.utils import search
+
+        self.assertNotIn('election', self.in_body.excerpt)
+        self.assertEqual([a.pk for a in search.search(Article.objects.all(), 'election')], [self.in_title.pk])
+        with override_settings(ARTICLE_SEARCH_FTS=True):
+            self.assertIn(self.in_body.pk, [a.pk for a in search.search(Article.objects.all(), 'election')])
+
+    def test_triggers_exist_after_migrate(self):
+        """
+        Test that the migrated database has the FTS table and all three triggers that keep it in step.
+        """
+        from django.db import connection
+        from news.utils import search
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'news_article'")
+            triggers = {name for name, in cursor.fetchall()}
+        self.assertEqual(triggers & set(search.TRIGGERS), set(search.TRIGGERS))
+        self.assertTrue(search.fts_enabled())
+
+    def test_bench_search_compares_and_rolls_back(self):
+        """
+        Test that bench_search reports both strategies on planted terms and leaves no rows.
+        """
+        import json
+        from io import StringIO
+
+        out = StringIO()
+        call_command('bench_search', '--json', articles=2000, words=40, repeat=1, stdout=out)
+        report = json.loads(out.getvalue())
+        rare = next(row for row in report['queries'] if row['query'] == 'zeppelin')
+        # The planted word ends the body, past the excerpt the LIKE scan sees.
+        self.assertEqual((rare['scan_hits'], rare['fts_hits']), (0, 2))
+        self.assertEqual(Article.objects.count(), 3)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()  # article_list is cached per url.
+        now = timezone.now()
+        # Pairs of articles share a timestamp, so the id has to break ties.
+        self.articles = [
+            Article.objects.create(
+                title=f'Story {i}', content='x', url=f'http://bbc.test/{i}', source='BBC',
+                published_at=now - timezone.timedelta(hours=i // 2), approved=True,
+            )
+            for i in range(15)
+        ]
+        for i, article in enumerate(self.articles):
+            Article.objects.filter(pk=article.pk).update(like_count=i % 4)
+
+    def _walk(self, params):
+        pages, cursor = [], None
+        while True:
+            response = self.client.get(reverse('news:article_list'), dict(params, **({'cursor': cursor} if cursor else {})))
+            page = response.context['articles']
+            pages.append([a.pk for a in page])
+            if not page.has_next():
+                return pages, page
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_article_once_in_order(self):
+        """
+        Test that following next cursors visits every article exactly once in sort order, and previous goes back.
+        """
+        newest = [a.pk for a in Article.objects.order_by('-published_at', '-id')]
+        pages, last = self._walk({})
+        self.assertEqual([len(p) for p in pages], [6, 6, 3])
+        self.assertEqual(sum(pages, []), newest)
+
+        back = self.client.get(reverse('news:article_list'), {'cursor': last.previous_cursor}).context['articles']
+        self.assertEqual([a.pk for a in back], pages[1])
+        self.assertTrue(back.has_previous())
+
+        popular = [a.pk for a in Article.objects.order_by('-like_count', '-published_at', '-id')]
+        self.assertEqual(sum(self._walk({'sort_by': 'most_popular_likes'})[0], []), popular)
+
+    def test_tampered_or_foreign_cursor_is_rejected(self):
+        """
+        Test that an edited cursor, or one made for another sort, gives the first page in HTML and a 404 from the API.
+        """
+        first = self.client.get(reverse('news:article_list')).context['articles']
+        forged = first.next_cursor[:-2] + ('AA' if not first.next_cursor.endswith('AA') else 'BB')
+        page = self.client.get(reverse('news:article_list'), {'cursor': forged}).context['articles']
+        self.assertEqual([a.pk for a in page], [a.pk for a in first])
+        oldest = self.client.get(reverse('news:article_list'), {'cursor': first.next_cursor, 'sort_by': 'published_at'})
+        self.assertEqual([a.pk for a in oldest.context['articles']], [a.pk for a in Article.objects.order_by('published_at', 'id')[:6]])
+        self.assertEqual(self.client.get('/api/articles/', {'cursor': forged}).status_code, 404)
+
+    @override_settings(ARTICLE_API_PAGE_SIZE=4, ARTICLE_COUNT_LIMIT=10)
+    def test_api_pages_by_cursor_without_offset_or_full_count(self):
+        """
+        Test that the API follows its next links, seeks by key instead of OFFSET, and only counts when asked, up to the limit.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        body = self.client.get('/api/articles/').json()
+        self.assertNotIn('count', body)
+        ids = [row['id'] for row in body['results']]
+        while body['next']:
+            with CaptureQueriesContext(connection) as queries:
+                body = self.client.get(body['next']).json()
+            ids += [row['id'] for row in body['results']]
+            self.assertFalse(any('OFFSET' in q['sql'] or 'COUNT(' in q['sql'] for q in queries.captured_queries))
+        self.assertEqual(ids, [a.pk for a in Article.objects.order_by('-published_at', '-id')])
+
+        counted = self.client.get('/api/articles/', {'count': 1}).json()
+        self.assertEqual((counted['count'], counted['count_exact']), (10, False))
+
+
+class ArticleBodyStorageTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()  # article_list is cached per url.
+        self.text = 'The council approved the new tram line after a long debate. ' * 200 + 'Trams return in spring.'
+        self.article = Article.objects.create(
+            title='Tram line approved', content=self.text, url='http://bbc.test/tram', source='BBC',
+            published_at=timezone.now(), approved=True,
+        )
+
+    def test_body_is_stored_compressed_with_list_columns_precomputed(self):
+        """
+        Test that the text is kept compressed in ArticleBody, and the article row carries the excerpt and counts.
+        """
+        from news.models import ArticleBody
+
+        body = ArticleBody.objects.get(pk=self.article.pk)
+        self.assertLess(len(body.content), len(self.text) // 10)
+        self.assertEqual(Article.objects.get(pk=self.article.pk).content, self.text)
+        self.assertNotIn('content', [field.name for field in Article._meta.concrete_fields])
+        row = Article.objects.get(pk=self.article.pk)
+        self.assertEqual((row.word_count, row.reading_time), (len(self.text.split()), 10))
+        self.assertTrue(row.excerpt.startswith('The council approved') and len(row.excerpt) <= 300)
+
+    def test_lists_skip_the_body_and_detail_joins_it(self):
+        """
+        Test that the article list never reads news_articlebody and the detail page reads it in the same query.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('news:article_list'))
+        self.assertContains(response, 'The council approved the new tram line')
+        self.assertFalse(any('news_articlebody' in q['sql'] for q in queries.captured_queries))
+
+        self.client.force_login(get_user_model().objects.create_user(username='reader', password='pw'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('news:detail', kwargs={'pk': self.article.pk}))
+        self.assertContains(response, 'Trams return in spring.')
+        body_queries = [q['sql'] for q in queries.captured_queries if 'news_articlebody' in q['sql']]
+        self.assertEqual(len(body_queries), 1)
+        self.assertIn('JOIN', body_queries[0])
+
+    def test_search_index_follows_body_changes(self):
+        """
+        Test that the full-text index sees the body when it is created, edited through the admin form, and deleted.
+        """
+        from news.forms import ArticleAdminForm
+        from news.utils import search
+
+        def found(word):
+            return [a.pk for a in search.search(Article.objects.all(), word)]
+
+        self.assertEqual(found('spring'), [self.article.pk])
+        form = ArticleAdminForm(instance=self.article)
+        self.assertEqual(form.initial['content'], self.text)
+
+        data = {field: form.initial.get(field) for field in form.fields if form.initial.get(field) is not None}
+        data.update(content='Buses replace the trams over the winter.', category=[Category.objects.create(name='Transport').pk])
+        form = ArticleAdminForm(data, instance=Article.objects.get(pk=self.article.pk))
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.assertEqual((found('spring'), found('winter')), ([], [self.article.pk]))
+        self.assertEqual(Article.objects.get(pk=self.article.pk).excerpt, 'Buses replace the trams over the winter.')
+
+        self.article.delete()
+        self.assertEqual(found('winter'), [])
+
+
+class QueryPlanTests(TestCase):
+    # Tables that grow with the archive or with every reader.
+    HOT_TABLES = ('news_article', 'news_comment', 'news_readinghistory', 'news_bookmark')
+
+    def setUp(self):
+        from django.core.cache import cache
+        from news.models import Bookmark, Comment, ReadingHistory
+
+        cache.clear()  # article_list is cached per url.
+        self.user = get_user_model().objects.create_user(username='reader', password='pw')
+        world = Category.objects.create(name='World')
+        now = timezone.now()
+        for i in range(20):
+            article = Article.objects.create(
+                title=f'Election update {i}', content='The election count continues. ' * 10, url=f'http://bbc.test/{i}',
+                source='BBC', published_at=now - timezone.timedelta(hours=i), approved=True,
+            )
+            article.category.add(world)
+            Comment.objects.create(article=article, user=self.user, content='Noted.', approved=True)
+            ReadingHistory.objects.create(user=self.user, article=article)
+            Bookmark.objects.create(user=self.user, article=article)
+        self.article = article
+        UserPreference.objects.create(user=self.user).preferred_categories.add(world)
+        self.client.force_login(self.user)
+
+    def _plans(self, url, params=None):
+        """(sql, plan steps) of every SELECT a GET of `url` runs."""
+        from django.core.cache import cache
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if query['sql'].startswith('SELECT'):
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    plans.append((query['sql'], [row[-1] for row in cursor.fetchall()]))
+        return plans
+
+    def _list_query(self, plans):
+        # The page of articles itself: six and one to tell whether there is a next page.
+        return next((sql, steps) for sql, steps in plans if sql.startswith('SELECT "news_article"."id"') and 'LIMIT 7' in sql)
+
+    def test_hot_pages_never_scan_a_whole_table(self):
+        """
+        Test that no query behind the list, detail, history, bookmark, recommendation and API pages reads a hot table end to end.
+        """
+        pages = [
+            (reverse('news:article_list'), {}),
+            (reverse('news:article_list'), {'sort_by': 'most_popular_likes'}),
+            (reverse('news:article_list'), {'sort_by': 'most_popular_comments'}),
+            (reverse('news:article_list'), {'sort_by': 'published_at', 'start_date': '2020-01-01', 'end_date': '2030-12-31'}),
+            (reverse('news:article_list'), {'category': 'world'}),
+            (reverse('news:article_list'), {'q': 'election'}),
+            (reverse('news:detail', kwargs={'pk': self.article.pk}), {}),
+            (reverse('news:history'), {}),
+            (reverse('news:bookmarks'), {}),
+            (reverse('news:recommendations'), {}),
+            ('/api/articles/', {}),
+        ]
+        for url, params in pages:
+            for sql, steps in self._plans(url, params):
+                full_scans = [step for step in steps if step in {f'SCAN {table}' for table in self.HOT_TABLES}]
+                self.assertEqual(full_scans, [], f'{url} {params}: {sql}')
+
+    def test_list_orders_are_read_from_the_index(self):
+        """
+        Test that every keyset order of the article list, first page or deep, walks an index instead of sorting.
+        """
+        for sort_by, index in (
+            ('-published_at', 'article_approved_recent'),
+            ('published_at', 'article_approved_recent'),
+            ('most_popular_likes', 'article_approved_likes'),
+            ('most_popular_comments', 'article_approved_comments'),
+        ):
+            page = self.client.get(reverse('news:article_list'), {'sort_by': sort_by}).context['articles']
+            for params in ({'sort_by': sort_by}, {'sort_by': sort_by, 'cursor': page.next_cursor}):
+                _, steps = self._list_query(self._plans(reverse('news:article_list'), params))
+                self.assertTrue(any(index in step for step in steps), steps)
+                self.assertFalse(any('TEMP B-TREE' in step for step in steps), steps)
+
+    def test_date_filters_are_index_ranges(self):
+        """
+        Test that the date filters become a published_at range the index can seek, keeping whole days inclusive.
+        """
+        from datetime import datetime, time, timedelta
+
+        day = timezone.localdate() - timedelta(days=3)
+        Article.objects.filter(pk=self.article.pk).update(
+            published_at=timezone.make_aware(datetime.combine(day, time(23, 59, 59)))
+        )
+        params = {'start_date': day.isoformat(), 'end_date': day.isoformat()}
+        sql, steps = self._list_query(self._plans(reverse('news:article_list'), params))
+        self.assertNotIn('django_datetime_cast_date', sql)
+        self.assertIn('SEARCH news_article USING INDEX article_approved_recent (published_at>? AND published_at<?)', steps)
+        articles = self.client.get(reverse('news:article_list'), dict(params, sort_by='published_at')).context['articles']
+        self.assertEqual([a.pk for a in articles], [self.article.pk])
+
+
+class UrlHashMigrationTests(TransactionTestCase):
+    def test_backfill_keeps_url_variants_of_one_story_apart(self):
+        """
+        Test that migration 0021 keys two stored variants of one url apart, marks the later a duplicate, and saves keep the key.
+        """
+        from django.db import connection
+        from django.db.migrations.executor import MigrationExecutor
+        from news.utils.urlnorm import url_hash
+
+        executor = MigrationExecutor(connection)
+        executor.migrate([('news', '0020_article_signature')])
+        Article = executor.loader.project_state([('news', '0020_article_signature')]).apps.get_model('news', 'Article')
+        for url in ('http://dup.test/story/', 'http://dup.test/story?utm_source=rss'):
+            Article.objects.create(title='Dup', content='x', url=url, source='S', published_at=timezone.now())
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([('news', '0021_article_url_hash')])
+        Article = executor.loader.project_state([('news', '0021_article_url_hash')]).apps.get_model('news', 'Article')
+        hashes = list(Article.objects.order_by('pk').values_list('url_hash', flat=True))
+        self.assertEqual(len(set(hashes)), 2)
+        self.assertEqual(hashes[0], url_hash('http://dup.test/story/'))
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+        # The later copy is marked as a duplicate, and saving it keeps its key.
+        from news import models as live
+        first, second = live.Article.objects.order_by('pk')
+        self.assertEqual(second.canonical_id, first.pk)
+        second.title = 'Dup, edited'
+        second.save()
+        second.refresh_from_db()
+        self.assertEqual(second.url_hash, hashes[1])
+        self.assertEqual(live.Article.objects.get(pk=first.pk).duplicates.get(), second)
+
+
+
+class SearchMigrationTests(TransactionTestCase):
+    def test_index_survives_migrating_back_and_forth(self):
+        """
+        Test that migrating back before the index and forward again leaves the triggers and the indexed text in place.
+        """
+        from django.db import connection
+        from django.db.migrations.executor import MigrationExecutor
+        from news.utils import search
+
+        article = Article.objects.create(
+            title='Harbour', content='The ferry timetable changes in spring.', url='http://example.com/harbour',
+            source='S', published_at=timezone.now(),
+        )
+        executor = MigrationExecutor(connection)
+        leaves = executor.loader.graph.leaf_nodes()
+        executor.migrate([('news', '0024_article_engagement_counters')])
+        with connection.cursor() as cursor:
+            self.assertNotIn(search.FTS_TABLE, connection.introspection.table_names(cursor))
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(leaves)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'news_article'")
+            self.assertEqual({name for name, in cursor.fetchall()} & set(search.TRIGGERS), set(search.TRIGGERS))
+        self.assertEqual([a.pk for a in search.search(Article.objects.all(), 'timetable')], [article.pk])
+        self.assertEqual(Article.objects.get(pk=article.pk).content, 'The ferry timetable changes in spring.')
+
+        # Through the triggers, so no indexed row outlives the flush after this test.
+        Article.objects.all().delete()
+        self.assertEqual(list(search.search(Article.objects.all(), 'timetable')), [])
@@ -17,4 +17,7 @@ urlpatterns = [
     path('recommendations/', views.personalized_recommendations, name="recommendations"),
     path('history/', views.reading_history, name="history"),
     path('scraper/', views.run_scraper_view, name="scraper"),
+    path('scraper/runs/', views.scraper_runs, name="scraper_runs"),
+    path('scraper/jobs/<int:pk>/progress/', views.scraper_progress, name="scraper_progress"),
+    path('jobs/<int:pk>/', views.job_status, name="job_status"),
 ]
\ No newline at end of file
@@ -0,0 +1,144 @@
+# Append-only archive of raw article HTML. Pages are compressed one by one and
+# appended to segment files; news.models.RawPage maps each url to its record.
+# No Django models here: reprocess_page runs in the process-pool workers.
+import os
+import socket
+import struct
+import threading
+import time
+import zlib
+from django.conf import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODEC_ZLIB = "zlib"
+CODEC_ZSTD = "zstd"
+_CODEC_IDS = {CODEC_ZLIB: 0, CODEC_ZSTD: 1}
+_CODEC_NAMES = {number: name for name, number in _CODEC_IDS.items()}
+
+# Record: magic, codec id, payload length, CRC32 of the payload, then the payload.
+_MAGIC = b"NGA1"
+_HEADER = struct.Struct(">4sBII")
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def default_codec():
+    return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+
+def compress(data, codec):
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return zlib.compress(data, 6)
+
+
+def decompress(payload, codec):
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ArchiveError("Record is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return zlib.decompress(payload)
+
+
+def archive_dir():
+    return str(getattr(settings, "RAW_ARCHIVE_DIR", os.path.join(settings.BASE_DIR, "raw_archive")))
+
+
+class SegmentWriter:
+    """
+    Appends records to this process's current segment file and starts a new one
+    past `max_bytes`. Every process writes its own segments, so no file ever
+    has two writers; threads in one process share the writer through a lock.
+    """
+
+    def __init__(self, directory, max_bytes, codec=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.codec = codec or default_codec()
+        self.pid = os.getpid()
+        self._prefix = f"{socket.gethostname()}-{self.pid}-{int(time.time())}"
+        self._sequence = 0
+        self._file = None
+        self._name = None
+        self._lock = threading.Lock()
+
+    def _roll(self):
+        if self._file is not None:
+            self._file.close()
+        self._sequence += 1
+        self._name = f"{self._prefix}-{self._sequence:05d}.seg"
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(os.path.join(self.directory, self._name), "ab")
+
+    def append(self, data):
+        """Store `data` (bytes). Returns (segment name, offset, record length, codec)."""
+        payload = compress(data, self.codec)
+        record = _HEADER.pack(_MAGIC, _CODEC_IDS[self.codec], len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            if self._file is None or self._file.tell() + len(record) > self.max_bytes:
+                self._roll()
+            offset = self._file.tell()
+            self._file.write(record)
+            self._file.flush()
+            return self._name, offset, len(record), self.codec
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read(directory, segment, offset, length):
+    """Bytes of the record at `offset` in `segment`, checked against its CRC."""
+    with open(os.path.join(directory, segment), "rb") as segment_file:
+        segment_file.seek(offset)
+        record = segment_file.read(length)
+    if len(record) < _HEADER.size:
+        raise ArchiveError(f"Truncated record at {segment}:{offset}")
+    magic, codec_id, payload_length, crc = _HEADER.unpack_from(record)
+    payload = record[_HEADER.size:_HEADER.size + payload_length]
+    if magic != _MAGIC or len(payload) != payload_length or zlib.crc32(payload) != crc:
+        raise ArchiveError(f"Corrupt record at {segment}:{offset}")
+    return decompress(payload, _CODEC_NAMES[codec_id])
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        # A forked child must not append to its parent's segment.
+        if _writer is None or _writer.directory != archive_dir() or _writer.pid != os.getpid():
+            _writer = SegmentWriter(archive_dir(), getattr(settings, "RAW_ARCHIVE_SEGMENT_BYTES", 256 * 1024 * 1024))
+        return _writer
+
+
+def store(html):
+    """
+    Archive one page, if archiving is on and there is anything to keep.
+    Returns the location for a RawPage row as a dict, or None. File I/O only,
+    so it is safe on the scraper's worker threads.
+    """
+    if not html or not getattr(settings, "RAW_ARCHIVE_ENABLED", True):
+        return None
+    data = html.encode("utf-8")
+    segment, offset, length, codec = get_writer().append(data)
+    return {"segment": segment, "offset": offset, "length": length, "codec": codec, "size": len(data)}
+
+
+def reprocess_page(directory, segment, offset, length, url):
+    """Re-extract and re-rank one archived page. Runs in a pool worker; returns (content, ranking)."""
+    from news.utils import text
+
+    html = read(directory, segment, offset, length).decode("utf-8", errors="replace")
+    content = text.extract_article_text(url, html)
+    return content, text.rank_sentences(content) if content else None
@@ -0,0 +1,260 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.functions import Greatest
+from news.models import Article, AudioBlob
+from news.utils import tts
+from news.utils.text import RegexTokenizer
+
+logger = logging.getLogger(__name__)
+
+AUDIO_DIR = 'news_audio'
+CHUNK_DIR = f'{AUDIO_DIR}/chunks'
+DEFAULT_LANGUAGE = 'en'
+
+# Chunk boundaries must not depend on which NLTK data a host has installed,
+# otherwise hosts would disagree on chunk cache keys.
+_sentences = RegexTokenizer()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def audio_digest(text, language, engine):
+    return hashlib.sha256(f"{engine}\0{language}\0{text}".encode("utf-8")).hexdigest()
+
+
+def blob_name(digest):
+    """Sharded path relative to MEDIA_ROOT, e.g. news_audio/3f/a2/3fa2....mp3."""
+    return f"{AUDIO_DIR}/{digest[:2]}/{digest[2:4]}/{digest}.mp3"
+
+
+def chunk_name(digest):
+    return f"{CHUNK_DIR}/{digest[:2]}/{digest}.mp3"
+
+
+def split_chunks(text):
+    return list(_sentences.to_sentences(text)) or [text]
+
+
+def _write_atomic(path, data):
+    # Write to a temp file and rename so a concurrent reader never sees half an mp3.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _chunk_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "TTS_CHUNK_WORKERS", 4),
+                thread_name_prefix="tts-chunk",
+            )
+        return _executor
+
+
+def _chunk_audio(backend, chunk, language):
+    path = os.path.join(settings.MEDIA_ROOT, chunk_name(audio_digest(chunk, language, backend.name)))
+    if os.path.exists(path):
+        os.utime(path)  # Recently used; gc_audio evicts chunks by age.
+        with open(path, 'rb') as chunk_file:
+            return chunk_file.read()
+    data = backend.synthesize(chunk, language)
+    _write_atomic(path, data)
+    return data
+
+
+def synthesize(text, language=DEFAULT_LANGUAGE, backend=None):
+    """
+    Return the media-relative name of the mp3 for `text`. The text is split
+    into sentences that are synthesized concurrently (each cached on its own,
+    so re-summarized articles reuse unchanged sentences) and stitched into one
+    MP3 stream. Does not touch the database, so it is safe from worker threads.
+    """
+    backend = backend or tts.get_backend()
+    name = blob_name(audio_digest(text, language, backend.name))
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    if os.path.exists(path):
+        return name
+
+    chunks = split_chunks(text)
+    parts = _chunk_executor().map(lambda chunk: _chunk_audio(backend, chunk, language), chunks)
+    # MP3 is a sequence of self-contained frames, so the parts concatenate cleanly.
+    _write_atomic(path, b"".join(parts))
+    return name
+
+
+def generate_audio_summary(text, article_id):
+    if not text:
+        logger.warning(f"No text for article {article_id}")
+        return None
+    try:
+        name = synthesize(text)
+        logger.info(f"Audio for article {article_id} is {name}")
+        return settings.MEDIA_URL + name
+    except Exception as e:
+        logger.error(f"Audio generation failed for article {article_id}: {e}")
+        return None
+
+
+def _media_name(audio_url):
+    return audio_url[len(settings.MEDIA_URL):] if audio_url.startswith(settings.MEDIA_URL) else audio_url
+
+
+def _shift_ref_counts(counts, sign):
+    # One UPDATE for all blobs: ref_count +/- n, with n picked per name.
+    if not counts:
+        return
+    delta = Case(*[When(name=name, then=Value(n)) for name, n in counts.items()], default=Value(0))
+    blobs = AudioBlob.objects.filter(name__in=counts)
+    if sign < 0:
+        blobs.filter(ref_count__gt=0).update(ref_count=Greatest(F('ref_count') - delta, Value(0)))
+    else:
+        blobs.update(ref_count=F('ref_count') + delta)
+
+
+def _duplicate_changes(changes):
+    # A duplicate stored while its canonical had no audio yet (or whose voice
+    # failed) has none; one still on the canonical's old audio shares it.
+    followed = {article.pk: (name, previous) for article, name, previous in changes if article.canonical_id is None}
+    if not followed:
+        return []
+    changing = {article.pk for article, _, _ in changes}
+    followers = []
+    for duplicate in Article.objects.filter(canonical_id__in=followed).only('pk', 'canonical_id', 'audio_file'):
+        if duplicate.pk in changing:
+            continue
+        name, canonical_previous = followed[duplicate.canonical_id]
+        previous = duplicate.audio_file.name if duplicate.audio_file else None
+        if previous is None or previous == canonical_previous:
+            followers.append((duplicate, name, previous))
+    return followers
+
+
+def attach_many(pairs):
+    """
+    Point each article in `pairs` of (article, audio_url) at its audio and keep
+    blob reference counts in step. Duplicates of a canonical that gets new audio
+    follow it, unless they carry audio of their own. Costs a fixed handful of
+    queries however many articles there are, and only the audio_file column is written.
+    """
+    changes = []
+    for article, audio_url in pairs:
+        if not audio_url:
+            continue
+        name = _media_name(audio_url)
+        previous = article.audio_file.name if article.audio_file else None
+        if previous != name:
+            changes.append((article, name, previous))
+    if not changes:
+        return
+    changes.extend(_duplicate_changes(changes))
+
+    # Legacy per-article files are not content-addressed and have no blob row.
+    digests = {}
+    for _, name, _ in changes:
+        digest = os.path.splitext(os.path.basename(name))[0]
+        if name == blob_name(digest):
+            digests[digest] = name
+
+    with transaction.atomic():
+        known = set(AudioBlob.objects.filter(digest__in=digests).values_list('digest', flat=True))
+        missing = []
+        for digest, name in digests.items():
+            if digest in known:
+                continue
+            path = os.path.join(settings.MEDIA_ROOT, name)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            missing.append(AudioBlob(digest=digest, name=name, size=size))
+        AudioBlob.objects.bulk_create(missing, ignore_conflicts=True)
+
+        _shift_ref_counts(Counter(name for _, name, _ in changes if name in digests.values()), +1)
+        _shift_ref_counts(Counter(previous for _, _, previous in changes if previous), -1)
+
+        for article, name, _ in changes:
+            article.audio_file.name = name
+        if len(changes) == 1:
+            Article.objects.filter(pk=changes[0][0].pk).update(audio_file=changes[0][1])
+        else:
+            Article.objects.bulk_update([article for article, _, _ in changes], ['audio_file'])
+
+
+def attach(article, audio_url):
+    """Point `article` at the audio behind `audio_url` and keep blob reference counts in step."""
+    attach_many([(article, audio_url)])
+
+
+def detach_many(articles):
+    """
+    Take the audio off `articles`, e.g. because the summary it reads out has
+    changed, and release their blob references. One UPDATE for the articles.
+    """
+    articles = [article for article in articles if article.audio_file]
+    if not articles:
+        return
+    with transaction.atomic():
+        _shift_ref_counts(Counter(article.audio_file.name for article in articles), -1)
+        Article.objects.filter(pk__in=[article.pk for article in articles]).update(audio_file='')
+    for article in articles:
+        article.audio_file.name = ''
+
+
+def collect_garbage(dry_run=False, grace_seconds=3600, chunk_max_age=30 * 24 * 3600):
+    """
+    Recount blob references from Article.audio_file, then delete blobs nobody
+    references and any mp3 under news_audio that no article points at. Files
+    younger than `grace_seconds` are kept, since they may be about to be attached.
+    Sentence chunks are a cache and are evicted once unused for `chunk_max_age`.
+    Returns the list of removed media-relative names.
+    """
+    # Files saved on Windows were stored as news_audio\summary_<id>.mp3; compare
+    # with the on-disk names below in one form.
+    references = Counter()
+    for name, n in (
+        Article.objects.exclude(audio_file='').exclude(audio_file__isnull=True)
+        .values_list('audio_file').annotate(n=Count('id'))
+    ):
+        references[name.replace('\\', '/')] += n
+    now = time.time()
+    removed = []
+
+    for blob in AudioBlob.objects.all():
+        count = references.get(blob.name, 0)
+        if count != blob.ref_count and not dry_run:
+            AudioBlob.objects.filter(pk=blob.pk).update(ref_count=count)
+
+    audio_root = os.path.join(settings.MEDIA_ROOT, AUDIO_DIR)
+    for dirpath, _, filenames in os.walk(audio_root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            name = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+            max_age = chunk_max_age if name.startswith(CHUNK_DIR + '/') else grace_seconds
+            if name in references or os.path.getmtime(path) > now - max_age:
+                continue
+            removed.append(name)
+            if not dry_run:
+                os.remove(path)
+                AudioBlob.objects.filter(name=name).delete()
+
+    if not dry_run:
+        # Rows whose file is already gone.
+        for blob in AudioBlob.objects.filter(ref_count=0):
+            if not os.path.exists(os.path.join(settings.MEDIA_ROOT, blob.name)):
+                blob.delete()
+    return removed
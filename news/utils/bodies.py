@@ -0,0 +1,39 @@
+# Storage format of article bodies (news.models.ArticleBody): the text and its
+# sentence ranking, zlib-compressed. Migration 0026 keeps its own copy of the
+# format, so changing it here needs a data migration.
+import json
+import zlib
+
+LEVEL = 6
+EXCERPT_LENGTH = 300
+
+
+def pack_text(text):
+    return zlib.compress((text or "").encode("utf-8"), LEVEL)
+
+
+def unpack_text(data):
+    return zlib.decompress(bytes(data)).decode("utf-8") if data else ""
+
+
+def pack_json(value):
+    if value is None:
+        return None
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), LEVEL)
+
+
+def unpack_json(data):
+    return json.loads(zlib.decompress(bytes(data))) if data else None
+
+
+def word_count(text):
+    return len((text or "").split())
+
+
+def excerpt(text, length=EXCERPT_LENGTH):
+    """The start of `text` for list pages: whitespace collapsed, cut at a word, at most `length` characters."""
+    text = text or ""
+    head = " ".join(text[:length * 2].split())
+    if len(head) <= length and len(text) <= length * 2:
+        return head
+    return head[:length - 1].rsplit(" ", 1)[0] + "…"
@@ -0,0 +1,72 @@
+import multiprocessing
+import os
+import threading
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from news.utils import extraction, text
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _engine():
+    return getattr(settings, "SUMMARIZER_ENGINE", "numpy")
+
+
+def _extractors():
+    return tuple(getattr(settings, "EXTRACTION_ENGINES", extraction.DEFAULT_CHAIN))
+
+
+def get_executor():
+    """
+    Shared process pool for CPU-heavy text work, or None when TEXT_PROCESS_WORKERS
+    is 0 and everything should run synchronously on the calling thread.
+    """
+    global _executor
+    workers = getattr(settings, "TEXT_PROCESS_WORKERS", os.cpu_count())
+    if not workers:
+        return None
+    with _lock:
+        if _executor is None:
+            # spawn, not fork: the scraper calls in from several threads at once.
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=text.warm_up,
+                initargs=(_engine(), _extractors()),
+            )
+        return _executor
+
+
+def shutdown():
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def run(func, *args):
+    executor = get_executor()
+    if executor is None:
+        text.warm_up(_engine(), _extractors())
+        return func(*args)
+    try:
+        return executor.submit(func, *args).result()
+    except BrokenProcessPool as e:
+        logger.error(f"Text process pool broke, running {func.__name__} inline: {e}")
+        shutdown()
+        text.warm_up(_engine(), _extractors())
+        return func(*args)
+
+
+def clean_html(raw_html):
+    return run(text.clean_html, raw_html)
+
+
+def extract_article_text(url, html):
+    return run(text.extract_article_text, url, html)
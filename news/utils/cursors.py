@@ -0,0 +1,176 @@
+# Keyset ("cursor") pagination for article lists. Instead of COUNT(*) plus
+# OFFSET, each page asks for the rows after the last one shown, by the sort
+# key, so a deep page costs the same index range scan as the first. Cursors
+# are signed, so clients can pass them back but not forge or edit them.
+from datetime import datetime
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+SALT = "news.article-cursor"
+DEFAULT_SORT = "-published_at"
+RELEVANCE = "relevance"
+
+# Sort name -> (field, descending) pairs. Every key ends in the primary key, so
+# the order is total and no row is skipped or repeated between pages.
+SORTS = {
+    "-published_at": (("published_at", True), ("id", True)),
+    "published_at": (("published_at", False), ("id", False)),
+    "most_popular_likes": (("like_count", True), ("published_at", True), ("id", True)),
+    "most_popular_comments": (("comment_count", True), ("published_at", True), ("id", True)),
+}
+# BM25 ranks are computed per query and have no index to seek on, so search
+# results page by position. The match set is already narrowed by FTS.
+RELEVANCE_ORDER = ("search_rank", "-published_at", "-id")
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def resolve_sort(sort_by, searching=False):
+    """The sort to page by: `sort_by` if it is one we can page, else the default."""
+    if sort_by == RELEVANCE or (not sort_by and searching):
+        return RELEVANCE if searching else DEFAULT_SORT
+    return sort_by if sort_by in SORTS else DEFAULT_SORT
+
+
+def _dump(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _load(field, value):
+    if field == "published_at":
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+        if parsed is None:
+            raise InvalidCursor("bad timestamp")
+        return parsed
+    if not isinstance(value, int):
+        raise InvalidCursor("bad key")
+    return value
+
+
+def encode(sort, position, backwards=False):
+    """`position` is the row's key values, or for relevance its offset."""
+    return signing.dumps({"s": sort, "p": position, "b": backwards}, salt=SALT, compress=True)
+
+
+def decode(cursor, sort):
+    """(position, backwards) from a cursor made by encode() for `sort`."""
+    try:
+        data = signing.loads(cursor, salt=SALT)
+    except signing.BadSignature:
+        raise InvalidCursor("bad signature")
+    if not isinstance(data, dict) or data.get("s") != sort:
+        raise InvalidCursor("cursor is for another sort order")
+    position = data.get("p")
+    if sort == RELEVANCE:
+        if not isinstance(position, int) or position < 0:
+            raise InvalidCursor("bad offset")
+        return position, bool(data.get("b"))
+    keys = SORTS[sort]
+    if not isinstance(position, list) or len(position) != len(keys):
+        raise InvalidCursor("bad key")
+    return [_load(field, value) for (field, _), value in zip(keys, position)], bool(data.get("b"))
+
+
+def _after(keys, values):
+    """
+    Rows strictly after `values` in the order `keys`, as
+    f1 <= v1 AND (f1 < v1 OR (f1 = v1 AND (f2 < v2 OR ...))) for descending keys.
+    The leading bound on its own lets the database seek the index on f1.
+    """
+    condition = None
+    for (field, descending), value in reversed(list(zip(keys, values))):
+        beyond = Q(**{f"{field}__{'lt' if descending else 'gt'}": value})
+        condition = beyond if condition is None else beyond | (Q(**{field: value}) & condition)
+    (first, descending), value = keys[0], values[0]
+    return Q(**{f"{first}__{'lte' if descending else 'gte'}": value}) & condition
+
+
+def _order(keys):
+    return [f"-{field}" if descending else field for field, descending in keys]
+
+
+class CursorPage:
+    """One page of articles, iterable like a Paginator page."""
+
+    def __init__(self, object_list, sort, next_position=None, previous_position=None):
+        self.object_list = object_list
+        self.sort = sort
+        self.next_cursor = encode(sort, next_position) if next_position is not None else None
+        self.previous_cursor = encode(sort, previous_position, backwards=True) if previous_position is not None else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def paginate(queryset, sort, cursor=None, page_size=6):
+    """
+    The page of `queryset` (ordered here, by `sort`) that `cursor` points at,
+    or the first page. Raises InvalidCursor for a cursor that was tampered
+    with or made for another sort.
+    """
+    if sort == RELEVANCE:
+        return _paginate_offset(queryset, cursor, page_size)
+    keys = SORTS[sort]
+    position, backwards = decode(cursor, sort) if cursor else (None, False)
+    if backwards:
+        keys = tuple((field, not descending) for field, descending in keys)
+    rows = queryset.order_by(*_order(keys))
+    if position is not None:
+        rows = rows.filter(_after(keys, position))
+    rows = list(rows[:page_size + 1])
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+    if not rows:
+        return CursorPage(rows, sort)
+
+    def key(article):
+        return [_dump(getattr(article, field)) for field, _ in SORTS[sort]]
+
+    has_next = more if not backwards else True
+    has_previous = position is not None if not backwards else more
+    return CursorPage(
+        rows, sort,
+        next_position=key(rows[-1]) if has_next else None,
+        previous_position=key(rows[0]) if has_previous else None,
+    )
+
+
+def _paginate_offset(queryset, cursor, page_size):
+    offset, backwards = decode(cursor, RELEVANCE) if cursor else (0, False)
+    if backwards:
+        offset = max(offset - page_size, 0)
+    rows = list(queryset.order_by(*RELEVANCE_ORDER)[offset:offset + page_size + 1])
+    more = len(rows) > page_size
+    return CursorPage(
+        rows[:page_size], RELEVANCE,
+        next_position=offset + page_size if more else None,
+        previous_position=offset if offset else None,
+    )
+
+
+def estimate_count(queryset, limit=None):
+    """
+    (count, exact): the number of rows in `queryset`, counting no further than
+    `limit` (ARTICLE_COUNT_LIMIT), so the cost stays bounded on a large archive.
+    """
+    limit = limit if limit is not None else getattr(settings, "ARTICLE_COUNT_LIMIT", 1000)
+    count = queryset.order_by()[:limit + 1].count()
+    return min(count, limit), count <= limit
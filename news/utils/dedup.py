@@ -0,0 +1,77 @@
+# Near-duplicate detection at ingest: the same wire story from several feeds is
+# downloaded once per copy, but only the first copy is summarized and voiced.
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from news.models import Article, ArticleSignature
+from news.utils import simhash
+
+
+def signature_text(title, content):
+    return f"{title or ''}\n{content or ''}"
+
+
+class DuplicateIndex:
+    """
+    SimHash signatures of recent canonical articles, bucketed by band so a
+    lookup only compares against signatures sharing a band with the query.
+    Loaded from ArticleSignature once per scrape and kept current with add();
+    the value stored with a signature is whatever the caller wants back from
+    match(): an article id, or an item still on its way to the database.
+    """
+
+    def __init__(self, max_distance=None):
+        if max_distance is None:
+            max_distance = getattr(settings, "SIMHASH_MAX_DISTANCE", 6)
+        # Pigeonhole: within BANDS - 1 bits, two signatures share a band.
+        self.max_distance = min(max_distance, simhash.BANDS - 1)
+        self._buckets = [{} for _ in range(simhash.BANDS)]
+
+    @classmethod
+    def load(cls, window=None):
+        if window is None:
+            window = timedelta(hours=getattr(settings, "DUPLICATE_WINDOW_HOURS", 72))
+        index = cls()
+        rows = ArticleSignature.objects.filter(created_at__gte=timezone.now() - window)
+        for article_id, value in rows.values_list("article_id", "simhash"):
+            index.add(simhash.to_unsigned(value), article_id)
+        return index
+
+    def add(self, signature, value):
+        for band, bucket in zip(simhash.bands(signature), self._buckets):
+            bucket.setdefault(band, []).append((signature, value))
+
+    def match(self, signature):
+        """The value of the closest signature within max_distance, or None."""
+        best = None
+        for band, bucket in zip(simhash.bands(signature), self._buckets):
+            for candidate, value in bucket.get(band, ()):
+                bits = simhash.distance(signature, candidate)
+                if bits <= self.max_distance and (best is None or bits < best[0]):
+                    best = (bits, value)
+        return best[1] if best else None
+
+
+class CanonicalCache:
+    """Canonical articles by id, fetched once each and without their bodies."""
+
+    def __init__(self):
+        self._by_id = {}
+
+    def get(self, article_id):
+        if article_id not in self._by_id:
+            self._by_id[article_id] = (
+                Article.objects.only("id", "url", "summary", "audio_file").filter(pk=article_id).first()
+            )
+        return self._by_id[article_id]
+
+    def remember(self, article):
+        self._by_id[article.pk] = article
+
+
+def save_signatures(pairs):
+    """Persist (article, signature) pairs for saved canonical articles."""
+    ArticleSignature.objects.bulk_create([
+        ArticleSignature(article_id=article.pk, simhash=simhash.to_signed(signature))
+        for article, signature in pairs
+    ], ignore_conflicts=True)
@@ -0,0 +1,56 @@
+# Article engagement counters (likes, approved comments, bookmarks, summary
+# feedback). Row-by-row changes are counted by the receivers in news.models;
+# this module covers bulk moderation and rebuilding the counters from scratch.
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from news.models import Article, ArticleLike, Bookmark, Comment, SummaryFeedback
+
+
+def set_comment_approval(comments, approved):
+    """
+    Approve or unapprove `comments` (a Comment queryset) in one UPDATE and move
+    each article's comment_count by the number of its comments that changed.
+    Returns how many comments changed.
+    """
+    with transaction.atomic():
+        changing = Comment.objects.filter(pk__in=list(comments.exclude(approved=approved).values_list('pk', flat=True)))
+        per_article = dict(changing.order_by().values_list('article_id').annotate(n=Count('pk')))
+        updated = changing.update(approved=approved)
+        for article_id, n in per_article.items():
+            Article.adjust_counts(article_id, comment_count=n if approved else -n)
+    return updated
+
+
+def _count(model, **filters):
+    rows = model.objects.filter(article=OuterRef('pk'), **filters).order_by().values('article').annotate(n=Count('pk'))
+    return Coalesce(Subquery(rows.values('n'), output_field=IntegerField()), Value(0))
+
+
+def expected_counts():
+    """The counters as they should be, as expressions over each article's rows."""
+    return {
+        'like_count': _count(ArticleLike),
+        'comment_count': _count(Comment, approved=True),
+        'bookmark_count': _count(Bookmark),
+        'useful_count': _count(SummaryFeedback, useful=True),
+        'not_useful_count': _count(SummaryFeedback, useful=False),
+    }
+
+
+def recount(articles=None, batch_size=500):
+    """
+    Rebuild the counters of `articles` (all articles by default) from the
+    likes, comments, bookmarks and feedback rows. Only articles whose stored
+    counters are off are written. Returns the ids that were corrected.
+    """
+    if articles is None:
+        articles = Article.objects.all()
+    expected = expected_counts()
+    drifted = articles.annotate(**{f'expected_{field}': expr for field, expr in expected.items()}).filter(
+        ~Q(**{field: F(f'expected_{field}') for field in expected})
+    )
+    ids = list(drifted.values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        Article.objects.filter(pk__in=ids[start:start + batch_size]).update(**expected)
+    return ids
@@ -0,0 +1,165 @@
+# Article body extraction. Like news.utils.text, this module must not import
+# Django: it runs inside the process-pool workers.
+import re
+import lxml.html
+from lxml import etree
+
+# Never part of an article body.
+_DROP_TAGS = (
+    "script", "style", "noscript", "template", "iframe", "svg", "canvas", "form", "button",
+    "select", "input", "textarea", "nav", "header", "footer", "aside", "figure", "figcaption",
+)
+# class/id markers: always boilerplate, and boilerplate unless the element also looks like content.
+_BOILERPLATE = re.compile(
+    r"comment|share|social|related|recommend|promo|sponsor|advert|cookie|consent|newsletter|subscribe|popup|modal",
+    re.I,
+)
+_MAYBE_BOILERPLATE = re.compile(r"sidebar|breadcrumb|menu|masthead|footer|header|banner|byline|caption|\bads?\b|\btags?\b", re.I)
+_CONTENT_HINT = re.compile(r"article|story|content|entry|post|body|text|main", re.I)
+_NEVER_DROP = ("html", "body", "article", "main")
+_BLOCK_TAGS = ("p", "h2", "h3", "li", "blockquote", "pre")
+_WHITESPACE = re.compile(r"\s+")
+
+# A paragraph shorter than this is a caption, dateline or button label, not prose.
+MIN_PARAGRAPH_CHARS = 40
+# Quality checks the fast path has to pass before its result is trusted.
+MIN_ARTICLE_CHARS = 300
+MIN_PARAGRAPHS = 2
+MAX_LINK_DENSITY = 0.35
+
+
+def _text(element):
+    return _WHITESPACE.sub(" ", element.text_content()).strip()
+
+
+def _link_density(element, text_length):
+    if not text_length:
+        return 1.0
+    link_chars = sum(len(_WHITESPACE.sub(" ", a.text_content()).strip()) for a in element.iter("a"))
+    return link_chars / text_length
+
+
+def _is_boilerplate(element):
+    if element.tag in _NEVER_DROP:
+        return False
+    marker = f"{element.get('class', '')} {element.get('id', '')} {element.get('role', '')}"
+    if not marker.strip():
+        return False
+    if _BOILERPLATE.search(marker):
+        return True
+    return bool(_MAYBE_BOILERPLATE.search(marker)) and not _CONTENT_HINT.search(marker)
+
+
+def _parse(html):
+    if isinstance(html, str):
+        # lxml refuses str input that carries an XML encoding declaration.
+        html = html.encode("utf-8")
+    parser = lxml.html.HTMLParser(remove_comments=True, remove_pis=True, encoding="utf-8")
+    return lxml.html.fromstring(html, parser=parser)
+
+
+class DensityExtractor:
+    """
+    Fast boilerplate removal on a single lxml tree. Drops markup that is never
+    article text (scripts, navigation, share bars, comment blocks), scores
+    every paragraph by its length, commas and how little of it is link text,
+    credits the score to its container, and returns the paragraphs of the
+    best-scoring container. Returns None if the result does not look like an
+    article, so the caller can fall back to a heavier engine.
+    """
+
+    name = "fast"
+
+    def extract(self, url, html):
+        try:
+            root = _parse(html)
+        except (etree.ParserError, ValueError):
+            return None
+
+        etree.strip_elements(root, *_DROP_TAGS, with_tail=False)
+        for element in list(root.iter(etree.Element)):
+            if element.getparent() is not None and _is_boilerplate(element):
+                element.drop_tree()
+
+        scores = {}
+        for paragraph in root.iter("p"):
+            text = _text(paragraph)
+            if len(text) < MIN_PARAGRAPH_CHARS:
+                continue
+            score = (1 + text.count(",") + min(len(text) // 100, 3)) * (1 - _link_density(paragraph, len(text)))
+            parent = paragraph.getparent()
+            if parent is None:
+                continue
+            scores[parent] = scores.get(parent, 0) + score
+            grandparent = parent.getparent()
+            if grandparent is not None:
+                scores[grandparent] = scores.get(grandparent, 0) + score / 2
+        if not scores:
+            return None
+
+        def weight(element):
+            marker = f"{element.get('class', '')} {element.get('id', '')}"
+            bonus = 1.25 if element.tag in ("article", "main") or _CONTENT_HINT.search(marker) else 1.0
+            return scores[element] * bonus
+
+        best = max(scores, key=weight)
+        paragraphs = []
+        for block in best.iter(*_BLOCK_TAGS):
+            if any(ancestor.tag in _BLOCK_TAGS for ancestor in block.iterancestors() if ancestor is not best):
+                continue  # Counted with its enclosing block.
+            text = _text(block)
+            if len(text) >= MIN_PARAGRAPH_CHARS or (block.tag in ("h2", "h3") and text):
+                paragraphs.append(text)
+
+        body = "\n\n".join(paragraphs)
+        prose = [p for p in paragraphs if len(p) >= MIN_PARAGRAPH_CHARS]
+        if len(body) < MIN_ARTICLE_CHARS or len(prose) < MIN_PARAGRAPHS:
+            return None
+        if _link_density(best, len(_text(best))) > MAX_LINK_DENSITY:
+            return None
+        return body
+
+
+class NewspaperExtractor:
+    """newspaper3k's extractor: slower and heavier, but handles more unusual layouts."""
+
+    name = "newspaper"
+
+    def extract(self, url, html):
+        from newspaper import Article as NewsArticle
+
+        try:
+            article = NewsArticle(url)
+            article.download(input_html=html)
+            article.parse()
+            return article.text or None
+        except Exception:
+            return None
+
+
+EXTRACTORS = {
+    DensityExtractor.name: DensityExtractor,
+    NewspaperExtractor.name: NewspaperExtractor,
+}
+# Tried in this order; the first non-empty result wins.
+DEFAULT_CHAIN = (DensityExtractor.name, NewspaperExtractor.name)
+
+
+def extract(url, html, engines=DEFAULT_CHAIN):
+    if not html:
+        return ""
+    for engine in engines:
+        text = EXTRACTORS[engine]().extract(url, html)
+        if text:
+            return text
+    return ""
+
+
+def html_to_text(raw_html):
+    """All text in a document or fragment, without building a BeautifulSoup tree."""
+    if not raw_html or not raw_html.strip():
+        return ""
+    try:
+        return lxml.html.fromstring(raw_html).text_content()
+    except (etree.ParserError, ValueError):
+        return raw_html
@@ -0,0 +1,129 @@
+import random
+import logging
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from news.models import Feed
+from news.utils import leases
+
+logger = logging.getLogger(__name__)
+
+# How much each new observation moves the smoothed publish gap.
+GAP_SMOOTHING = 0.3
+
+# The conditional GET state: what tells the next poll the feed has not changed.
+VALIDATOR_FIELDS = ("etag", "last_modified", "body_hash", "newest_entry_id")
+
+
+def due_feeds(now=None):
+    """Active feeds due for a poll, leaving out those another scraper is polling right now."""
+    now = now or timezone.now()
+    return (
+        Feed.objects.filter(active=True)
+        .filter(Q(next_poll_at__isnull=True) | Q(next_poll_at__lte=now))
+        .exclude(pk__in=list(leases.leased_feeds(now)))
+    )
+
+
+def seconds_until_next_poll(now=None):
+    """
+    Seconds until a feed is due and free to claim: a feed leased by another
+    scraper waits for its lease to expire (or for that scraper to reschedule
+    it). None when there are no active feeds.
+    """
+    now = now or timezone.now()
+    leased = leases.leased_feeds(now)
+    waits = [
+        max(0.0, (max(filter(None, (next_poll, leased.get(pk))), default=now) - now).total_seconds())
+        for pk, next_poll in Feed.objects.filter(active=True).values_list('pk', 'next_poll_at')
+    ]
+    return min(waits, default=None)
+
+
+def observed_publish_gap(entries):
+    """Average seconds between the entries' publish times, or None if fewer than two are dated."""
+    stamps = sorted(
+        datetime(*entry.published_parsed[:6])
+        for entry in entries
+        if entry.get("published_parsed")
+    )
+    if len(stamps) < 2:
+        return None
+    return (stamps[-1] - stamps[0]).total_seconds() / (len(stamps) - 1)
+
+
+def next_interval(feed, new_items, gap=None):
+    """
+    Seconds until the next poll after a successful one. A busy feed is polled
+    about once per expected new entry; a feed that had nothing new backs off
+    by half again, so quiet and slow sources are left alone.
+    """
+    low = getattr(settings, "FEED_MIN_INTERVAL", 120)
+    high = getattr(settings, "FEED_MAX_INTERVAL", 6 * 3600)
+    if gap is not None:
+        target = gap
+    elif feed.publish_gap is not None:
+        target = feed.publish_gap
+    else:
+        target = feed.poll_interval
+    if not new_items:
+        target = max(target, feed.poll_interval * 1.5)
+    return int(min(high, max(low, target)))
+
+
+def error_backoff(failures):
+    base = getattr(settings, "FEED_MIN_INTERVAL", 120)
+    return min(base * 2 ** failures, getattr(settings, "FEED_ERROR_BACKOFF_MAX", 6 * 3600))
+
+
+def _jittered(seconds):
+    jitter = getattr(settings, "FEED_JITTER", 0.1)
+    return seconds * random.uniform(1 - jitter, 1 + jitter)
+
+
+def record_poll(feed, polled, new_items=0, stored=True):
+    """
+    Save the outcome of polling `feed`: the conditional GET state in
+    polled["state"], stats, and when to poll it next. One UPDATE.
+
+    Call it once the feed's new entries are stored. With stored=False (some
+    of them never were) the previous conditional GET state is kept, so the
+    next poll sees those entries again.
+    """
+    now = timezone.now()
+    fields = dict(polled.get("state", {}))
+    if not stored:
+        for field in VALIDATOR_FIELDS:
+            fields.pop(field, None)
+    fields["last_duration"] = polled.get("duration")
+    fields["total_polls"] = feed.total_polls + 1
+
+    if polled.get("error"):
+        failures = feed.consecutive_failures + 1
+        fields.update(
+            last_error=polled["error"][:2000],
+            consecutive_failures=failures,
+            total_failures=feed.total_failures + 1,
+            next_poll_at=now + timedelta(seconds=_jittered(error_backoff(failures))),
+        )
+    else:
+        observed = observed_publish_gap(polled["entries"]) if polled.get("entries") else None
+        gap = feed.publish_gap
+        if observed is not None:
+            gap = observed if gap is None else (1 - GAP_SMOOTHING) * gap + GAP_SMOOTHING * observed
+        interval = next_interval(feed, new_items, gap)
+        fields.update(
+            last_error="",
+            last_new_items=new_items,
+            last_success_at=now,
+            consecutive_failures=0,
+            publish_gap=gap,
+            poll_interval=interval,
+            next_poll_at=now + timedelta(seconds=_jittered(interval)),
+        )
+
+    for field, value in fields.items():
+        setattr(feed, field, value)
+    Feed.objects.filter(pk=feed.pk).update(**fields)
+    return feed
@@ -0,0 +1,207 @@
+import codecs
+import re
+import time
+import threading
+import logging
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "ByteNews/1.0 (+news aggregator)"
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+
+
+class FetchError(Exception):
+    """Base class for every way fetching a url can fail."""
+
+
+class HostTimeout(FetchError):
+    """The host accepted no connection, or sent nothing, within the timeout: a slow host."""
+
+
+class HostError(FetchError):
+    """Connection refused or reset, DNS failure, TLS error or a 5xx: a broken host."""
+
+
+class ResponseTooLarge(FetchError):
+    pass
+
+
+class CircuitOpen(FetchError):
+    """The host failed repeatedly and is not being contacted until its cool-down ends."""
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker. After `threshold` consecutive failures the host is left
+    alone for `cooldown` seconds; then a single trial request is let through,
+    which either closes the breaker again or restarts the cool-down.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = {}
+        self._open_until = {}
+        self._lock = threading.Lock()
+
+    def before_request(self, host):
+        with self._lock:
+            open_until = self._open_until.get(host)
+            if open_until is None:
+                return
+            now = time.monotonic()
+            if now < open_until:
+                raise CircuitOpen(f"{host} is failing; not contacting it for another {open_until - now:.0f}s")
+            # Half-open: this caller is the trial request; everyone else waits for its outcome.
+            self._open_until[host] = now + self.cooldown
+
+    def record_success(self, host):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._open_until.pop(host, None)
+
+    def record_failure(self, host):
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.threshold:
+                if host not in self._open_until:
+                    logger.warning(f"Circuit for {host} opened after {failures} failures")
+                self._open_until[host] = time.monotonic() + self.cooldown
+
+    def is_open(self, host):
+        with self._lock:
+            return self._open_until.get(host, 0) > time.monotonic()
+
+
+_session = None
+_breaker = None
+_lock = threading.Lock()
+
+
+def session():
+    """The process-wide session: keep-alive connections pooled per host and shared by all threads."""
+    global _session
+    with _lock:
+        if _session is None:
+            pool_size = getattr(settings, "HTTP_POOL_SIZE", 20)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            _session.headers["User-Agent"] = USER_AGENT
+        return _session
+
+
+def breaker():
+    global _breaker
+    with _lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(
+                getattr(settings, "HTTP_BREAKER_THRESHOLD", 5),
+                getattr(settings, "HTTP_BREAKER_COOLDOWN", 300),
+            )
+        return _breaker
+
+
+def reset():
+    """Drop the shared session and breaker state (settings changes, tests)."""
+    global _session, _breaker
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _breaker = None
+
+
+def _read_capped(response, url, max_bytes, deadline):
+    declared = response.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise ResponseTooLarge(f"{url} is {declared} bytes, over the {max_bytes} byte limit")
+    body = bytearray()
+    try:
+        for chunk in response.iter_content(64 * 1024):
+            body.extend(chunk)
+            if len(body) > max_bytes:
+                raise ResponseTooLarge(f"{url} is over the {max_bytes} byte limit")
+            if time.monotonic() > deadline:
+                # The read timeout is per socket read; this stops a host that drips bytes forever.
+                raise HostTimeout(f"{url} took longer than the total timeout")
+    except requests.exceptions.ConnectionError as e:
+        # requests reports a read timeout while streaming the body as a
+        # ConnectionError wrapping urllib3's ReadTimeoutError; it is still a slow host.
+        if any(isinstance(arg, ReadTimeoutError) for arg in e.args):
+            raise HostTimeout(f"{url} stopped sending: {e}") from e
+        raise
+    return bytes(body)
+
+
+def get(url, headers=None, max_bytes=None):
+    """
+    GET `url` through the shared session with connect/read timeouts, a cap
+    on the body size and the host's circuit breaker. Returns the
+    requests.Response with its body already read; 4xx responses are returned
+    as they are, everything that points at a slow or broken host raises a
+    FetchError subclass.
+    """
+    host = urlparse(url).netloc.lower()
+    if max_bytes is None:
+        max_bytes = getattr(settings, "HTTP_MAX_BYTES", 5 * 1024 * 1024)
+    timeout = (getattr(settings, "HTTP_CONNECT_TIMEOUT", 5), getattr(settings, "HTTP_READ_TIMEOUT", 15))
+    deadline = time.monotonic() + getattr(settings, "HTTP_TOTAL_TIMEOUT", 30)
+
+    circuit = breaker()
+    circuit.before_request(host)
+    try:
+        with session().get(url, headers=headers, timeout=timeout, stream=True) as response:
+            if response.status_code >= 500:
+                raise HostError(f"{url} answered {response.status_code}")
+            response._content = _read_capped(response, url, max_bytes, deadline)
+    except (requests.exceptions.ConnectTimeout, requests.exceptions.ReadTimeout) as e:
+        circuit.record_failure(host)
+        raise HostTimeout(f"{url} timed out: {e}") from e
+    except requests.exceptions.RequestException as e:
+        circuit.record_failure(host)
+        raise HostError(f"{url} failed: {e}") from e
+    except (HostError, HostTimeout):
+        circuit.record_failure(host)
+        raise
+    except ResponseTooLarge:
+        # An oversized page says nothing about the host's health.
+        circuit.record_success(host)
+        raise
+    circuit.record_success(host)
+    return response
+
+
+def _known_encoding(name):
+    try:
+        return codecs.lookup(name).name
+    except (LookupError, TypeError):
+        return None
+
+
+def text(response):
+    """
+    The body of `response` as text. requests assumes ISO-8859-1 for a text/*
+    response without a charset, which garbles most of the web; so unless the
+    Content-Type names one, use the page's <meta charset>, then UTF-8 if the
+    bytes are valid UTF-8, then requests' guess.
+    """
+    if "charset=" in response.headers.get("Content-Type", "").lower():
+        return response.text
+    body = response.content or b""
+    match = _META_CHARSET.search(body[:4096])
+    encoding = _known_encoding(match.group(1).decode("ascii")) if match else None
+    if encoding is None:
+        try:
+            return body.decode("utf-8")
+        except UnicodeDecodeError:
+            encoding = _known_encoding(response.apparent_encoding) or "utf-8"
+    return body.decode(encoding, errors="replace")
@@ -0,0 +1,193 @@
+import os
+import random
+import socket
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from news.models import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+def handler(action):
+    def register(func):
+        HANDLERS[action] = func
+        return func
+    return register
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(action, article=None):
+    """
+    Queue `action` for `article`, reusing the queued or running job if there
+    already is one. Returns (job, created).
+    """
+    active = Job.objects.filter(action=action, article=article, status__in=Job.ACTIVE_STATUSES)
+    job = active.first()
+    if job:
+        return job, False
+    try:
+        with transaction.atomic():
+            job = Job.objects.create(
+                action=action,
+                article=article,
+                max_attempts=getattr(settings, "JOB_MAX_ATTEMPTS", 5),
+            )
+        return job, True
+    except IntegrityError:
+        # Another request queued the same job between our check and insert.
+        return active.get(), False
+
+
+def enqueue_many(action, articles):
+    """
+    Queue `action` for each of `articles` in one INSERT. Articles that already
+    have a queued or running job for it keep that one (the unique constraint
+    on active jobs drops the duplicate rows).
+    """
+    max_attempts = getattr(settings, "JOB_MAX_ATTEMPTS", 5)
+    Job.objects.bulk_create(
+        [Job(action=action, article=article, max_attempts=max_attempts) for article in articles],
+        ignore_conflicts=True,
+    )
+
+
+def _expired(now):
+    return Q(status=Job.STATUS_RUNNING, locked_until__lt=now)
+
+
+def _claimable(now):
+    # An expired lock means the worker died mid-run; that counts as an attempt,
+    # so a job that keeps killing its worker is only handed out max_attempts times.
+    return Q(status=Job.STATUS_QUEUED, run_after__lte=now) | (_expired(now) & Q(attempts__lt=F('max_attempts')))
+
+
+def fail_abandoned(now=None):
+    """Mark jobs whose lock expired on their last attempt as failed. Returns how many there were."""
+    now = now or timezone.now()
+    failed = Job.objects.filter(_expired(now), attempts__gte=F('max_attempts')).update(
+        status=Job.STATUS_FAILED,
+        last_error='Worker lock expired on the last attempt.',
+        locked_by='',
+        locked_until=None,
+        updated_at=now,
+    )
+    if failed:
+        logger.warning(f"Marked {failed} abandoned jobs as failed")
+    return failed
+
+
+def claim(worker_id, visibility_timeout=None):
+    """
+    Lock the next runnable job for `worker_id`. The claim is a conditional
+    UPDATE, so concurrent workers can never both win the same job.
+    """
+    if visibility_timeout is None:
+        visibility_timeout = getattr(settings, "JOB_VISIBILITY_TIMEOUT", 300)
+    now = timezone.now()
+    fail_abandoned(now)
+    candidates = Job.objects.filter(_claimable(now)).order_by('run_after', 'id').values_list('id', flat=True)[:10]
+    for job_id in candidates:
+        claimed = Job.objects.filter(_claimable(now), pk=job_id).update(
+            status=Job.STATUS_RUNNING,
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=visibility_timeout),
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def extend_lock(job, visibility_timeout=None):
+    """
+    Push back the lock on a long-running job so it is not handed to another
+    worker while this one is still making progress. False if the lock was lost.
+    """
+    if visibility_timeout is None:
+        visibility_timeout = getattr(settings, "JOB_VISIBILITY_TIMEOUT", 300)
+    job.locked_until = timezone.now() + timedelta(seconds=visibility_timeout)
+    return bool(Job.objects.filter(pk=job.pk, locked_by=job.locked_by, status=Job.STATUS_RUNNING).update(
+        locked_until=job.locked_until, updated_at=timezone.now(),
+    ))
+
+
+def retry_delay(attempts):
+    base = getattr(settings, "JOB_RETRY_BACKOFF", 30)
+    delay = min(base * 2 ** (attempts - 1), getattr(settings, "JOB_RETRY_BACKOFF_MAX", 3600))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome. Failed jobs are retried with exponential backoff."""
+    now = timezone.now()
+    try:
+        result = HANDLERS[job.action](job)
+    except Exception as e:
+        logger.error(f"Job {job.pk} ({job.action}) failed on attempt {job.attempts}: {e}")
+        update = {'last_error': str(e), 'locked_by': '', 'locked_until': None, 'updated_at': now}
+        if job.attempts >= job.max_attempts:
+            update['status'] = Job.STATUS_FAILED
+        else:
+            update['status'] = Job.STATUS_QUEUED
+            update['run_after'] = now + timedelta(seconds=retry_delay(job.attempts))
+    else:
+        update = {
+            'status': Job.STATUS_DONE,
+            'result': result,
+            'last_error': '',
+            'locked_by': '',
+            'locked_until': None,
+            'updated_at': now,
+        }
+    # Only record the outcome if our lock is still current; if it expired the job
+    # has been handed to another worker and that worker owns the result.
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by, status=Job.STATUS_RUNNING).update(**update)
+    job.refresh_from_db()
+    return job
+
+
+def work_once(worker_id=None, visibility_timeout=None):
+    job = claim(worker_id or default_worker_id(), visibility_timeout)
+    if job is None:
+        return None
+    return run_job(job)
+
+
+@handler(Job.ACTION_AUDIO)
+def generate_audio_job(job):
+    from news.utils import audio
+    from news.utils.scraper import generate_audio_summary
+
+    article = job.article
+    if not article.summary:
+        article.summary = article.summary_for(3)
+        article.save()
+    if article.audio_file:
+        return {'audio_url': article.audio_file.url}
+    audio_url = generate_audio_summary(article.summary, article.id)
+    if not audio_url:
+        raise RuntimeError('Failed to generate audio summary.')
+    audio.attach(article, audio_url)
+    return {'audio_url': audio_url}
+
+
+@handler(Job.ACTION_SCRAPE)
+def scrape_job(job):
+    from news.utils.scraper import iter_articles
+
+    # Articles are counted as they are stored, not kept: the run page lists them
+    # from the database while the run is going. The heartbeat keeps the job's
+    # lock while the run is busy; losing it stops the run (scraper.LockLost).
+    new_articles = sum(1 for _ in iter_articles(job=job, heartbeat=lambda: extend_lock(job)))
+    run = job.scrape_runs.order_by('-id').first()
+    return {'new_articles': new_articles, 'run_id': run.pk if run else None}
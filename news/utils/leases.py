@@ -0,0 +1,74 @@
+import os
+import socket
+import uuid
+import hashlib
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from news.models import Lease
+
+
+def new_worker_id():
+    # Unique per run, not just per process, so two runs in one process never share leases.
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def feed_key(feed):
+    return f"feed:{feed.pk}"
+
+
+def leased_feeds(now=None):
+    """{feed pk: lease expiry} for every feed some scraper holds a live lease on."""
+    now = now or timezone.now()
+    rows = Lease.objects.filter(key__startswith="feed:", expires_at__gt=now).values_list("key", "expires_at")
+    return {int(key.split(":", 1)[1]): expires_at for key, expires_at in rows}
+
+
+def entry_key(url):
+    # Urls can be longer than the key column.
+    return "entry:" + hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def claim(keys, worker_id, ttl=None):
+    """
+    Claim as many of `keys` as possible for `worker_id` and return the set of
+    keys it now holds. Free keys are taken with an INSERT that ignores
+    conflicts; expired leases are taken over with a conditional UPDATE, so two
+    workers can never both win one key. Keys `worker_id` already holds are renewed.
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return set()
+    if ttl is None:
+        ttl = getattr(settings, "SCRAPER_LEASE_TTL", 600)
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=ttl)
+
+    Lease.objects.bulk_create(
+        [Lease(key=key, worker_id=worker_id, expires_at=expires_at) for key in keys],
+        ignore_conflicts=True,
+    )
+    Lease.objects.filter(key__in=keys, expires_at__lte=now).update(worker_id=worker_id, expires_at=expires_at)
+    Lease.objects.filter(key__in=keys, worker_id=worker_id).update(expires_at=expires_at)
+    return set(Lease.objects.filter(key__in=keys, worker_id=worker_id).values_list("key", flat=True))
+
+
+def renew(worker_id, ttl=None):
+    """Push back the expiry of every lease `worker_id` holds. Returns how many it still holds."""
+    if ttl is None:
+        ttl = getattr(settings, "SCRAPER_LEASE_TTL", 600)
+    return Lease.objects.filter(worker_id=worker_id).update(expires_at=timezone.now() + timedelta(seconds=ttl))
+
+
+def release(keys, worker_id):
+    keys = list(keys)
+    if keys:
+        Lease.objects.filter(key__in=keys, worker_id=worker_id).delete()
+
+
+def release_all(worker_id):
+    Lease.objects.filter(worker_id=worker_id).delete()
+
+
+def purge_expired():
+    return Lease.objects.filter(expires_at__lte=timezone.now()).delete()[0]
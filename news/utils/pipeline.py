@@ -0,0 +1,179 @@
+import queue
+import threading
+import time
+import logging
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# End-of-stream marker passed along the queues once a stage has drained.
+DONE = object()
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of `values`; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+class RunStats:
+    """
+    Timings, counters and errors for one run of a pipeline. Safe to feed from
+    any thread. Timings are kept per stage with a label (usually the url the
+    item was about) so the slowest items can be reported.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.counts = Counter()
+        self.errors = []
+        self.records = defaultdict(list)
+
+    def add(self, stage, seconds, label=None):
+        with self._lock:
+            self.timings[stage].append((seconds, label))
+
+    @contextmanager
+    def timed(self, stage, label=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started, label)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counts[name] += n
+
+    def error(self, stage, label, error):
+        with self._lock:
+            self.errors.append((stage, label, str(error) or repr(error)))
+
+    def record(self, group, **fields):
+        """Keep a row of free-form details, e.g. one per feed polled."""
+        with self._lock:
+            self.records[group].append(fields)
+
+    def stage_summary(self):
+        """{stage: {"count", "total", "p50", "p95", "max"}}, in seconds."""
+        with self._lock:
+            timings = {stage: [seconds for seconds, _ in rows] for stage, rows in self.timings.items()}
+        return {
+            stage: {
+                "count": len(values),
+                "total": sum(values),
+                "p50": percentile(values, 0.5),
+                "p95": percentile(values, 0.95),
+                "max": max(values),
+            }
+            for stage, values in timings.items() if values
+        }
+
+    def slowest(self, n=10, stages=None):
+        """
+        The `n` labels that took longest over all (or the given) stages, as
+        (label, total seconds, {stage: seconds}), slowest first.
+        """
+        by_label = defaultdict(Counter)
+        with self._lock:
+            for stage, items in self.timings.items():
+                if stages is None or stage in stages:
+                    for seconds, label in items:
+                        if label:
+                            by_label[label][stage] += seconds
+        rows = [(label, sum(per_stage.values()), dict(per_stage)) for label, per_stage in by_label.items()]
+        return sorted(rows, key=lambda row: row[1], reverse=True)[:n]
+
+
+class Sink:
+    """
+    Unbounded queue drained by the coordinating thread. Every item is tagged
+    with the name of the stage that produced it.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def output(self, stage_name):
+        return _SinkOutput(self.queue, stage_name)
+
+    def get(self, timeout=None):
+        """Next (stage_name, item); raises queue.Empty if nothing arrives within `timeout`."""
+        return self.queue.get(timeout=timeout)
+
+
+class _SinkOutput:
+    def __init__(self, target, stage_name):
+        self.target = target
+        self.stage_name = stage_name
+
+    def put(self, item):
+        self.target.put((self.stage_name, item))
+
+    def close(self):
+        self.target.put((self.stage_name, DONE))
+
+
+class Stage:
+    """
+    A pool of worker threads reading from a bounded input queue.
+
+    `put()` blocks while the queue is full, which is what gives each stage
+    backpressure against the one feeding it. Whatever `func` returns (unless it
+    is None) is handed to `output`, which is either the next Stage or a Sink.
+    With `stats` (a RunStats), every call of `func` is timed under the stage's
+    name and labelled with `label(item)`.
+    """
+
+    def __init__(self, name, func, output, workers=1, maxsize=0, stats=None, label=None):
+        self.name = name
+        self.func = func
+        self.output = output
+        self.stats = stats
+        self.label = label or (lambda item: None)
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(maxsize)
+        self._remaining = self.workers
+        self._lock = threading.Lock()
+
+    def start(self):
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True).start()
+        return self
+
+    def put(self, item):
+        self.queue.put(item)
+
+    def close(self):
+        self.queue.put(DONE)
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is DONE:
+                # Leave the marker in place for the sibling workers.
+                self.queue.put(DONE)
+                break
+            started = time.perf_counter()
+            try:
+                result = self.func(item)
+            except Exception as e:
+                logger.error(f"Stage {self.name} failed on {item!r}: {e}")
+                if self.stats is not None:
+                    self.stats.error(self.name, self.label(item), e)
+                continue
+            finally:
+                if self.stats is not None:
+                    self.stats.add(self.name, time.perf_counter() - started, self.label(item))
+            if result is not None:
+                self.output.put(result)
+
+        with self._lock:
+            self._remaining -= 1
+            last_worker = self._remaining == 0
+        if last_worker:
+            self.output.close()
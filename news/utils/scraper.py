@@ -1,107 +1,717 @@
-import re
+import queue
+import hashlib
 import feedparser
-from bs4 import BeautifulSoup
 from django.utils import timezone
-from news.models import Article, Category
+from news.models import Article, Category, Feed, Job, RawPage, ScrapeRun
+from news.utils import archive, audio, cpu_pool, dedup, http, jobs, leases, simhash, urlnorm, feeds as feed_schedule
+from news.utils.audio import generate_audio_summary
+from news.utils.pipeline import RunStats, Sink, Stage, DONE
+from news.utils.text import extract_article_text, rank_sentences, summarize_ranked
 from datetime import datetime
 import pytz
 import os
-from gtts import gTTS
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
 from django.conf import settings
-from newspaper import Article as NewsArticle
-from sumy.parsers.plaintext import PlaintextParser
-from sumy.nlp.tokenizers import Tokenizer
-from sumy.summarizers.text_rank import TextRankSummarizer
+from django.db import IntegrityError, transaction
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Worker threads per ingestion stage; override any of them with SCRAPER_STAGE_WORKERS.
+DEFAULT_STAGE_WORKERS = {
+    "poll": 3,
+    "fetch": 8,
+    "extract": os.cpu_count() or 2,
+    "summarize": os.cpu_count() or 2,
+    "audio": 4,
+}
+
+# gTTS talks to this host; it gets its own per-host cap like any feed or article host.
+TTS_HOST = "translate.google.com"
 
-def clean_html(raw_html):
-    return BeautifulSoup(raw_html, "html.parser").get_text()
 
 def get_full_article_text(url):
+    return cpu_pool.extract_article_text(url, download_article_html(url))
+
+def fetch_full_article_text(url):
+    """Like get_full_article_text, but raises http.FetchError saying why the page could not be fetched."""
+    return cpu_pool.extract_article_text(url, fetch_article_html(url))
+
+def fetch_article_html(url):
+    response = http.get(url)
+    if response.status_code >= 400:
+        raise http.FetchError(f"{url} answered {response.status_code}")
+    return http.text(response)
+
+def download_article_html(url, stats=None):
     try:
-        article = NewsArticle(url)
-        article.download()
-        article.parse()
-        return article.text
-    except:
-        return ""
+        return fetch_article_html(url)
+    except http.HostTimeout as e:
+        logger.warning(f"Slow host, skipping article: {e}")
+        error = e
+    except http.CircuitOpen as e:
+        logger.info(f"Skipping article: {e}")
+        error = e
+    except http.FetchError as e:
+        logger.warning(f"Could not fetch article: {e}")
+        error = e
+    if stats is not None:
+        stats.error("fetch", url, error)
+    return ""
+
+
+class HostLimiter:
+    """Caps how many requests may be in flight against a single host at once."""
+
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+    @contextmanager
+    def limit(self, url_or_host):
+        host = urlparse(url_or_host).netloc.lower() if "://" in url_or_host else url_or_host.lower()
+        semaphore = self._semaphore(host)
+        with semaphore:
+            yield
+
 
-def generate_summary(text, sentence_limit=3):
+def _entry_id(entry):
+    return entry.get("id") or entry.link
+
+def poll_feed(state):
+    """
+    Conditional GET of the feed behind `state` (a Feed). Runs on worker
+    threads, so it only reads `state`; the caller saves the returned "state"
+    fields. "entries" is None when the feed has not changed since the last
+    poll: a 304 or an identical body.
+    """
+    headers = {}
+    if state.etag:
+        headers["If-None-Match"] = state.etag
+    if state.last_modified:
+        headers["If-Modified-Since"] = state.last_modified
+
+    response = http.get(state.url, headers=headers)
+    polled = {"last_status": response.status_code, "last_polled_at": timezone.now()}
+    if response.status_code == 304:
+        return {"state": polled, "entries": None}
+    if response.status_code >= 400:
+        raise http.FetchError(f"{state.url} answered {response.status_code}")
+
+    polled["etag"] = response.headers.get("ETag", "")
+    polled["last_modified"] = response.headers.get("Last-Modified", "")
+    polled["body_hash"] = hashlib.sha256(response.content).hexdigest()
+    if polled["body_hash"] == state.body_hash:
+        return {"state": polled, "entries": None}
+
+    entries = feedparser.parse(response.content).entries
+    # Kept for the admin only. An unchanged first entry says nothing about the
+    # rest: feeds pin items, insert below the top or are not newest-first, so
+    # the entries go to the stored-url check instead.
+    polled["newest_entry_id"] = _entry_id(entries[0])[:500] if entries else ""
+    return {"state": polled, "entries": entries}
+
+def _poll(feed, limiter=None):
+    # Never raises: a failed poll is reported so the scheduler can back off.
+    started = time.monotonic()
     try:
-        parser = PlaintextParser.from_string(text, Tokenizer("english"))
-        summarizer = TextRankSummarizer()
-        summary = summarizer(parser.document, sentence_limit)
-        return " ".join(str(sentence) for sentence in summary)
+        if limiter is None:
+            polled = poll_feed(feed)
+        else:
+            with limiter.limit(feed.url):
+                polled = poll_feed(feed)
+    except Exception as e:
+        logger.error(f"Polling {feed.url} failed: {e}")
+        polled = {"state": {"last_polled_at": timezone.now()}, "entries": None, "error": str(e) or repr(e)}
+    polled["duration"] = time.monotonic() - started
+    return polled
+
+
+def _parse_published(entry):
+    try:
+        return datetime(*entry.published_parsed[:6], tzinfo=pytz.UTC)
     except:
-        return text[:300] + "..."
+        return timezone.now()
+
+def _build_article(source, entry, full_content, ranking, canonical=None, run=None):
+    # Setting content fills in reading_time, word_count and the excerpt; the body
+    # itself is written by save() or, after bulk_create, by persist_articles.
+    article = Article(
+        scrape_run=run,
+        title=entry.title,
+        author=entry.get("author", "Unknown"),
+        content=full_content,
+        url=urlnorm.canonicalize(entry.link),
+        source=source,
+        published_at=_parse_published(entry),
+        summary=summarize_ranked(full_content, ranking),
+        summary_ranking=ranking,
+        summary_ranking_hash=Article.hash_content(full_content),
+    )
+    if canonical is not None:
+        # Another copy of the same story: its summary stands for this one too.
+        article.canonical = canonical
+        article.summary = canonical.summary
+        article.summary_ranking = None
+        article.summary_ranking_hash = ""
+    return article
+
+def _create_article(source, entry, full_content, ranking, canonical=None, run=None):
+    article = _build_article(source, entry, full_content, ranking, canonical, run)
+    article.save()
+
+    category_name = source
+    category, _ = Category.objects.get_or_create(name=category_name)
+    article.category.add(category)
+    return article
+
+def _attach_audio(article, audio_url):
+    audio.attach(article, audio_url)
+
+
+class LockLost(Exception):
+    """Another worker took over what this run was holding; it stops rather than race it."""
+
+
+class Heartbeat:
+    """
+    Calls `beat` from the coordinating thread at most every `interval`
+    seconds while a run is going, whether or not it is storing anything.
+    `beat` returns False once what it renews has been lost, and the run stops
+    with LockLost.
+    """
+
+    def __init__(self, beat=None, interval=60):
+        self.beat = beat
+        self.interval = interval
+        self.last = time.monotonic()
+
+    def __call__(self):
+        if self.beat is None or time.monotonic() - self.last < self.interval:
+            return
+        self.last = time.monotonic()
+        if self.beat() is False:
+            raise LockLost("lost the lock on this run's work to another worker")
+
+    def wait(self, timeout=None):
+        """`timeout` cut short to when the next beat is due (None waits forever)."""
+        if self.beat is None:
+            return timeout
+        due = max(0.0, self.interval - (time.monotonic() - self.last))
+        return due if timeout is None else min(timeout, due)
+
+
+class CategoryCache:
+    """Categories by name, loaded once per scrape instead of a get_or_create per article."""
+
+    def __init__(self, names=()):
+        self._by_name = {}
+        for category in Category.objects.filter(name__in=list(names)).order_by('id'):
+            self._by_name.setdefault(category.name, category)
+
+    def get(self, name):
+        if name not in self._by_name:
+            self._by_name[name], _ = Category.objects.get_or_create(name=name)
+        return self._by_name[name]
+
+
+def existing_urls(links):
+    """The subset of `links` (canonical urls) already stored, in one IN query on url_hash."""
+    by_hash = {Article.hash_url(link): link for link in links}
+    if not by_hash:
+        return set()
+    return {by_hash[digest] for digest in Article.objects.filter(url_hash__in=by_hash).values_list("url_hash", flat=True)}
+
+
+def persist_articles(built, categories):
+    """
+    Insert `built`, a list of (source, unsaved Article), with one INSERT for
+    the articles and one for their category links. Returns the saved articles.
+
+    Safe to race with other scrapers: urls that are already stored are
+    skipped, and a row another worker inserts in the meantime is ignored by
+    the INSERT instead of failing the whole batch, and is not returned. The
+    articles should carry their scrape run, which tells our rows from theirs.
+    """
+    if not built:
+        return []
+    for _, article in built:
+        article.url_hash = Article.hash_url(article.url)  # save() is skipped.
+    stored = existing_urls(article.url for _, article in built)
+    built = [(source, article) for source, article in built if article.url not in stored]
+    if not built:
+        return []
+    Article.objects.bulk_create([article for _, article in built], ignore_conflicts=True)
+
+    # ignore_conflicts means no ids come back; fetch them (ids only, not the content).
+    # A row another scraper stored for the same url meanwhile has its run, not
+    # ours: it is left alone, as already stored.
+    rows = Article.objects.filter(url_hash__in=[article.url_hash for _, article in built]).values_list("url_hash", "pk", "scrape_run_id")
+    ids = {url_hash: (pk, run_id) for url_hash, pk, run_id in rows}
+    saved = []
+    for source, article in built:
+        pk, run_id = ids.get(article.url_hash, (None, None))
+        if pk is not None and run_id == article.scrape_run_id:
+            article.pk = pk
+            article._state.adding = False
+            saved.append((source, article))
+
+    # bulk_create skips save(), so the compressed bodies are written here.
+    Article.store_bodies(article for _, article in saved)
+
+    Link = Article.category.through
+    Link.objects.bulk_create([
+        Link(article_id=article.pk, category_id=categories.get(source).pk)
+        for source, article in saved
+    ], ignore_conflicts=True)
+    return [article for _, article in saved]
+
 
-def generate_audio_summary(text, article_id):
-    if not text:
-        logger.warning(f"No text for article {article_id}")
+def signature_for(entry, content):
+    # SimHash of title and body; None when there is too little text to compare.
+    if not content:
         return None
+    return cpu_pool.run(simhash.simhash, dedup.signature_text(entry.get("title"), content))
 
-    filename = f"summary_{article_id}.mp3"
-    audio_dir = os.path.join(settings.MEDIA_ROOT, 'news_audio')
-    os.makedirs(audio_dir, exist_ok=True)
-    filepath = os.path.join(audio_dir, filename)
 
+def archive_html(url, html):
+    """Keep the raw page so it can be re-extracted later; returns an unsaved RawPage or None."""
     try:
-        tts = gTTS(text=text, lang='en')
-        tts.save(filepath)
-        logger.info(f"Audio for article {article_id} saved at {filepath}")
-        return os.path.join(settings.MEDIA_URL, 'news_audio', filename)
+        location = archive.store(html)
     except Exception as e:
-        logger.error(f"Audio generation failed for article {article_id}: {e}")
+        logger.error(f"Could not archive {url}: {e}")
         return None
+    return RawPage(url=url, **location) if location else None
 
-RSS_FEEDS = {
-    "BBC": "http://feeds.bbci.co.uk/news/rss.xml",
-    "CNN": "http://rss.cnn.com/rss/edition.rss",
-    "Reuters": "http://feeds.reuters.com/reuters/topNews"
-}
+def save_raw_pages(pages):
+    # Refetched urls point at their newest copy.
+    pages = [page for page in pages if page is not None]
+    if pages:
+        RawPage.objects.bulk_create(
+            pages,
+            update_conflicts=True,
+            unique_fields=["url"],
+            update_fields=["segment", "offset", "length", "codec", "size", "fetched_at"],
+        )
 
-def fetch_articles():
-    new_articles = []
-    for source, url in RSS_FEEDS.items():
-        feed = feedparser.parse(url)
-        for entry in feed.entries:
-            if Article.objects.filter(url=entry.link).exists():
-                continue
 
-            title = entry.title
-            author = entry.get("author", "Unknown")
-            published = entry.get("published", timezone.now().isoformat())
+def fetch_articles(feeds=None, concurrent=None, worker_id=None, stats=None):
+    """iter_articles() collected into a list."""
+    return list(iter_articles(feeds, concurrent, worker_id, stats))
+
+def iter_articles(feeds=None, concurrent=None, worker_id=None, stats=None, job=None, heartbeat=None):
+    """
+    Poll `feeds` (all active Feed rows by default) and ingest their new
+    entries, yielding each article as soon as it is stored.
+
+    Feeds and entries are claimed with leases first, so any number of
+    scrapers can run against one database: each feed is polled, and each
+    entry downloaded and summarized, by only one of them.
+
+    Entries whose text is a near-duplicate (news.utils.dedup) of an article
+    from the last DUPLICATE_WINDOW_HOURS are stored as duplicates of it and
+    share its summary and audio instead of being summarized and voiced again.
+
+    Every call that claims a feed is recorded as a ScrapeRun (one that
+    claims none stores nothing and yields nothing) with per-stage timings, per-feed
+    results, counts and errors; pass a pipeline.RunStats as `stats` to also
+    get the raw numbers. The run's totals are kept current while it goes and
+    its articles point at it, so it can be followed before it finishes.
+    Consume the generator to the end: the run, and its leases, are only
+    wrapped up then.
+
+    The run's leases are renewed every SCRAPER_HEARTBEAT_INTERVAL seconds
+    (at least three times per SCRAPER_LEASE_TTL) while it goes, and
+    `heartbeat` is called with them, e.g. to extend the lock of the job the
+    run is for; if it returns False the run stops with LockLost.
+    """
+    if feeds is None:
+        feeds = Feed.objects.filter(active=True)
+    worker_id = worker_id or leases.new_worker_id()
+    leases.purge_expired()
+    feeds = list(feeds)
+    claimed = leases.claim([leases.feed_key(feed) for feed in feeds], worker_id)
+    feeds = [feed for feed in feeds if leases.feed_key(feed) in claimed]
+    if not feeds:
+        # Nothing to poll, or other scrapers hold every feed: no run to record.
+        return
+    if concurrent is None:
+        concurrent = getattr(settings, "SCRAPER_CONCURRENT", True)
+    if stats is None:
+        stats = RunStats()
+
+    def renew():
+        leases.renew(worker_id)
+        return heartbeat() if heartbeat is not None else True
+
+    beat = Heartbeat(renew, min(
+        getattr(settings, "SCRAPER_HEARTBEAT_INTERVAL", 60),
+        getattr(settings, "SCRAPER_LEASE_TTL", 600) / 3,
+    ))
+    run = ScrapeRun.objects.create(worker_id=worker_id, job=job, mode="pipeline" if concurrent else "sequential")
+    error = None
+    try:
+        if concurrent:
+            yield from _fetch_articles_concurrent(feeds, worker_id, stats, run, beat)
+        else:
+            yield from _fetch_articles_sequential(feeds, worker_id, stats, run, beat)
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        leases.release_all(worker_id)
+        run.finish(stats, error)
+
+def _count_poll(stats, feed, polled):
+    stats.count("feeds_polled")
+    if polled.get("error"):
+        stats.count("feeds_failed")
+        stats.error("poll", feed.url, polled["error"])
+    elif polled["entries"] is None:
+        stats.count("feeds_unchanged")
+
+def _record_feed(stats, feed, polled, new_items):
+    stats.record(
+        "feeds",
+        name=feed.name,
+        url=feed.url,
+        seconds=polled["duration"],
+        status=polled["state"].get("last_status"),
+        entries=len(polled["entries"] or []),
+        new_items=new_items,
+        error=polled.get("error", ""),
+    )
+
+def _fetch_articles_sequential(feeds, worker_id, stats, run, beat):
+    index = dedup.DuplicateIndex.load()
+    canonicals = dedup.CanonicalCache()
+    for feed in feeds:
+        beat()
+        with stats.timed("poll", feed.url):
+            polled = _poll(feed)
+        _count_poll(stats, feed, polled)
+        new_items = 0
+        for entry in polled["entries"] or []:
+            beat()
+            link = urlnorm.canonicalize(entry.link)
+            with stats.timed("db", link):
+                if Article.objects.filter(url_hash=Article.hash_url(link)).exists():
+                    stats.count("entries_known")
+                    continue
+                if not leases.claim([leases.entry_key(link)], worker_id):
+                    stats.count("entries_claimed_elsewhere")
+                    continue
+
+            with stats.timed("fetch", link):
+                html = download_article_html(entry.link, stats)
+                raw = archive_html(link, html)
+            with stats.timed("extract", link):
+                full_content = cpu_pool.run(extract_article_text, link, html)
+                signature = signature_for(entry, full_content)
+            match = index.match(signature) if signature is not None else None
+            canonical = canonicals.get(match) if match is not None else None
+            if canonical:
+                stats.count("duplicates")
+                ranking = None
+            else:
+                with stats.timed("summarize", link):
+                    ranking = rank_sentences(full_content)
             try:
-                published_at = datetime(*entry.published_parsed[:6], tzinfo=pytz.UTC)
-            except:
-                published_at = timezone.now()
-
-            full_content = get_full_article_text(entry.link)
-            summary = generate_summary(full_content)
-
-            article = Article.objects.create(
-                title=title,
-                author=author,
-                content=full_content,
-                url=entry.link,
-                source=source,
-                published_at=published_at,
-                summary=summary,
-            )
-
-            category_name = source
-            category, _ = Category.objects.get_or_create(name=category_name)
-            article.category.add(category)
-
-            # ✅ Generate audio
-            audio_url = generate_audio_summary(summary, article.id)
-            if audio_url:
-                relative_path = os.path.relpath(audio_url, settings.MEDIA_URL)
-                article.audio_file.name = relative_path
-                article.save()
-
-            new_articles.append(article)
-    return new_articles
\ No newline at end of file
+                with stats.timed("db", link), transaction.atomic():
+                    save_raw_pages([raw])
+                    article = _create_article(feed.name, entry, full_content, ranking, canonical, run)
+            except IntegrityError:
+                continue  # Stored by another scraper meanwhile.
+
+            if canonical:
+                _attach_audio(article, canonical.audio_file.name)
+            else:
+                # ✅ Generate audio
+                with stats.timed("audio", link):
+                    audio_url = generate_audio_summary(article.summary, article.id)
+                with stats.timed("db", link):
+                    _attach_audio(article, audio_url)
+                    if not audio_url:
+                        # Voiced later by the job queue; attaching it then gives the duplicates their audio too.
+                        jobs.enqueue_many(Job.ACTION_AUDIO, [article])
+                    if signature is not None:
+                        dedup.save_signatures([(article, signature)])
+                        index.add(signature, article.pk)
+                        canonicals.remember(article)
+
+            new_items += 1
+            stats.count("articles")
+            yield article
+        feed_schedule.record_poll(feed, polled, new_items)
+        _record_feed(stats, feed, polled, new_items)
+        run.update_progress(stats)
+
+def _fetch_articles_concurrent(feeds, worker_id, stats, run, beat):
+    """
+    Staged ingestion: feed poll -> body fetch -> extraction -> duplicate check ->
+    summarization -> persistence -> audio synthesis. Each stage has its own worker pool and a
+    bounded input queue, so the network-bound stages and TextRank can be sized
+    independently and a slow stage pushes back on the ones feeding it.
+
+    Persistence runs on the calling thread, which owns the only database
+    connection. Each polled feed is checked for known links in one query, and
+    summarized articles and finished audio are written in batches: when
+    SCRAPER_BATCH_SIZE items are waiting, or nothing new has arrived for
+    SCRAPER_BATCH_DELAY seconds.
+
+    The duplicate check also runs on the calling thread, between extraction
+    and summarization. A copy of an article stored earlier is built from that
+    article's summary straight away; a copy of one still being summarized
+    waits for it to be saved. Either way it gets the canonical's audio once
+    that exists.
+
+    A feed's poll is recorded (feeds.record_poll) once all of its new
+    entries have been written, so its conditional GET state never claims
+    entries the database does not have yet.
+
+    Articles are yielded after each batch is written, and the run's totals
+    updated with it. The wait for results is cut short whenever the heartbeat
+    is due, so a run stuck on slow hosts still beats.
+    """
+    workers = {**DEFAULT_STAGE_WORKERS, **getattr(settings, "SCRAPER_STAGE_WORKERS", {})}
+    queue_size = getattr(settings, "SCRAPER_QUEUE_SIZE", 32)
+    limiter = HostLimiter(getattr(settings, "SCRAPER_PER_HOST_LIMIT", 2))
+    batch_size = getattr(settings, "SCRAPER_BATCH_SIZE", 50)
+    batch_delay = getattr(settings, "SCRAPER_BATCH_DELAY", 1.0)
+
+    def poll(feed):
+        return feed, _poll(feed, limiter)
+
+    def fetch(item):
+        with limiter.limit(item["link"]):
+            item["html"] = download_article_html(item["entry"].link, stats)
+        item["raw"] = archive_html(item["link"], item["html"])
+        return item
+
+    # Extraction and TextRank hand off to the process pool; these threads only wait.
+    def extract(item):
+        item["content"] = cpu_pool.run(extract_article_text, item["link"], item.pop("html"))
+        item["signature"] = signature_for(item["entry"], item["content"])
+        return item
+
+    def summarize(item):
+        item["ranking"] = cpu_pool.run(rank_sentences, item["content"])
+        return item
+
+    def synthesize(job):
+        article, summary = job
+        with limiter.limit(TTS_HOST):
+            return article, generate_audio_summary(summary, article.id)
+
+    def stage(name, func, output, label):
+        return Stage(name, func, output, workers=workers[name], maxsize=queue_size, stats=stats, label=label).start()
+
+    def link(item):
+        return item["link"]
+
+    sink = Sink()
+    audio_stage = stage("audio", synthesize, sink.output("audio"), lambda job: job[0].url)
+    summarize_stage = stage("summarize", summarize, sink.output("summarize"), link)
+    extract_stage = stage("extract", extract, sink.output("extract"), link)
+    fetch_stage = stage("fetch", fetch, extract_stage, link)
+    poll_stage = stage("poll", poll, sink.output("poll"), lambda feed: feed.url)
+
+    for feed in feeds:
+        poll_stage.put(feed)
+    poll_stage.close()
+
+    categories = CategoryCache(feed.name for feed in feeds)
+    index = dedup.DuplicateIndex.load()
+    canonicals = dedup.CanonicalCache()
+    saved = []
+    pending_articles = []
+    pending_audio = []
+    pending_raw = []
+    # Signed items between summarization and persistence, by link; duplicates
+    # found meanwhile wait on them in item["duplicates"].
+    in_flight = {}
+    signed_items = []
+    canonical_audio = {}
+    audio_followers = {}
+    # Polled feeds whose new entries are not all written yet, by feed pk, as
+    # [feed, polled, new_items, links still on their way]; and each such link's feed.
+    unsettled_feeds = {}
+    feed_of_link = {}
+
+    def build(item, ranking=None, canonical=None):
+        return item["source"], _build_article(item["source"], item["entry"], item["content"], ranking, canonical, run)
+
+    def release_duplicates(item):
+        # Their canonical never made it to the database: each copy is summarized on its own.
+        for duplicate in item.pop("duplicates", []):
+            pending_articles.append(build(duplicate, cpu_pool.run(rank_sentences, duplicate["content"])))
+
+    def settle(batch):
+        signed = []
+        for _, article in batch:
+            item = in_flight.pop(article.url, None)
+            if item is None:
+                continue
+            if article.pk is not None:
+                item["article"] = article
+                canonicals.remember(article)
+                signed.append((article, item["signature"]))
+                for duplicate in item.pop("duplicates", []):
+                    pending_articles.append(build(duplicate, canonical=article))
+            else:
+                item["failed"] = True  # Stored by another scraper meanwhile.
+                release_duplicates(item)
+        dedup.save_signatures(signed)
+
+    def record_stored(batch):
+        for _, article in batch:
+            feed_pk = feed_of_link.pop(article.url, None)
+            if feed_pk is None:
+                continue
+            feed, polled, new_items, waiting = unsettled_feeds[feed_pk]
+            waiting.discard(article.url)
+            if not waiting:
+                del unsettled_feeds[feed_pk]
+                feed_schedule.record_poll(feed, polled, new_items)
+
+    def flush():
+        with stats.timed("db"):
+            _flush()
+
+    def _flush():
+        save_raw_pages(pending_raw)
+        pending_raw.clear()
+        # Saving a canonical releases its waiting duplicates into pending_articles.
+        while pending_articles:
+            batch = pending_articles[:]
+            pending_articles.clear()
+            articles = persist_articles(batch, categories)
+            settle(batch)
+            record_stored(batch)
+            for article in articles:
+                if article.canonical_id is None:
+                    audio_stage.put((article, article.summary))
+                elif article.canonical_id in canonical_audio:
+                    pending_audio.append((article, canonical_audio[article.canonical_id]))
+                else:
+                    audio_followers.setdefault(article.canonical_id, []).append(article)
+            stats.count("articles", len(articles))
+            saved.extend(articles)
+        audio.attach_many(pending_audio)
+        jobs.enqueue_many(Job.ACTION_AUDIO, [
+            article for article, audio_url in pending_audio if not audio_url and article.canonical_id is None
+        ])
+        pending_audio.clear()
+        run.update_progress(stats)
+
+    def check_duplicate(item):
+        match = index.match(item["signature"]) if item["signature"] is not None else None
+        if isinstance(match, dict) and match.get("article") is not None:
+            match = match["article"].pk
+        if match is None or isinstance(match, dict) and match.get("failed"):
+            if item["signature"] is not None:
+                index.add(item["signature"], item)
+                signed_items.append(item)
+            summarize_stage.put(item)
+        elif isinstance(match, dict):
+            stats.count("duplicates")
+            match.setdefault("duplicates", []).append(item)
+            pending_raw.append(item["raw"])
+        else:
+            canonical = canonicals.get(match)
+            if canonical is None:
+                summarize_stage.put(item)
+                return
+            stats.count("duplicates")
+            if canonical.audio_file:
+                canonical_audio.setdefault(canonical.pk, canonical.audio_file.name)
+            pending_articles.append(build(item, canonical=canonical))
+            pending_raw.append(item["raw"])
+
+    seen_links = set()
+    open_stages = {"poll", "extract", "summarize", "audio"}
+    while open_stages:
+        # Hand over what the last flush stored before waiting for more.
+        yield from saved
+        saved.clear()
+        beat()
+        try:
+            stage_name, result = sink.get(timeout=beat.wait(batch_delay if pending_articles or pending_audio else None))
+        except queue.Empty:
+            # Nothing new for a while: write what we have so articles don't wait on a full batch.
+            flush()
+            continue
+
+        if result is DONE:
+            open_stages.discard(stage_name)
+            if stage_name == "poll":
+                fetch_stage.close()
+            elif stage_name == "extract":
+                summarize_stage.close()
+            elif stage_name == "summarize":
+                flush()
+                for item in signed_items:
+                    release_duplicates(item)
+                flush()
+                audio_stage.close()
+            elif stage_name == "audio":
+                flush()
+            continue
+
+        if stage_name == "poll":
+            feed, polled = result
+            _count_poll(stats, feed, polled)
+            links = {}
+            for entry in polled["entries"] or []:
+                links.setdefault(urlnorm.canonicalize(entry.link), entry)
+            with stats.timed("db", feed.url):
+                stored = existing_urls(set(links) - seen_links) if links else set()
+                fresh = {link: entry for link, entry in links.items() if link not in seen_links and link not in stored}
+                seen_links.update(fresh)
+                # Entries another scraper already claimed are theirs to download.
+                claimed = leases.claim([leases.entry_key(link) for link in fresh], worker_id)
+            stats.count("entries_known", len(stored))
+            stats.count("entries_claimed_elsewhere", len(fresh) - len(claimed))
+            mine = [link for link in fresh if leases.entry_key(link) in claimed]
+            new_items = len(mine)
+            if mine:
+                unsettled_feeds[feed.pk] = [feed, polled, new_items, set(mine)]
+                feed_of_link.update((link, feed.pk) for link in mine)
+            else:
+                with stats.timed("db", feed.url):
+                    feed_schedule.record_poll(feed, polled, new_items)
+            for link in mine:
+                fetch_stage.put({"source": feed.name, "entry": fresh[link], "link": link})
+            _record_feed(stats, feed, polled, new_items)
+        elif stage_name == "extract":
+            check_duplicate(result)
+        elif stage_name == "summarize":
+            source, article = build(result, result["ranking"])
+            pending_articles.append((source, article))
+            pending_raw.append(result["raw"])
+            if result["signature"] is not None:
+                in_flight[article.url] = result
+        elif stage_name == "audio":
+            pending_audio.append(result)
+            article, audio_url = result
+            canonical_audio[article.pk] = audio_url
+            pending_audio.extend((follower, audio_url) for follower in audio_followers.pop(article.pk, []))
+
+        if len(pending_articles) >= batch_size or len(pending_audio) >= batch_size:
+            flush()
+    # Entries a stage failed on (see the run's errors) were never written; their
+    # feeds keep the old conditional GET state so the next poll offers them again.
+    with stats.timed("db"):
+        for feed, polled, new_items, _ in unsettled_feeds.values():
+            feed_schedule.record_poll(feed, polled, new_items, stored=False)
+    yield from saved
@@ -0,0 +1,125 @@
+# Full-text article search. On SQLite an FTS5 index (news_article_fts, created
+# by migrations 0025 and 0026) answers the query with BM25 ranking and highlighted
+# snippets. Triggers on news_article keep titles and summaries in step; the
+# text is compressed in news_articlebody, so Article.store_bodies() indexes it
+# through index_content(). Elsewhere, or if the SQLite build has no FTS5, a
+# case-insensitive scan over titles, summaries and excerpts stands in; it cannot
+# see into the compressed bodies, so words found only deeper in an article's
+# text are not matched there.
+import re
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import FloatField, Q, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = "news_article_fts"
+# BM25 weight per column (title, summary, content): a match in the title counts for more than one deep in the body.
+COLUMN_WEIGHTS = (10.0, 4.0, 1.0)
+SNIPPET_TOKENS = 16
+
+# Snippet match markers; replaced with <mark> once the text around them is escaped.
+_OPEN, _CLOSE = "\x02", "\x03"
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+_available = {}
+
+# Created by migrations 0025 and 0026, which hold the DDL. A migration that
+# rebuilds news_article drops them with the old table and has to create them again.
+TRIGGERS = tuple(f"{FTS_TABLE}_{suffix}" for suffix in ("insert", "delete", "update"))
+
+
+def _has_index(using):
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return False
+    key = (using, connection.settings_dict["NAME"])
+    if key not in _available:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _available[key] = cursor.fetchone() is not None
+    return _available[key]
+
+
+def index_content(rows, using=DEFAULT_DB_ALIAS):
+    """Index the text of articles, given as (id, text) pairs. Kept up whether or not search uses it."""
+    if not _has_index(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(f"UPDATE {FTS_TABLE} SET content = %s WHERE rowid = %s", [(text, pk) for pk, text in rows])
+
+
+def fts_enabled(using=DEFAULT_DB_ALIAS):
+    if not getattr(settings, "ARTICLE_SEARCH_FTS", True):
+        return False
+    return _has_index(using)
+
+
+def fts_query(text):
+    """
+    User input as an FTS5 query: every word must appear, the last one as a
+    prefix so results follow the user's typing. Each term is quoted, so FTS5
+    operators in the input are searched for as words rather than obeyed.
+    """
+    terms = _TERM.findall(text or "")
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _fallback(queryset, text):
+    # Titles, summaries and the first EXCERPT_LENGTH characters of the text only:
+    # the full text is compressed, and decompressing every body per query is the
+    # table scan the index exists to avoid.
+    terms = _TERM.findall(text or "") or [text]
+    for term in terms:
+        queryset = queryset.filter(
+            Q(title__icontains=term) | Q(summary__icontains=term) | Q(excerpt__icontains=term)
+        )
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()), search_snippet=Value(None, output_field=TextField()))
+
+
+def search(queryset, text):
+    """
+    Articles of `queryset` matching `text`, with `search_rank` (lower is
+    better, as BM25 scores are negative in FTS5) and `search_snippet` (the best
+    matching passage, see highlight()). Ordering is left to the caller.
+    """
+    if not fts_enabled(queryset.db):
+        return _fallback(queryset, text)
+    match = fts_query(text)
+    if match is None:
+        return queryset.none()
+    table = queryset.model._meta.db_table
+    weights = ", ".join(str(weight) for weight in COLUMN_WEIGHTS)
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f"{FTS_TABLE}.rowid = {table}.id", f"{FTS_TABLE} MATCH %s"],
+        params=[match],
+        select={
+            "search_rank": f"bm25({FTS_TABLE}, {weights})",
+            "search_snippet": f"snippet({FTS_TABLE}, -1, %s, %s, '…', {SNIPPET_TOKENS})",
+        },
+        select_params=[_OPEN, _CLOSE],
+    )
+
+
+def matching(text, using=DEFAULT_DB_ALIAS):
+    """
+    A subquery of the ids of articles matching `text`, for `pk__in=` filters
+    that are combined with other conditions (the admin search box).
+    """
+    if not fts_enabled(using):
+        from news.models import Article
+        return _fallback(Article.objects.using(using), text).values("pk")
+    return RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [fts_query(text) or '""'])
+
+
+def highlight(snippet):
+    """A search_snippet as safe HTML, with the matched terms in <mark>."""
+    if not snippet:
+        return ""
+    return mark_safe(escape(snippet).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>"))
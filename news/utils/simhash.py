@@ -0,0 +1,54 @@
+# 64-bit SimHash over word shingles, for spotting the same story published by
+# several sources. Near-identical texts get signatures a few bits apart.
+import hashlib
+import re
+
+BITS = 64
+# Eight 8-bit bands: any two signatures up to 7 bits apart share a band.
+BANDS = 8
+BAND_BITS = BITS // BANDS
+SHINGLE_SIZE = 3
+# Below this many words the signature says more about boilerplate than about the story.
+MIN_WORDS = 50
+
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def _hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shingles(words, size=SHINGLE_SIZE):
+    return {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 0))}
+
+
+def simhash(text, min_words=MIN_WORDS):
+    """Unsigned 64-bit signature of `text`, or None if it is too short to compare."""
+    words = _WORD.findall((text or "").lower())
+    if len(words) < min_words:
+        return None
+    weights = [0] * BITS
+    for gram in shingles(words):
+        value = _hash(gram)
+        for bit in range(BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(BITS) if weights[bit] > 0)
+
+
+def bands(signature):
+    """The signature cut into BANDS pieces; two signatures within BANDS - 1 bits share at least one."""
+    mask = (1 << BAND_BITS) - 1
+    return [signature >> (band * BAND_BITS) & mask for band in range(BANDS)]
+
+
+def distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def to_signed(signature):
+    # Stored in a signed 64-bit column.
+    return signature - (1 << BITS) if signature >= 1 << (BITS - 1) else signature
+
+
+def to_unsigned(value):
+    return value + (1 << BITS) if value < 0 else value
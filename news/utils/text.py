@@ -0,0 +1,116 @@
+# CPU-bound text helpers. This module must not import Django models: it is
+# imported on its own by the process-pool workers in news.utils.cpu_pool.
+import re
+from sumy.parsers.plaintext import PlaintextParser
+from sumy.nlp.tokenizers import Tokenizer
+from sumy.nlp.stemmers import Stemmer
+from sumy.summarizers.text_rank import TextRankSummarizer
+
+from news.utils import extraction
+
+try:
+    from news.utils import textrank
+except ImportError:  # NumPy is not installed; only the sumy engine is available.
+    textrank = None
+
+LANGUAGE = "english"
+ENGINES = ("numpy", "sumy")
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+_WORD = re.compile(r"[^\W_]+(?:['’][^\W_]+)*")
+
+
+class RegexTokenizer:
+    """
+    Stand-in for sumy's Tokenizer when NLTK's punkt data is not installed.
+    Exposes the same `language`, `to_sentences` and `to_words` interface, so
+    sumy's PlaintextParser accepts it too.
+    """
+
+    language = "english"
+
+    def to_sentences(self, paragraph):
+        return tuple(s.strip() for s in _SENTENCE_END.split(paragraph) if s.strip())
+
+    def to_words(self, sentence):
+        return tuple(_WORD.findall(sentence))
+
+
+# Built once per process (see warm_up) instead of once per call.
+_engine = "numpy"
+_extractors = extraction.DEFAULT_CHAIN
+_tokenizer = None
+_summarizer = None
+
+
+def warm_up(engine=None, extractors=None):
+    """Load the tokenizer and stemmer up front; used as the pool worker initializer."""
+    global _engine, _extractors, _tokenizer, _summarizer
+    if engine in ENGINES:
+        _engine = engine
+    if extractors:
+        _extractors = tuple(extractors)
+    if _summarizer is None:
+        _summarizer = TextRankSummarizer(Stemmer(LANGUAGE))
+    if _tokenizer is None:
+        try:
+            _tokenizer = Tokenizer(LANGUAGE)
+        except LookupError:
+            # NLTK punkt data is not installed.
+            _tokenizer = RegexTokenizer()
+
+
+def clean_html(raw_html):
+    return extraction.html_to_text(raw_html)
+
+
+def extract_article_text(url, html):
+    """Article body from `html`: the fast extractor, then newspaper if its result fails the quality checks."""
+    return extraction.extract(url, html, _extractors)
+
+
+def _numpy_ratings(sentences):
+    words = [[_summarizer.stem_word(word) for word in sentence.words] for sentence in sentences]
+    return list(textrank.rate_sentences(words))
+
+
+def rank_sentences(text, engine=None):
+    """
+    Rank every sentence of `text` once, so summaries of any length are a slice.
+    Returns {"sentences": [...], "order": [...]} with sentences in document
+    order and `order` listing their indexes best first, or None on failure.
+    """
+    try:
+        warm_up()
+        engine = engine or _engine
+        document = PlaintextParser.from_string(text, _tokenizer).document
+        sentences = document.sentences
+        ratings = None
+        if engine == "numpy" and textrank is not None:
+            try:
+                ratings = _numpy_ratings(sentences)
+            except Exception:
+                ratings = None
+        if ratings is None:
+            rated = _summarizer.rate_sentences(document) if sentences else {}
+            ratings = [rated[sentence] for sentence in sentences]
+        # sorted() is stable, so ties keep document order just like sumy.
+        order = sorted(range(len(sentences)), key=lambda i: -ratings[i])
+        return {"sentences": [str(sentence) for sentence in sentences], "order": order}
+    except:
+        return None
+
+
+def summary_from_ranking(ranking, sentence_limit=3):
+    best = sorted(ranking["order"][:sentence_limit])
+    return " ".join(ranking["sentences"][i] for i in best)
+
+
+def summarize_ranked(text, ranking, sentence_limit=3):
+    if ranking is None:
+        return text[:300] + "..."
+    return summary_from_ranking(ranking, sentence_limit)
+
+
+def generate_summary(text, sentence_limit=3, engine=None):
+    return summarize_ranked(text, rank_sentences(text, engine), sentence_limit)
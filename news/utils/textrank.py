@@ -0,0 +1,62 @@
+# Vectorized TextRank. Scores sentences exactly like sumy's TextRankSummarizer
+# (shared-word count over the sum of log lengths, damping 0.85, power method),
+# but builds the whole similarity graph with one sparse matrix product instead
+# of comparing every sentence pair in Python.
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+DAMPING = 0.85
+EPSILON = 1e-4
+# Same guard sumy uses when normalising rows.
+_ZERO_DIVISION_PREVENTION = 1e-7
+
+
+def _term_matrix(sentences_words):
+    vocabulary = {}
+    rows, cols = [], []
+    for row, words in enumerate(sentences_words):
+        for word in words:
+            rows.append(row)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+    shape = (len(sentences_words), max(len(vocabulary), 1))
+    data = np.ones(len(rows))
+    if sparse is not None:
+        # Duplicate (row, col) pairs are summed, which gives per-sentence term counts.
+        return sparse.csr_matrix((data, (rows, cols)), shape=shape)
+    matrix = np.zeros(shape)
+    np.add.at(matrix, (rows, cols), data)
+    return matrix
+
+
+def rate_sentences(sentences_words):
+    """Return a TextRank score per sentence, given each sentence as a list of normalized words."""
+    count = len(sentences_words)
+    if count == 0:
+        return np.zeros(0)
+
+    terms = _term_matrix(sentences_words)
+    shared = terms @ terms.T
+    shared = shared.toarray() if hasattr(shared, "toarray") else np.asarray(shared)
+
+    lengths = np.array([len(words) for words in sentences_words], dtype=float)
+    with np.errstate(divide="ignore"):
+        log_lengths = np.where(lengths > 0, np.log(lengths), 0.0)
+    norm = log_lengths[:, None] + log_lengths[None, :]
+    # Two one-word sentences have a zero norm; sumy uses the raw overlap then.
+    weights = shared / np.where(np.isclose(norm, 0.0), 1.0, norm)
+    weights /= weights.sum(axis=1)[:, None] + _ZERO_DIVISION_PREVENTION
+
+    # Power iteration on (1 - d) / n + d * W without materialising the dense teleport matrix.
+    transposed = weights.T
+    p_vector = np.full(count, 1.0 / count)
+    delta = 1.0
+    while delta > EPSILON:
+        next_p = (1.0 - DAMPING) / count * p_vector.sum() + DAMPING * (transposed @ p_vector)
+        delta = np.linalg.norm(next_p - p_vector)
+        p_vector = next_p
+    return p_vector
+
@@ -0,0 +1,57 @@
+import io
+import math
+import time
+from django.conf import settings
+from gtts import gTTS
+
+
+class TTSBackend:
+    """Turns a piece of text into MP3 bytes. Subclasses set `name`, which is part of every cache key."""
+
+    name = None
+
+    def synthesize(self, text, language):
+        raise NotImplementedError
+
+
+class GTTSBackend(TTSBackend):
+    name = "gtts"
+
+    def synthesize(self, text, language):
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=language).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz): a 4-byte header and a zeroed body.
+SILENT_FRAME = b"\xff\xfb\x90\x64" + bytes(413)
+
+
+class FakeTTSBackend(TTSBackend):
+    """
+    Offline stand-in for benchmarks and tests. Sleeps like gTTS would: one
+    round trip of `latency` per 100-character piece (gTTS sends those one after
+    another) plus a per-character cost. Returns valid, silent MP3 frames whose
+    count grows with the text length.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency=None, per_char=None):
+        self.latency = getattr(settings, "TTS_FAKE_LATENCY", 0.0) if latency is None else latency
+        self.per_char = getattr(settings, "TTS_FAKE_PER_CHAR", 0.0) if per_char is None else per_char
+
+    def synthesize(self, text, language):
+        round_trips = max(1, math.ceil(len(text) / 100))
+        time.sleep(self.latency * round_trips + self.per_char * len(text))
+        return SILENT_FRAME * max(1, len(text) // 10)
+
+
+BACKENDS = {
+    GTTSBackend.name: GTTSBackend,
+    FakeTTSBackend.name: FakeTTSBackend,
+}
+
+
+def get_backend(name=None):
+    return BACKENDS[name or getattr(settings, "TTS_BACKEND", GTTSBackend.name)]()
@@ -0,0 +1,56 @@
+# Canonical form of article urls, so the same story linked with tracking
+# parameters, a different host case or a trailing slash is stored once.
+import hashlib
+import posixpath
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only say where a click came from.
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ocid", "cmpid", "cmp", "ito", "_ga", "ref_src", "ref_url", "smid", "smtyp",
+}
+TRACKING_PREFIXES = ("utm_", "ns_", "at_")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _is_tracking(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize(url):
+    """
+    Lowercase scheme and host, drop the default port, the fragment and
+    tracking parameters, sort what is left of the query, and resolve the path
+    (dot segments, repeated and trailing slashes). Anything that is not an
+    http(s) url comes back stripped but otherwise untouched.
+    """
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = parts.hostname.rstrip(".")
+    if port and port != _DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    if parts.username or parts.password:
+        host = f"{parts.netloc.rsplit('@', 1)[0]}@{host}"
+
+    path = posixpath.normpath(parts.path) if parts.path else "/"
+    if path.startswith("//"):
+        path = "/" + path.lstrip("/")  # normpath keeps a leading double slash.
+    if path == ".":
+        path = "/"
+
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(name))
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def url_hash(url):
+    """Fixed-width key for the canonical form of `url`: 32 hex characters."""
+    return hashlib.blake2b(canonicalize(url).encode("utf-8"), digest_size=16).hexdigest()
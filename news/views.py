@@ -1,12 +1,13 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.views.generic import DetailView
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db.models import Q, Count
+from django.db import transaction
 # THIS LINE IS FIXED: I have removed the broken 'Profile' import.
-from .models import Article, Category, UserPreference, ReadingHistory, SummaryFeedback, ArticleLike, Bookmark, Comment, UserArticleMetrics
+from .models import Article, Category, UserPreference, ReadingHistory, SummaryFeedback, ArticleLike, Bookmark, Comment, UserArticleMetrics, Job, ScrapeRun
 from .forms import UserPreferenceForm, SummaryFeedbackForm, CommentForm
-from news.utils.scraper import fetch_articles, generate_audio_summary, generate_summary, get_full_article_text
+from news.utils.scraper import fetch_full_article_text
+from news.utils import cursors, http, jobs, search
 from django.contrib.admin.views.decorators import staff_member_required
 from django.http import Http404, JsonResponse
 from django.views.decorators.http import require_POST
@@ -15,15 +16,17 @@ from django.conf import settings
 import os
 import logging
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from rest_framework import viewsets, permissions
 from rest_framework.permissions import IsAuthenticated
 from .serializers import ArticleSerializer, UserPreferenceSerializer
+from .pagination import ArticleCursorPagination
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.views.decorators.cache import cache_page
 from django.views.decorators.vary import vary_on_cookie
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
@@ -37,35 +40,33 @@ def article_list(request):
     end_date_str = request.GET.get("end_date")
     min_likes_str = request.GET.get("min_likes")
     min_comments_str = request.GET.get("min_comments")
-    sort_by = request.GET.get("sort_by", "-published_at")
+    # Searches rank by relevance unless another order is asked for.
+    sort_by = request.GET.get("sort_by", "relevance" if query else "-published_at")
 
     articles = Article.objects.filter(approved=True)
 
     if category_filter and category_filter != "All":
-        articles = articles.filter(category__name__iexact=category_filter)
+        # A subquery on the (small) category table, so the join seeks by category_id.
+        articles = articles.filter(category__in=Category.objects.filter(name__iexact=category_filter))
 
     if query:
-        articles = articles.filter(Q(title__icontains=query) | Q(content__icontains=query))
+        articles = search.search(articles, query)
 
+    # Dates become a published_at range (midnight to midnight, local time), which
+    # the (approved, published_at) index can seek; __date would wrap the column.
     if start_date_str:
         try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            articles = articles.filter(published_at__date__gte=start_date)
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
+            articles = articles.filter(published_at__gte=timezone.make_aware(start_date))
         except ValueError:
             pass
     if end_date_str:
         try:
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-            articles = articles.filter(published_at__date__lte=end_date)
+            end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+            articles = articles.filter(published_at__lt=timezone.make_aware(end_date + timedelta(days=1)))
         except ValueError:
             pass
 
-    if min_likes_str or min_comments_str or sort_by in ["most_popular_likes", "most_popular_comments"]:
-        articles = articles.annotate(
-            like_count=Count('likes', distinct=True),
-            comment_count=Count('comments', distinct=True)
-        )
-
     if min_likes_str:
         try:
             min_likes = int(min_likes_str)
@@ -79,16 +80,14 @@ def article_list(request):
         except (ValueError, TypeError):
             pass
 
-    if sort_by == "most_popular_likes":
-        articles = articles.order_by('-like_count', '-published_at')
-    elif sort_by == "most_popular_comments":
-        articles = articles.order_by('-comment_count', '-published_at')
-    else:
-        articles = articles.order_by(sort_by)
-
-    paginator = Paginator(articles, 6)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    # NEW: Keyset pagination (news.utils.cursors): pages follow a signed cursor
+    # instead of a page number, so page 500 costs what page 1 does.
+    sort_by = cursors.resolve_sort(sort_by, searching=bool(query))
+    try:
+        page_obj = cursors.paginate(articles, sort_by, request.GET.get("cursor"), page_size=6)
+    except cursors.InvalidCursor:
+        page_obj = cursors.paginate(articles, sort_by, page_size=6)
+    total_count, total_exact = cursors.estimate_count(articles)
 
     if request.user.is_authenticated:
         page_article_ids = [article.id for article in page_obj]
@@ -101,6 +100,8 @@ def article_list(request):
         for article in page_obj:
             article.is_liked_by_user = False
             article.is_bookmarked_by_user = False
+    for article in page_obj:
+        article.search_highlight = search.highlight(getattr(article, 'search_snippet', None))
 
     categories = Category.objects.all()
     context = {
@@ -115,6 +116,8 @@ def article_list(request):
         "sort_by": sort_by,
         "is_paginated": page_obj.has_other_pages(),
         "page_obj": page_obj,
+        "total_count": total_count,
+        "total_exact": total_exact,
     }
     return render(request, "news/article_list.html", context)
 
@@ -122,6 +125,20 @@ def article_list(request):
 class ArticleViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Article.objects.filter(approved=True).order_by('-published_at')
     serializer_class = ArticleSerializer
+    # NEW: Keyset pages; ?sort_by= as on the article list (news.pagination).
+    pagination_class = ArticleCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # NEW: ?url= finds an article by any form of its url, through the url_hash index.
+        url = self.request.query_params.get('url')
+        if url:
+            queryset = queryset.filter(url_hash=Article.hash_url(url))
+        # NEW: ?q= full-text search, best matches first (news.utils.search).
+        query = self.request.query_params.get('q')
+        if query:
+            queryset = search.search(queryset, query).order_by('search_rank', '-published_at')
+        return queryset
 
 class UserPreferenceViewSet(viewsets.ModelViewSet):
     queryset = UserPreference.objects.all()
@@ -140,7 +157,7 @@ class GenerateAudioAPIView(APIView):
     def post(self, request, pk, format=None):
         article = get_object_or_404(Article, pk=pk)
         if not article.summary:
-            summary_text = generate_summary(article.content)
+            summary_text = article.summary_for(3)
             if summary_text:
                 article.summary = summary_text
                 article.save()
@@ -151,16 +168,8 @@ class GenerateAudioAPIView(APIView):
                 )
         if article.audio_file:
             return Response({'audio_url': article.audio_file.url}, status=status.HTTP_200_OK)
-        audio_url = generate_audio_summary(article.summary, article.id)
-        if audio_url:
-            article.audio_file.name = audio_url.replace(settings.MEDIA_URL, '', 1)
-            article.save()
-            return Response({'audio_url': audio_url}, status=status.HTTP_200_OK)
-        else:
-            return Response(
-                {'detail': 'Failed to generate audio summary.'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        job, _ = jobs.enqueue(Job.ACTION_AUDIO, article)
+        return Response(_job_payload(request, job), status=status.HTTP_202_ACCEPTED)
 # --- END OF YOUR API CODE ---
 
 
@@ -170,15 +179,12 @@ def homepage(request):
 
 @login_required
 def article_detail(request, pk):
-    article = get_object_or_404(Article, pk=pk)
+    # The one page that shows the full text: fetch the body with the article.
+    article = get_object_or_404(Article.objects.select_related('body'), pk=pk)
 
     if not article.approved and not request.user.is_staff:
         raise Http404("This article is pending approval.")
 
-    feedback_useful = SummaryFeedback.objects.filter(article=article, useful=True).count()
-    feedback_not_useful = SummaryFeedback.objects.filter(article=article, useful=False).count()
-    feedback_total = feedback_useful + feedback_not_useful
-
     feedback_submitted = False
     comment_form = CommentForm()
     comments = Comment.objects.filter(article=article, approved=True)
@@ -187,17 +193,22 @@ def article_detail(request, pk):
         if 'feedback_submit' in request.POST:
             form = SummaryFeedbackForm(request.POST)
             if form.is_valid():
-                existing_feedback = SummaryFeedback.objects.filter(user=request.user, article=article).first()
+                # The article's feedback counters move with the row (see news.models).
+                with transaction.atomic():
+                    existing_feedback = SummaryFeedback.objects.filter(user=request.user, article=article).first()
+                    if existing_feedback:
+                        existing_feedback.useful = form.cleaned_data['useful']
+                        existing_feedback.save()
+                    else:
+                        feedback = form.save(commit=False)
+                        feedback.article = article
+                        feedback.user = request.user
+                        feedback.save()
                 if existing_feedback:
-                    existing_feedback.useful = form.cleaned_data['useful']
-                    existing_feedback.save()
                     messages.info(request, "Your feedback has been updated.")
                 else:
-                    feedback = form.save(commit=False)
-                    feedback.article = article
-                    feedback.user = request.user
-                    feedback.save()
                     messages.success(request, "Thank you for your feedback.")
+                article.refresh_from_db(fields=['useful_count', 'not_useful_count'])
                 feedback_submitted = True
             else:
                 messages.error(request, "There was an error with your feedback submission.")
@@ -225,6 +236,10 @@ def article_detail(request, pk):
         is_liked_by_user = False
         is_bookmarked_by_user = False
 
+    feedback_useful = article.useful_count
+    feedback_not_useful = article.not_useful_count
+    feedback_total = feedback_useful + feedback_not_useful
+
     return render(request, "news/article_detail.html", {
         "article": article,
         "form": form,
@@ -243,24 +258,30 @@ def article_detail(request, pk):
 @login_required
 @require_POST
 def generate_summary_view(request, pk):
-    article = get_object_or_404(Article, pk=pk)
-    if article.summary:
-        return JsonResponse({'status': 'success', 'summary': article.summary})
+    article = get_object_or_404(Article.objects.select_related('body'), pk=pk)
     try:
-        full_content = article.content
-        if not full_content:
-            full_content = get_full_article_text(article.url)
-        if not full_content:
-            return JsonResponse({'status': 'error', 'message': 'Could not retrieve full article content to generate summary.'}, status=400)
-        try:
-            data = json.loads(request.body)
-            sentence_limit = data.get('sentence_limit', 3)
-        except json.JSONDecodeError:
-            sentence_limit = 3
-        summary_text = generate_summary(full_content, sentence_limit=int(sentence_limit))
-        if summary_text:
-            article.summary = summary_text
+        data = json.loads(request.body)
+        sentence_limit = data.get('sentence_limit', 3)
+    except json.JSONDecodeError:
+        sentence_limit = 3
+    try:
+        if not article.content:
+            try:
+                full_content = fetch_full_article_text(article.url)
+            except http.HostTimeout as e:
+                return JsonResponse({'status': 'error', 'message': f'The article site is not responding: {e}'}, status=504)
+            except http.FetchError as e:
+                return JsonResponse({'status': 'error', 'message': f'Could not fetch the article: {e}'}, status=502)
+            if not full_content:
+                return JsonResponse({'status': 'error', 'message': 'Could not retrieve full article content to generate summary.'}, status=400)
+            article.content = full_content
             article.save()
+        # Cheap slice of the article's stored sentence ranking; TextRank only reruns if the content changed.
+        summary_text = article.summary_for(int(sentence_limit))
+        if summary_text:
+            if not article.summary:
+                article.summary = summary_text
+                article.save()
             return JsonResponse({'status': 'success', 'summary': summary_text})
         else:
             return JsonResponse({'status': 'error', 'message': 'Summary generation failed.'}, status=500)
@@ -276,17 +297,35 @@ def generate_audio_view(request, pk):
         return JsonResponse({'status': 'error', 'message': 'Summary not available. Please generate summary first.'}, status=400)
     if article.audio_file:
         return JsonResponse({'status': 'success', 'audio_url': article.audio_file.url})
-    try:
-        audio_url = generate_audio_summary(article.summary, article.id)
-        if audio_url:
-            article.audio_file.name = audio_url.replace(settings.MEDIA_URL, '', 1)
-            article.save()
-            return JsonResponse({'status': 'success', 'audio_url': audio_url})
-        else:
-            return JsonResponse({'status': 'error', 'message': 'Audio generation failed.'}, status=500)
-    except Exception as e:
-        logger.error(f"Error generating audio for article {pk}: {e}")
-        return JsonResponse({'status': 'error', 'message': f'An error occurred: {str(e)}'}, status=500)
+    # TTS is slow; hand it to the job queue and let the page poll for the result.
+    job, _ = jobs.enqueue(Job.ACTION_AUDIO, article)
+    return JsonResponse({'status': 'queued', **_job_payload(request, job)}, status=202)
+
+
+def _job_payload(request, job):
+    return {
+        'job_id': job.pk,
+        'job_status': job.status,
+        'status_url': request.build_absolute_uri(reverse('news:job_status', kwargs={'pk': job.pk})),
+    }
+
+
+@login_required
+def job_status(request, pk):
+    job = get_object_or_404(Job, pk=pk)
+    if job.action == Job.ACTION_SCRAPE and not request.user.is_staff:
+        raise Http404("Job not found.")
+    return JsonResponse({
+        'job_id': job.pk,
+        'action': job.action,
+        'article_id': job.article_id,
+        'job_status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'run_after': job.run_after.isoformat(),
+        'result': job.result,
+        'error': job.last_error,
+    })
 
 
 @login_required
@@ -295,15 +334,18 @@ def toggle_article_like(request, pk):
     article = get_object_or_404(Article, pk=pk)
     user = request.user
     try:
-        like, created = ArticleLike.objects.get_or_create(user=user, article=article)
+        # like_count moves with the row (see news.models); read it back in the same transaction.
+        with transaction.atomic():
+            like, created = ArticleLike.objects.get_or_create(user=user, article=article)
+            if not created:
+                like.delete()
+            total_likes = Article.objects.values_list('like_count', flat=True).get(pk=article.pk)
         if not created:
-            like.delete()
             is_liked = False
             message = "Article unliked."
         else:
             is_liked = True
             message = "Article liked!"
-        total_likes = article.likes.count()
         return JsonResponse({'status': 'success', 'is_liked': is_liked, 'total_likes': total_likes, 'message': message})
     except Exception as e:
         logger.error(f"Error toggling like for article {pk} by user {user.username}: {e}")
@@ -316,9 +358,11 @@ def toggle_article_bookmark(request, pk):
     article = get_object_or_404(Article, pk=pk)
     user = request.user
     try:
-        bookmark, created = Bookmark.objects.get_or_create(user=user, article=article)
+        with transaction.atomic():
+            bookmark, created = Bookmark.objects.get_or_create(user=user, article=article)
+            if not created:
+                bookmark.delete()
         if not created:
-            bookmark.delete()
             is_bookmarked = False
             message = "Bookmark removed."
         else:
@@ -363,7 +407,7 @@ def track_article_metrics(request):
 
 @login_required
 def bookmark_list(request):
-    bookmarks = Bookmark.objects.filter(user=request.user).order_by('-created_at')
+    bookmarks = Bookmark.objects.filter(user=request.user).select_related('article').order_by('-created_at')
     article_ids = [b.article.id for b in bookmarks]
     liked_articles_ids = ArticleLike.objects.filter(user=request.user, article__id__in=article_ids).values_list('article__id', flat=True)
     for bookmark in bookmarks:
@@ -405,7 +449,7 @@ def personalized_recommendations(request):
 
 @login_required
 def reading_history(request):
-    history = ReadingHistory.objects.filter(user=request.user).order_by('-read_at')
+    history = ReadingHistory.objects.filter(user=request.user).select_related('article').order_by('-read_at')
     if request.user.is_authenticated:
         article_ids = [h.article.id for h in history]
         liked_articles_ids = ArticleLike.objects.filter(user=request.user, article__id__in=article_ids).values_list('article__id', flat=True)
@@ -418,5 +462,52 @@ def reading_history(request):
 
 @staff_member_required
 def run_scraper_view(request):
-    new_articles = fetch_articles()
-    return render(request, "news/scraper_status.html", {"new_articles": new_articles})
\ No newline at end of file
+    job = None
+    if request.method == "POST":
+        job, created = jobs.enqueue(Job.ACTION_SCRAPE)
+        if created:
+            messages.success(request, "Scraper run queued.")
+        else:
+            messages.info(request, "A scraper run is already queued or running.")
+    else:
+        job = Job.objects.filter(action=Job.ACTION_SCRAPE).order_by('-created_at').first()
+    runs = ScrapeRun.objects.all()[:10]
+    return render(request, "news/scraper_status.html", {"job": job, "runs": runs, "stage_names": ScrapeRun.STAGES})
+
+
+# NEW: Recent scrape runs as JSON, for monitoring.
+@staff_member_required
+def scraper_runs(request):
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 20)), 100))
+    except ValueError:
+        limit = 20
+    return JsonResponse({'runs': [run.as_dict() for run in ScrapeRun.objects.all()[:limit]]})
+
+
+@staff_member_required
+def scraper_progress(request, pk):
+    """
+    Incremental progress of a scrape job: its status, the totals of its current
+    run and the articles that run stored after `?after=<article id>`. The status
+    page polls it with the last id it has seen, so each article is sent once.
+    """
+    job = get_object_or_404(Job, pk=pk, action=Job.ACTION_SCRAPE)
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        after = 0
+    limit = getattr(settings, "SCRAPER_PROGRESS_PAGE_SIZE", 100)
+    run = job.scrape_runs.order_by('-id').first()
+    articles = []
+    if run:
+        articles = list(run.articles.filter(pk__gt=after).order_by('pk').values('id', 'title', 'url', 'source')[:limit])
+    return JsonResponse({
+        'job_id': job.pk,
+        'job_status': job.status,
+        'error': job.last_error,
+        'run': run.progress_dict() if run else None,
+        'articles': articles,
+        'last_id': articles[-1]['id'] if articles else after,
+        'more': len(articles) == limit,
+    })